@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from modules.configs import Config
 
@@ -35,5 +36,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Required for the document-loading process pool in frozen (PyInstaller) builds.
+    multiprocessing.freeze_support()
     main()
 
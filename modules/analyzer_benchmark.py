@@ -0,0 +1,87 @@
+"""Measure how fast and how well analyzer models route questions, per provider.
+
+Usage: python -m modules.analyzer_benchmark [PROVIDER:MODEL ...]
+
+Without arguments the configured analyzer (``ANALYZER_LLM_TYPE`` /
+``ANALYZER_AI_MODEL``) is measured; otherwise each ``provider:model`` given,
+e.g. ``ollama:qwen2.5:0.5b gemini:gemini-2.0-flash-lite``. Models of the
+configured analyzer or answering provider use its API key and base URL;
+others use the provider defaults. Every model classifies the labelled
+questions of ``router_examples.txt`` with the analyzer prompt and limits the
+app uses, so the latency includes real network round-trips. Timeouts and
+unclear answers are counted as fallbacks to the keyword heuristic.
+"""
+import copy
+import random
+import sys
+import time
+
+import numpy as np
+
+from modules.connectors_manager import ANALYZER_STOP, PromptAnalyzerAgent, build_analyzer_llm
+from modules.local_router import load_examples
+from modules.prompts_manager import PromptsManager
+
+
+def benchmark(analyzers, examples, prompt_template: str, persona: str = None) -> list:
+    """Classify ``(label, question)`` pairs with each ``name -> llm`` analyzer.
+
+    Returns one dict per analyzer with the mean and p95 latency per
+    question, the share of questions the LLM failed to answer (heuristic
+    fallbacks) and the accuracy of the final decisions against the labels.
+    """
+    results = []
+    for name, llm in analyzers.items():
+        agent = PromptAnalyzerAgent(llm, prompt_template, persona=persona, stop=ANALYZER_STOP)
+        latencies, fallbacks, correct = [], 0, 0
+        for label, question in examples:
+            started = time.perf_counter()
+            decision = agent._ask_llm(question)
+            latencies.append(time.perf_counter() - started)
+            if decision is None:
+                fallbacks += 1
+                decision = agent._heuristic_decide(question)
+            correct += decision.value == label
+        results.append({
+            "analyzer": name,
+            "questions": len(examples),
+            "mean_ms": 1000 * float(np.mean(latencies)) if latencies else 0.0,
+            "p95_ms": 1000 * float(np.percentile(latencies, 95)) if latencies else 0.0,
+            "fallback_rate": fallbacks / len(examples) if examples else 0.0,
+            "accuracy": correct / len(examples) if examples else 0.0,
+        })
+    return results
+
+
+def _analyzer_config(config, spec: str):
+    provider, _, model = spec.partition(":")
+    cfg = copy.copy(config)
+    cfg.ANALYZER_LLM_TYPE, cfg.ANALYZER_AI_MODEL = provider, model
+    if provider == config.ANALYZER_LLM_TYPE:
+        cfg.ANALYZER_AI_API_KEY, cfg.ANALYZER_AI_BASE_URL = config.ANALYZER_AI_API_KEY, config.ANALYZER_AI_BASE_URL
+    elif provider == config.LLM_TYPE:
+        cfg.ANALYZER_AI_API_KEY, cfg.ANALYZER_AI_BASE_URL = config.LLM_AI_API_KEY, config.LLM_AI_BASE_URL
+    else:
+        cfg.ANALYZER_AI_API_KEY = cfg.ANALYZER_AI_BASE_URL = None
+    return cfg
+
+
+def main(argv=None, questions: int = 40):
+    from modules.configs import config
+
+    argv = sys.argv[1:] if argv is None else argv
+    specs = argv or [f"{config.ANALYZER_LLM_TYPE}:{config.ANALYZER_AI_MODEL}"]
+    examples = load_examples(PromptsManager.prompt_path("router_examples.txt"))
+    examples = random.Random(0).sample(examples, min(questions, len(examples)))
+    analyzers = {spec: build_analyzer_llm(_analyzer_config(config, spec)) for spec in specs}
+    prompt = PromptsManager(config).get_analyzer_prompt() or ""
+    print(f"{len(examples)} questions, max {config.ANALYZER_MAX_TOKENS} tokens, {config.ANALYZER_TIMEOUT:.0f}s timeout")
+    for row in benchmark(analyzers, examples, prompt, persona=config.AI_PERSONA):
+        print(
+            f"{row['analyzer']}: {row['mean_ms']:.0f} ms mean / {row['p95_ms']:.0f} ms p95, "
+            f"{row['fallback_rate']:.0%} fallbacks, {row['accuracy']:.0%} accurate"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import hashlib
+from typing import Optional
+
+import numpy as np
+
+_SHIFT = np.uint64(32)
+_BYTE = np.uint64(8)
+_SHINGLE_MULTIPLIER = np.uint64(0x9E37_79B9_7F4A_7C15)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple:
+    """Pick ``(bands, rows)`` whose LSH threshold ``(1/bands) ** (1/rows)`` is closest below ``threshold``.
+
+    Erring low favours recall; every candidate is verified against the
+    cutoff afterwards, so a low band threshold only costs comparisons.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class ChunkDeduplicator:
+    """Detects exact and near-duplicate chunks before they are embedded.
+
+    Exact duplicates are caught by hashing the whitespace/case-normalized
+    text. Near duplicates use MinHash signatures over byte 5-gram shingles
+    and a banded LSH table, so each chunk is only compared with the few
+    earlier chunks sharing a band. The signature only estimates similarity,
+    so a candidate counts as a duplicate when the exact Jaccard similarity of
+    both shingle sets reaches ``threshold``. ``threshold >= 1`` keeps exact
+    matching only.
+
+    ``check`` returns the owner of the chunk that was kept, so callers can
+    record which sources a dropped chunk depended on.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._signatures = []
+        self._texts = []
+        self._owners = []
+        self._exact = {}
+        self.seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Hashes of the byte ``shingle_size``-grams of ``text``."""
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        if len(data) < self.shingle_size:
+            data = np.pad(data, (0, self.shingle_size - len(data)))
+        count = len(data) - self.shingle_size + 1
+        shingles = data[:count]
+        for offset in range(1, self.shingle_size):
+            shingles = (shingles << _BYTE) | data[offset:offset + count]
+        # Multiply-(add-)shift hashing throughout: 64-bit wrap-around is intended
+        # and avoids the much slower modulo of the classic (a * x + b) % p scheme.
+        return shingles * _SHINGLE_MULTIPLIER >> _SHIFT
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = self.shingles(text)
+        return ((self._a * shingles + self._b) >> _SHIFT).min(axis=1).astype(np.uint32)
+
+    def jaccard(self, first: str, second: str) -> float:
+        """Exact Jaccard similarity of the shingle sets of two texts."""
+        a, b = np.unique(self.shingles(first)), np.unique(self.shingles(second))
+        return len(np.intersect1d(a, b, assume_unique=True)) / len(np.union1d(a, b))
+
+    def check(self, owner, text: str) -> Optional[object]:
+        """Return the owner of an earlier duplicate of ``text``, or register it and return ``None``."""
+        self.seen += 1
+        normalized = _normalize(text)
+        digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+        original = self._exact.get(digest)
+        if original is not None:
+            self.exact_duplicates += 1
+            return original
+        if self.threshold < 1:
+            signature = self.signature(normalized)
+            bands = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+            candidates = {index for band, bucket in zip(bands, self._buckets) for index in bucket.get(band, ())}
+            for index in sorted(candidates):
+                if np.mean(self._signatures[index] == signature) < self.threshold:
+                    continue
+                # Texts differing in a few characters (stat blocks, dice, prices) often estimate above
+                # the threshold; only the exact similarity decides what is dropped.
+                if self.jaccard(self._texts[index], normalized) >= self.threshold:
+                    self.near_duplicates += 1
+                    return self._owners[index]
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            self._texts.append(normalized)
+            self._owners.append(owner)
+            for band, bucket in zip(bands, self._buckets):
+                bucket.setdefault(band, []).append(index)
+        self._exact[digest] = owner
+        return None
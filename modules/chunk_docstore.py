@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+_SCHEMA = "CREATE TABLE chunks (id INTEGER PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+_WRITE_BATCH = 1000
+
+
+class ChunkDocstore(Docstore, AddableMixin):
+    """Docstore of chunk texts keyed by ``str(chunk id)``, persisted as a SQLite file.
+
+    Eager stores read every chunk into memory when loaded. Lazy stores keep
+    only chunks added since the last ``write`` in memory and read the rest
+    from the file when a search hits them, so opening a large store costs
+    nothing and several processes share the file through the page cache.
+
+    ``write`` always produces a new file; ``IndexStore`` gives every save its
+    own file name, so a process still reading the previous version is never
+    affected and no open file has to be replaced.
+    """
+
+    def __init__(self, documents: Dict[str, Document] = None):
+        self._docs = dict(documents or {})
+        self._deleted = set()
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, lazy: bool = False) -> "ChunkDocstore":
+        conn = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True, check_same_thread=False)
+        if lazy:
+            store = cls()
+            store._conn = conn
+            return store
+        try:
+            return cls({str(i): _document(i, content, metadata) for i, content, metadata in conn.execute(
+                "SELECT id, content, metadata FROM chunks"
+            )})
+        finally:
+            conn.close()
+
+    @property
+    def lazy(self) -> bool:
+        return self._conn is not None
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            doc = self._docs.get(search)
+            if doc is None and self._conn is not None and search not in self._deleted:
+                row = self._conn.execute(
+                    "SELECT id, content, metadata FROM chunks WHERE id = ?", (int(search),)
+                ).fetchone()
+                if row is not None:
+                    doc = _document(*row)
+        return doc if doc is not None else f"ID {search} not found."
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        with self._lock:
+            self._docs.update(texts)
+            self._deleted.difference_update(texts)
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            for i in ids:
+                self._docs.pop(i, None)
+                if self._conn is not None:
+                    self._deleted.add(i)
+
+    def items(self) -> Iterator[Tuple[str, Document]]:
+        """Every stored ``(id, document)``; lazy stores read the file in one pass."""
+        with self._lock:
+            docs = dict(self._docs)
+            rows = []
+            if self._conn is not None:
+                rows = self._conn.execute("SELECT id, content, metadata FROM chunks").fetchall()
+            skip = self._deleted | set(docs)
+        for row in rows:
+            if str(row[0]) not in skip:
+                yield str(row[0]), _document(*row)
+        yield from docs.items()
+
+    def write(self, path) -> None:
+        """Save every chunk to the new file ``path`` via a temporary file; lazy stores then read from it."""
+        path = Path(path)
+        tmp_path = path.with_suffix(".tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        conn = sqlite3.connect(str(tmp_path))
+        try:
+            conn.execute(_SCHEMA)
+            batch = []
+            for i, doc in self.items():
+                batch.append((int(i), doc.page_content, json.dumps(doc.metadata, default=str)))
+                if len(batch) >= _WRITE_BATCH:
+                    conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", batch)
+                    batch = []
+            conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", batch)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+        if self._conn is not None:
+            reopened = sqlite3.connect(f"file:{path.resolve()}?mode=ro", uri=True, check_same_thread=False)
+            with self._lock:
+                self._conn.close()
+                self._conn = reopened
+                self._docs = {}
+                self._deleted = set()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+
+
+def _document(i, content: str, metadata: str) -> Document:
+    return Document(id=str(i), page_content=content, metadata=json.loads(metadata))
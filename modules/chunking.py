@@ -0,0 +1,197 @@
+import math
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+from langchain_core.documents import Document
+from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
+
+CHUNK_STRATEGIES = ("tokens", "characters")
+# Rough characters per token of English text for BPE tokenizers; used where
+# character and token sizes have to be compared (ingestion estimates).
+CHARS_PER_TOKEN = 4
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+# Unstructured element categories that open a new section.
+_HEADING_CATEGORIES = {"Title"}
+# Element metadata worth keeping on a chunk; the rest (coordinates, ids, ...) only bloats the docstore.
+_KEPT_ELEMENT_METADATA = ("source", "page_number")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count: one per punctuation mark, one per 4 characters of each word.
+
+    Tracks BPE tokenizers closely enough for sizing chunks and prompts
+    without depending on any provider's tokenizer, erring on the high side
+    for short common words.
+    """
+    return sum(math.ceil(len(piece) / CHARS_PER_TOKEN) for piece in _PIECE.findall(text))
+
+
+class ChunkSettings(NamedTuple):
+    """How to size chunks: ``size`` and ``overlap`` count tokens or characters, per ``strategy``."""
+
+    strategy: str = "tokens"
+    size: int = 256
+    overlap: int = 32
+
+    def characters(self) -> tuple:
+        """``(size, overlap)`` in characters."""
+        if self.strategy == "characters":
+            return self.size, self.overlap
+        return self.size * CHARS_PER_TOKEN, self.overlap * CHARS_PER_TOKEN
+
+
+def parse_chunk_settings(spec: str, default: ChunkSettings = ChunkSettings()) -> dict:
+    """Parse ``"pdf=tokens:512:64, csv=characters:300:0, md=384"`` into extension -> ``ChunkSettings``.
+
+    Omitted parts fall back to ``default``; a bare size keeps the default
+    strategy and overlap.
+    """
+    settings = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        extension, _, value = item.partition("=")
+        parts = [part.strip() for part in value.split(":")]
+        if parts and parts[0] and not parts[0].isdigit():
+            strategy, parts = parts[0].lower(), parts[1:]
+        else:
+            strategy = default.strategy
+        try:
+            size = int(parts[0]) if parts and parts[0] else default.size
+            overlap = int(parts[1]) if len(parts) > 1 and parts[1] else default.overlap
+        except ValueError:
+            raise ValueError(f"Invalid chunk settings: {item.strip()}") from None
+        extension = extension.strip().lower()
+        settings[extension if extension.startswith(".") else f".{extension}"] = _validated(
+            ChunkSettings(strategy, size, overlap)
+        )
+    return settings
+
+
+def _validated(settings: ChunkSettings) -> ChunkSettings:
+    if settings.strategy not in CHUNK_STRATEGIES:
+        raise ValueError(f"Unsupported chunk strategy: {settings.strategy}")
+    if settings.size <= 0 or not 0 <= settings.overlap < settings.size:
+        raise ValueError(f"Invalid chunk size/overlap: {settings.size}/{settings.overlap}")
+    return settings
+
+
+def _length(settings: ChunkSettings):
+    return estimate_tokens if settings.strategy == "tokens" else len
+
+
+class StructuredChunker:
+    """Splits a file's loaded documents into chunks along its structure.
+
+    Sizes are measured in estimated tokens (or characters, for the legacy
+    strategy), with per-extension overrides in ``by_type``. Documents are
+    never merged across: ``PyMuPDFLoader`` yields one document per page, so
+    a chunk never spans two pages. Unstructured loaders in ``elements`` mode
+    (Markdown, HTML and the generic fallback) yield one document per
+    element; those are grouped into sections at each heading, consecutive
+    sections are packed together while they fit one chunk, and only a
+    section larger than a chunk is split inside. Element metadata is
+    reduced to the source, page number and section heading. Chunks cut from
+    a longer text record their ``start_index`` in it, so neighbours can be
+    stitched back together (see ``ContextPacker``).
+
+    Exposes ``split_documents`` like the LangChain text splitters, taking
+    all documents of one file at a time.
+    """
+
+    def __init__(self, default: ChunkSettings = ChunkSettings(), by_type: dict = None):
+        self.default = _validated(ChunkSettings(*default))
+        self.by_type = {extension: _validated(settings) for extension, settings in (by_type or {}).items()}
+        self._splitters = {}
+
+    def settings_for(self, file) -> ChunkSettings:
+        return self.by_type.get(Path(str(file)).suffix.lower(), self.default)
+
+    def describe(self) -> dict:
+        """JSON-ready summary for the index manifest; any change means the index must be rebuilt."""
+        return {
+            "strategy": self.default.strategy,
+            "chunk_size": self.default.size,
+            "chunk_overlap": self.default.overlap,
+            "by_type": {extension: list(settings) for extension, settings in sorted(self.by_type.items())},
+            "start_index": True,
+        }
+
+    def _splitter(self, settings: ChunkSettings) -> RecursiveCharacterTextSplitter:
+        splitter = self._splitters.get(settings)
+        if splitter is None:
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=settings.size,
+                chunk_overlap=settings.overlap,
+                length_function=_length(settings),
+            )
+            self._splitters[settings] = splitter
+        return splitter
+
+    def split_documents(self, documents) -> list:
+        documents = list(documents)
+        if not documents:
+            return []
+        settings = self.settings_for(documents[0].metadata.get("source", ""))
+        if any("category" in doc.metadata for doc in documents):
+            return self._split_sections(documents, settings)
+        return self._split(documents, settings)
+
+    def _split(self, documents, settings: ChunkSettings) -> list:
+        """Split each document on its own, recording where each chunk starts in it.
+
+        Offsets are found here rather than with the splitter's
+        ``add_start_index``, which assumes overlap is measured in characters.
+        """
+        splitter = self._splitter(settings)
+        chunks = []
+        for doc in documents:
+            text, offset = doc.page_content, 0
+            for piece in splitter.split_text(text):
+                metadata = dict(doc.metadata)
+                start = text.find(piece, offset)
+                if start != -1:
+                    metadata["start_index"] = start
+                    offset = start + 1
+                chunks.append(Document(page_content=piece, metadata=metadata))
+        return chunks
+
+    def _split_sections(self, elements, settings: ChunkSettings) -> list:
+        """Group element documents into heading-led sections, packing small neighbours together.
+
+        A section too large for one chunk is split on its own and every piece
+        is prefixed with the heading, so no chunk loses its context.
+        """
+        sections = []
+        for element in elements:
+            heading = element.metadata.get("category") in _HEADING_CATEGORIES
+            if heading or not sections:
+                metadata = {key: element.metadata[key] for key in _KEPT_ELEMENT_METADATA if key in element.metadata}
+                title = element.page_content.strip() if heading else ""
+                if title:
+                    metadata["section"] = title
+                sections.append((title, [], metadata))
+                if heading:
+                    continue
+            sections[-1][1].append(element.page_content)
+
+        length = _length(settings)
+        chunks, open_chunk = [], None
+        for title, texts, metadata in sections:
+            text = "\n\n".join(part for part in [title] + texts if part)
+            if open_chunk is not None and length(open_chunk.page_content + "\n\n" + text) <= settings.size:
+                open_chunk.page_content += "\n\n" + text
+            elif length(text) <= settings.size:
+                open_chunk = Document(page_content=text, metadata=metadata)
+                chunks.append(open_chunk)
+            else:
+                # Pieces of a split section are full already; nothing gets packed after them.
+                open_chunk = None
+                body = Document(page_content="\n\n".join(texts), metadata=metadata)
+                for piece in self._split([body], settings):
+                    if title:
+                        piece.page_content = f"{title}\n\n{piece.page_content}"
+                    chunks.append(piece)
+        return chunks
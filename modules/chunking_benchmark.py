@@ -0,0 +1,93 @@
+"""Compare chunking strategies on a knowledge folder: chunk count, build time and retrieval latency.
+
+Usage: python -m modules.chunking_benchmark [KNOWLEDGE_PATH]
+
+Files are loaded once with the app's loaders, then split by every strategy
+in ``STRATEGIES``. No embeddings are requested: each chunk gets a random
+vector of the embeddings' usual size, which is all the index build and
+search timings depend on. Tokens and embedding requests are what a real
+build would send to the provider.
+"""
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from modules.chunking import ChunkSettings, StructuredChunker, estimate_tokens
+from modules.faiss_index import build_index, choose_index_type, search_params
+
+STRATEGIES = {
+    "characters 300/30": StructuredChunker(ChunkSettings("characters", 300, 30)),
+    "tokens 128/16": StructuredChunker(ChunkSettings("tokens", 128, 16)),
+    "tokens 256/32": StructuredChunker(ChunkSettings("tokens", 256, 32)),
+    "tokens 512/64": StructuredChunker(ChunkSettings("tokens", 512, 64)),
+}
+
+
+def benchmark(files, strategies=None, dim: int = 768, k: int = 4, queries: int = 100, batch_size: int = 64,
+              seed: int = 0) -> list:
+    """Split ``files`` (``(file, documents)`` pairs) with each strategy and index the result.
+
+    Returns one dict per strategy with the chunk count, estimated tokens
+    and embedding requests (``batch_size`` texts each), split and index
+    build seconds, and the mean and p95 latency of a ``k``-nearest search.
+    """
+    strategies = STRATEGIES if strategies is None else strategies
+    rng = np.random.default_rng(seed)
+    results = []
+    for name, chunker in strategies.items():
+        started = time.perf_counter()
+        chunks = [chunk for _, docs in files for chunk in chunker.split_documents(docs)]
+        split_seconds = time.perf_counter() - started
+        row = {
+            "strategy": name,
+            "chunks": len(chunks),
+            "tokens": sum(estimate_tokens(chunk.page_content) for chunk in chunks),
+            "embedding_requests": math.ceil(len(chunks) / batch_size),
+            "split_seconds": split_seconds,
+        }
+        if chunks:
+            vectors = rng.normal(size=(len(chunks), dim)).astype(np.float32)
+            started = time.perf_counter()
+            index = build_index(choose_index_type("auto", len(chunks)), vectors, np.arange(len(chunks), dtype=np.int64))
+            row["build_seconds"] = time.perf_counter() - started
+            params = search_params(index)
+            latencies = []
+            for query in vectors[rng.choice(len(chunks), size=min(queries, len(chunks)), replace=False)]:
+                started = time.perf_counter()
+                index.search(query[None, :], k, params=params)
+                latencies.append(time.perf_counter() - started)
+            row["mean_ms"] = 1000 * float(np.mean(latencies))
+            row["p95_ms"] = 1000 * float(np.percentile(latencies, 95))
+        results.append(row)
+    return results
+
+
+def main(argv=None):
+    from modules.configs import config
+    from modules.docs_manager import DocsManager
+
+    argv = sys.argv[1:] if argv is None else argv
+    root = Path(argv[0] if argv else config.LOCAL_KNOWLEDGE_PATH or "uploads")
+    docs_manager = DocsManager(config)
+    paths = [(path, False) for path in sorted(root.glob("**/*"))
+             if path.is_file() and path.suffix.lower() not in docs_manager.ignored_types()]
+    files = list(docs_manager.iter_docs(paths))
+    print(f"{len(files)} files, {sum(len(docs) for _, docs in files)} loaded documents")
+    for row in benchmark(files, batch_size=config.EMBEDDINGS_BATCH_SIZE):
+        line = (
+            f"{row['strategy']:>17}: {row['chunks']} chunks, ~{row['tokens']} tokens, "
+            f"{row['embedding_requests']} embedding requests, split in {row['split_seconds']:.2f}s"
+        )
+        if row["chunks"]:
+            line += (
+                f", index built in {row['build_seconds']:.2f}s, "
+                f"search {row['mean_ms']:.3f} ms mean / {row['p95_ms']:.3f} ms p95"
+            )
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
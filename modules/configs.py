@@ -64,6 +64,14 @@ def load_texts(filepath: str) -> dict:
     parser.read_string(content)
     return dict(parser["DEFAULT"])
 
+def load_all_texts() -> dict:
+    """Texts of every bundled language, by language code."""
+    texts_dir = os.path.join(_resource_base(), "texts")
+    return {
+        name[:-len(".properties")]: load_texts(os.path.join(texts_dir, name))
+        for name in sorted(os.listdir(texts_dir)) if name.endswith(".properties")
+    }
+
 class Config:
     def __init__(self):
         if _FROZEN:
@@ -82,7 +90,54 @@ class Config:
         self.AI_PERSONA = os.getenv("AI_PERSONA", None)
         self.LOCAL_KNOWLEDGE_PATH = os.getenv("LOCAL_KNOWLEDGE_PATH", None)
         self.LOCAL_KNOWLEDGE_DOC_TYPES = os.getenv("LOCAL_KNOWLEDGE_DOC_TYPES", "").split(",") if os.getenv("LOCAL_KNOWLEDGE_DOC_TYPES") else []
+        self.LOCAL_KNOWLEDGE_MAX_FILE_MB = float(os.getenv("LOCAL_KNOWLEDGE_MAX_FILE_MB", "100"))
         self.EMBEDDINGS_AI_MODEL = os.getenv("EMBEDDINGS_AI_MODEL", None)
+        self.INDEX_STORE_PATH = os.getenv("INDEX_STORE_PATH", "index_store")
+        self.INDEX_LOAD_MODE = os.getenv("INDEX_LOAD_MODE", "memory").lower()
+        self.FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto").lower()
+        self.FAISS_QUANTIZATION = os.getenv("FAISS_QUANTIZATION", "none").lower()
+        self.FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+        self.FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+        self.RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector").lower()
+        self.RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "20"))
+        self.MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))
+        self.CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET")) if os.getenv("CONTEXT_TOKEN_BUDGET") else None
+        # The routing model defaults to the answering provider and model, with tight limits.
+        self.ANALYZER_LLM_TYPE = os.getenv("ANALYZER_LLM_TYPE") or self.LLM_TYPE
+        same_provider = self.ANALYZER_LLM_TYPE == self.LLM_TYPE
+        self.ANALYZER_AI_MODEL = os.getenv("ANALYZER_AI_MODEL") or (self.LLM_AI_MODEL if same_provider else None)
+        self.ANALYZER_AI_API_KEY = os.getenv("ANALYZER_AI_API_KEY") or (self.LLM_AI_API_KEY if same_provider else None)
+        self.ANALYZER_AI_BASE_URL = os.getenv("ANALYZER_AI_BASE_URL") or (self.LLM_AI_BASE_URL if same_provider else None)
+        self.ANALYZER_MAX_TOKENS = int(os.getenv("ANALYZER_MAX_TOKENS", "3"))
+        self.ANALYZER_TIMEOUT = float(os.getenv("ANALYZER_TIMEOUT", "5"))
+        self.ROUTING_MODE = os.getenv("ROUTING_MODE", "llm").lower()
+        self.ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "1"))
+        self.ROUTER_MODEL_PATH = os.getenv("ROUTER_MODEL_PATH", os.path.join(self.INDEX_STORE_PATH, "router.npz"))
+        self.ROUTING_CACHE_SIZE = int(os.getenv("ROUTING_CACHE_SIZE", "1024"))
+        self.ROUTING_CACHE_PATH = os.getenv("ROUTING_CACHE_PATH", os.path.join(self.INDEX_STORE_PATH, "routing_cache.sqlite"))
+        self.SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "True").lower() in ("1", "true", "yes", "y")
+        self.RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+        self.RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "300"))
+        self.DOCS_LOADER_WORKERS = int(os.getenv("DOCS_LOADER_WORKERS", "1"))
+        self.EMBEDDINGS_CACHE_PATH = os.getenv(
+            "EMBEDDINGS_CACHE_PATH", os.path.join(self.INDEX_STORE_PATH, "embeddings_cache.sqlite")
+        )
+        self.EMBEDDINGS_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDINGS_CACHE_MAX_ENTRIES", "200000"))
+        self.QUERY_EMBEDDINGS_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDINGS_CACHE_SIZE", "1024"))
+        self.QUERY_EMBEDDINGS_CACHE_PERSIST = os.getenv("QUERY_EMBEDDINGS_CACHE_PERSIST", "True").lower() in ("1", "true", "yes", "y")
+        self.CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "tokens").lower()
+        self.CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "256"))
+        self.CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "32"))
+        self.CHUNK_SETTINGS_BY_TYPE = os.getenv("CHUNK_SETTINGS_BY_TYPE", "")
+        self.CHUNK_DEDUP_THRESHOLD = float(os.getenv("CHUNK_DEDUP_THRESHOLD", "1"))
+        self.INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+        self.EMBEDDINGS_BATCH_SIZE = int(os.getenv("EMBEDDINGS_BATCH_SIZE", "64"))
+        self.EMBEDDINGS_MAX_IN_FLIGHT = int(os.getenv("EMBEDDINGS_MAX_IN_FLIGHT", "4"))
+        self.EMBEDDINGS_REQUESTS_PER_MINUTE = float(os.getenv("EMBEDDINGS_REQUESTS_PER_MINUTE")) if os.getenv("EMBEDDINGS_REQUESTS_PER_MINUTE") else None
+        self.KNOWLEDGE_WATCH = os.getenv("KNOWLEDGE_WATCH", "False").lower() in ("1", "true", "yes", "y")
+        self.KNOWLEDGE_WATCH_DEBOUNCE = float(os.getenv("KNOWLEDGE_WATCH_DEBOUNCE", "2.0"))
+        self.KNOWLEDGE_WATCH_POLL_INTERVAL = float(os.getenv("KNOWLEDGE_WATCH_POLL_INTERVAL", "5.0"))
+        self.KNOWLEDGE_WATCH_BACKEND = os.getenv("KNOWLEDGE_WATCH_BACKEND", "auto").lower()
         self.DEBUG = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes", "y")
         self.MODE = os.getenv("MODE", "gui").lower()
         self.texts = load_texts(
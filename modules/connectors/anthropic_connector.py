@@ -12,13 +12,19 @@ class _AnthropicChatModel(BaseChatModel):
     api_key: str
     model: str
     temperature: float = 0.0
+    max_tokens: int = 4096
+    # Seconds per request; None keeps the SDK defaults (including its retries).
+    timeout: Optional[float] = None
 
     @property
     def _llm_type(self) -> str:
         return "anthropic"
 
     def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
-        client = anthropic_sdk.Anthropic(api_key=self.api_key)
+        if self.timeout is None:
+            client = anthropic_sdk.Anthropic(api_key=self.api_key)
+        else:
+            client = anthropic_sdk.Anthropic(api_key=self.api_key, timeout=self.timeout, max_retries=0)
 
         system_prompt: Optional[str] = None
         human_messages: List[dict] = []
@@ -35,12 +41,14 @@ class _AnthropicChatModel(BaseChatModel):
 
         create_kwargs: dict = {
             "model": self.model,
-            "max_tokens": 4096,
+            "max_tokens": self.max_tokens,
             "temperature": self.temperature,
             "messages": human_messages,
         }
         if system_prompt:
             create_kwargs["system"] = system_prompt
+        # The API rejects whitespace-only stop sequences.
+        stop = [sequence for sequence in stop or [] if sequence.strip()]
         if stop:
             create_kwargs["stop_sequences"] = stop
 
@@ -49,6 +57,11 @@ class _AnthropicChatModel(BaseChatModel):
         return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
 
 
+def build_analyzer_llm(api_key: str, llm_model: str, max_tokens: int, timeout: float):
+    """Chat model for one-word routing answers: a few output tokens, a short timeout and no retries."""
+    return _AnthropicChatModel(api_key=api_key, model=llm_model, max_tokens=max_tokens, timeout=timeout)
+
+
 class AnthropicConnector:
     """Anthropic connector.
 
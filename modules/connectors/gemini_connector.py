@@ -1,6 +1,41 @@
+import re
+
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
+_VERSION = re.compile(r"gemini-(\d+(?:\.\d+)?)")
+# Output tokens added for models whose thinking phase cannot be turned off,
+# since thinking tokens count against max_output_tokens.
+_THINKING_TOKENS = 512
+
+
+def _thinking_options(llm_model: str, max_tokens: int) -> dict:
+    """Keyword arguments that keep a thinking model from spending the whole output limit on thoughts."""
+    name = (llm_model or "").lower()
+    match = _VERSION.search(name)
+    version = float(match.group(1)) if match else 0.0
+    if version < 2.5:
+        return {"max_output_tokens": max_tokens}
+    if version < 3 and "pro" not in name:
+        return {"thinking_budget": 0, "max_output_tokens": max_tokens}
+    if version < 3:
+        # 2.5 Pro cannot think less than 128 tokens.
+        return {"thinking_budget": 128, "max_output_tokens": max_tokens + _THINKING_TOKENS}
+    return {"thinking_level": "low", "max_output_tokens": max_tokens + _THINKING_TOKENS}
+
+
+def build_analyzer_llm(api_key, llm_model, max_tokens, timeout):
+    """Chat model for one-word routing answers: a few output tokens, a short timeout and no retries."""
+    return ChatGoogleGenerativeAI(
+        api_key=api_key,
+        model=llm_model,
+        temperature=0.0,
+        timeout=timeout,
+        max_retries=0,
+        **_thinking_options(llm_model, max_tokens),
+    )
+
+
 class GeminiConnector:
     def __init__(self, api_key, llm_model, embedding_model, temperature):
         self.llm = ChatGoogleGenerativeAI(api_key=api_key, model=llm_model, temperature=temperature)
@@ -5,6 +5,19 @@ _DEFAULT_BASE_URL = "http://localhost:1234/v1"
 _DUMMY_API_KEY = "lmstudio"
 
 
+def build_analyzer_llm(base_url: str, llm_model: str, max_tokens: int, timeout: float):
+    """Chat model for one-word routing answers: a few output tokens, a short timeout and no retries."""
+    return ChatOpenAI(
+        openai_api_key=_DUMMY_API_KEY,
+        openai_api_base=base_url or _DEFAULT_BASE_URL,
+        model=llm_model,
+        temperature=0.0,
+        max_tokens=max_tokens,
+        request_timeout=timeout,
+        max_retries=0,
+    )
+
+
 class LMStudioConnector:
     def __init__(self, base_url: str, llm_model: str, embedding_model: str, temperature: float):
         effective_base_url = base_url or _DEFAULT_BASE_URL
@@ -4,6 +4,17 @@ from langchain_community.embeddings import OllamaEmbeddings
 _DEFAULT_BASE_URL = "http://localhost:11434"
 
 
+def build_analyzer_llm(base_url: str, llm_model: str, max_tokens: int, timeout: float):
+    """Chat model for one-word routing answers: a few output tokens and a short timeout."""
+    return ChatOllama(
+        base_url=base_url or _DEFAULT_BASE_URL,
+        model=llm_model,
+        temperature=0.0,
+        num_predict=max_tokens,
+        timeout=max(int(timeout), 1),
+    )
+
+
 class OllamaConnector:
     def __init__(self, base_url: str, llm_model: str, embedding_model: str, temperature: float):
         effective_base_url = base_url or _DEFAULT_BASE_URL
@@ -2,6 +2,19 @@ from langchain_community.chat_models import ChatOpenAI
 from langchain_community.embeddings import OpenAIEmbeddings
 
 
+def build_analyzer_llm(api_key: str, base_url: str, llm_model: str, max_tokens: int, timeout: float):
+    """Chat model for one-word routing answers: a few output tokens, a short timeout and no retries."""
+    return ChatOpenAI(
+        openai_api_key=api_key,
+        openai_api_base=base_url or None,
+        model=llm_model,
+        temperature=0.0,
+        max_tokens=max_tokens,
+        request_timeout=timeout,
+        max_retries=0,
+    )
+
+
 class OpenAIConnector:
     def __init__(self, api_key: str, base_url: str, llm_model: str, embedding_model: str, temperature: float):
         self.llm = ChatOpenAI(
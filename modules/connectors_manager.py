@@ -1,11 +1,30 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from pathlib import Path
 from typing import Optional
 
 from modules.prompts_manager import PromptsManager
+from modules.chunk_dedup import ChunkDeduplicator
+from modules.configs import load_all_texts
+from modules.chunking import ChunkSettings, StructuredChunker, parse_chunk_settings
+from modules.context_packer import ContextPacker
 from modules.docs_manager import DocsManager
+from modules.embeddings_cache import CachedEmbeddings, QueryCachedEmbeddings
+from modules.embeddings_pipeline import BatchedEmbeddings
+from modules.index_store import IndexStore, source_key
+from modules.index_watcher import RESCAN, KnowledgeWatcher
+from modules.ingestion import IngestionPipeline, IngestionResult
+from modules.ingestion_planner import SKIP_TYPE, IngestionPlan, IngestionPlanner
+from modules.local_router import LocalRouter
+from modules.retrieval import KnowledgeRetriever, RetrievalScope
+from modules.retrieval_cache import RetrievalCache
+from modules.routing_cache import RoutingCache, routing_key
+from modules.routing_rules import RoutingRules
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
-from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 
 
 class RoutingDecision(str, Enum):
@@ -47,6 +66,54 @@ _CONNECTOR_REGISTRY: dict = {
 }
 
 
+def _analyzer_gemini(cfg):
+    from modules.connectors.gemini_connector import build_analyzer_llm
+    return build_analyzer_llm(cfg.ANALYZER_AI_API_KEY, cfg.ANALYZER_AI_MODEL, cfg.ANALYZER_MAX_TOKENS, cfg.ANALYZER_TIMEOUT)
+
+
+def _analyzer_openai(cfg):
+    from modules.connectors.openai_connector import build_analyzer_llm
+    return build_analyzer_llm(
+        cfg.ANALYZER_AI_API_KEY, cfg.ANALYZER_AI_BASE_URL, cfg.ANALYZER_AI_MODEL, cfg.ANALYZER_MAX_TOKENS, cfg.ANALYZER_TIMEOUT
+    )
+
+
+def _analyzer_lmstudio(cfg):
+    from modules.connectors.lmstudio_connector import build_analyzer_llm
+    return build_analyzer_llm(cfg.ANALYZER_AI_BASE_URL, cfg.ANALYZER_AI_MODEL, cfg.ANALYZER_MAX_TOKENS, cfg.ANALYZER_TIMEOUT)
+
+
+def _analyzer_ollama(cfg):
+    from modules.connectors.ollama_connector import build_analyzer_llm
+    return build_analyzer_llm(cfg.ANALYZER_AI_BASE_URL, cfg.ANALYZER_AI_MODEL, cfg.ANALYZER_MAX_TOKENS, cfg.ANALYZER_TIMEOUT)
+
+
+def _analyzer_anthropic(cfg):
+    from modules.connectors.anthropic_connector import build_analyzer_llm
+    return build_analyzer_llm(cfg.ANALYZER_AI_API_KEY, cfg.ANALYZER_AI_MODEL, cfg.ANALYZER_MAX_TOKENS, cfg.ANALYZER_TIMEOUT)
+
+
+# Routing models: they only have to say "rag" or "simple", so output is capped
+# at a few tokens and a slow answer times out into the keyword heuristic.
+_ANALYZER_REGISTRY: dict = {
+    "gemini": _analyzer_gemini,
+    "openai": _analyzer_openai,
+    "lmstudio": _analyzer_lmstudio,
+    "ollama": _analyzer_ollama,
+    "anthropic": _analyzer_anthropic,
+}
+
+# Stop generating after the first word of the analyzer's answer.
+ANALYZER_STOP = ("\n", ".")
+
+
+def build_analyzer_llm(cfg):
+    factory = _ANALYZER_REGISTRY.get(cfg.ANALYZER_LLM_TYPE)
+    if factory is None:
+        raise ValueError(f"Unsupported analyzer LLM type: {cfg.ANALYZER_LLM_TYPE}")
+    return factory(cfg)
+
+
 class PromptAnalyzerAgent:
     RAG_KEYWORDS: frozenset = frozenset({
         "find",
@@ -61,24 +128,116 @@ class PromptAnalyzerAgent:
         "file",
         "pdf",
     })
+    # Default rules beyond RAG_KEYWORDS; texts/*.properties carry the full multilingual sets.
+    _RAG_HINTS: frozenset = frozenset({"summar", "detailed"})
 
-    def __init__(self, llm, prompt_template: str = "", persona: str = None, debug: bool = False):
+    def __init__(self, llm, prompt_template: str = "", persona: str = None, debug: bool = False,
+                 router: LocalRouter = None, router_threshold: float = 0.75, routing_cache: RoutingCache = None,
+                 stop=None, rules: RoutingRules = None):
+        # None routes without an analyzer LLM: the local router, then the rules.
         self.llm = llm
+        self.rules = rules or RoutingRules({f"{keyword}*": 1.0 for keyword in self.RAG_KEYWORDS | self._RAG_HINTS})
+        # Stop sequences passed to the analyzer LLM; None sends none.
+        self.stop = list(stop) if stop else None
         self.debug = debug
         self.prompt_template = prompt_template
         self.persona = persona or "General purpose assistant"
+        self.prompt_version = hashlib.sha256((prompt_template or "").encode("utf-8")).hexdigest()[:16]
+        self.routing_cache = routing_cache
+        self.router = router
+        self.router_threshold = router_threshold
+        self._stats_lock = threading.Lock()
+        self.routed = 0
+        self.escalated = 0
+        self.router_seconds = 0.0
+        self.analyzer_calls = 0
+        self.analyzer_seconds = 0.0
 
     def decide(self, question: str) -> RoutingDecision:
+        """Route ``question`` with the local router, asking the LLM only when the router is unsure."""
+        decision = self.local_decision(question)
+        return decision if decision is not None else self.llm_decision(question)
+
+    def local_decision(self, question: str) -> Optional[RoutingDecision]:
+        """The decision available without an LLM call, or ``None`` if the analyzer LLM has to be asked.
+
+        That is a confident local router, or the analyzer's cached decision
+        when this question was classified before.
+        """
         if not question:
             return RoutingDecision.SIMPLE
-
+        if self.router is not None:
+            started = time.perf_counter()
+            label, confidence = self.router.predict(question)
+            elapsed = time.perf_counter() - started
+            escalate = confidence < self.router_threshold
+            with self._stats_lock:
+                self.routed += 1
+                self.escalated += escalate
+                self.router_seconds += elapsed
+                rate = self.escalated / self.routed
+            if self.debug:
+                action = "asking the analyzer LLM" if escalate else "chose"
+                print(
+                    f"[DEBUG] Router {action}: {label} ({confidence:.2f}, {elapsed * 1e6:.0f} µs; "
+                    f"{rate:.0%} of questions escalated)"
+                )
+            if not escalate:
+                return RoutingDecision(label)
+        if self.llm is None:
+            return self._heuristic_decide(question)
+        if self.routing_cache is not None:
+            cached = self.routing_cache.get(routing_key(question, self.persona, self.prompt_version))
+            if cached is not None:
+                if self.debug:
+                    print(f"[DEBUG] Analyzer cache hit: {cached}")
+                return RoutingDecision(cached)
+        return None
+
+    def llm_decision(self, question: str) -> RoutingDecision:
+        """Ask the analyzer LLM and cache its answer; the rules decide when there is no analyzer LLM.
+
+        Heuristic fallbacks (LLM errors, unclear answers) are not cached, so
+        the LLM gets another chance at the question next time.
+        """
+        if self.llm is None:
+            return self._heuristic_decide(question)
+        started = time.perf_counter()
+        decision = self._ask_llm(question)
+        with self._stats_lock:
+            self.analyzer_calls += 1
+            self.analyzer_seconds += time.perf_counter() - started
+        if decision is None:
+            return self._heuristic_decide(question)
+        if self.routing_cache is not None:
+            self.routing_cache.put(routing_key(question, self.persona, self.prompt_version), decision.value)
+        return decision
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "routed": self.routed,
+                "escalated": self.escalated,
+                "escalation_rate": self.escalated / self.routed if self.routed else 0.0,
+                "router_mean_us": 1e6 * self.router_seconds / self.routed if self.routed else 0.0,
+                "analyzer_calls": self.analyzer_calls,
+                "analyzer_mean_ms": 1000 * self.analyzer_seconds / self.analyzer_calls if self.analyzer_calls else 0.0,
+            }
+
+    def _ask_llm(self, question: str) -> Optional[RoutingDecision]:
         prompt = self.prompt_template.replace("{QUESTION}", question).replace("{PERSONA}", self.persona)
 
         try:
-            resp = self.llm.invoke(prompt)
+            resp = self.llm.invoke(prompt, stop=self.stop) if self.stop else self.llm.invoke(prompt)
             if resp is None:
                 raise ValueError("empty response")
-            r = str(resp).lower()
+            # Chat models answer with a message; only its text counts, not its metadata.
+            r = str(getattr(resp, "content", resp)).lower()
+            if not r.strip():
+                # e.g. a thinking model that used up ANALYZER_MAX_TOKENS before answering
+                if self.debug:
+                    print("[DEBUG] Analyzer returned an empty answer, using the keyword heuristic")
+                return None
             if "rag" in r:
                 if self.debug:
                     print("[DEBUG] Analyzer chose: rag")
@@ -90,31 +249,30 @@ class PromptAnalyzerAgent:
         except Exception:
             pass
 
-        return self._heuristic_decide(question)
+        return None
 
     def _heuristic_decide(self, question: str) -> RoutingDecision:
-        q = question.lower()
-        if any(kw in q for kw in self.RAG_KEYWORDS):
-            if self.debug:
-                print("[DEBUG] Analyzer heuristic chose: rag")
-            return RoutingDecision.RAG
-        if len(q) > 200 or "summarize" in q or "detailed" in q:
-            if self.debug:
-                print("[DEBUG] Analyzer heuristic chose: rag")
-            return RoutingDecision.RAG
+        decision = RoutingDecision(self.rules.decide(question or ""))
         if self.debug:
-            print("[DEBUG] Analyzer heuristic chose: simple")
-        return RoutingDecision.SIMPLE
+            print(f"[DEBUG] Analyzer heuristic chose: {decision.value}")
+        return decision
 
 
 class RAGAgent:
-    def __init__(self, document_chain, retriever, debug: bool = False, config=None):
+    def __init__(self, document_chain, retriever, debug: bool = False, config=None, retrieval_mode: str = None,
+                 retrieval_cache: RetrievalCache = None, context_packer: ContextPacker = None):
         self.document_chain = document_chain
         self.retriever = retriever
         self.debug = debug
         self.config = config
-
-    def answer(self, question: str) -> str:
+        # "vector", "hybrid" or "lexical"; None keeps the retriever's own mode.
+        self.retrieval_mode = retrieval_mode
+        self.retrieval_cache = retrieval_cache
+        # Merges, de-duplicates and budgets the retrieved chunks; None passes them on as retrieved.
+        self.context_packer = context_packer
+
+    def answer(self, question: str, scope: RetrievalScope = None, context=None) -> str:
+        """Answer from retrieved context; ``context`` passes documents already retrieved for ``question``."""
         if self.debug:
             print("[DEBUG] Using agent: RAGAgent")
 
@@ -125,9 +283,34 @@ class RAGAgent:
                 return self.config.texts.get("rag.no.knowledge.base", "ERROR")
             return "ERROR"
 
-        context = self.retriever.invoke(question)
+        if context is None:
+            context = self.retrieve(question, scope)
+        if self.context_packer is not None:
+            context = self.context_packer.pack(context).documents
         return self.document_chain.invoke({"input": question, "context": context})
 
+    def retrieve(self, question: str, scope: RetrievalScope = None):
+        """Retrieve context for ``question``, reusing it while the same question hits an unchanged index."""
+        cache = self.retrieval_cache
+        if cache is not None:
+            version = getattr(self.retriever, "index_version", None)
+            mode = self.retrieval_mode or getattr(self.retriever, "mode", None)
+            context = cache.get(question, version, mode=mode, scope=scope)
+            if context is not None:
+                if self.debug:
+                    print(f"[DEBUG] Retrieval cache hit (hit rate {cache.stats()['hit_rate']:.0%})")
+                return context
+
+        options = {}
+        if self.retrieval_mode is not None:
+            options["mode"] = self.retrieval_mode
+        if scope is not None:
+            options["scope"] = scope
+        context = self.retriever.invoke(question, **options)
+        if cache is not None:
+            cache.put(question, version, context, mode=mode, scope=scope)
+        return context
+
 
 class SimpleLLMAgent:
     def __init__(self, document_chain, debug: bool = False):
@@ -144,32 +327,372 @@ class ConnectorManager:
     def __init__(self, config):
         self.config = config
         self.connector = self.get_connector()
+        self.connector.embeddings = self._wrap_embeddings(self.connector.embeddings)
         prompts_mgr = PromptsManager(config)
         self.prompts = prompts_mgr.get_prompts()
         self.document_chain = self._build_document_chain()
-        docs = DocsManager(config).getDocs()
-        self.retriever = self._build_retriever(docs)
+        self.docs_manager = DocsManager(config)
+        self.index_store = IndexStore(
+            config.INDEX_STORE_PATH,
+            self.connector.embeddings,
+            debug=config.DEBUG,
+            index_type=config.FAISS_INDEX_TYPE,
+            nprobe=config.FAISS_NPROBE,
+            ef_search=config.FAISS_HNSW_EF_SEARCH,
+            mmap=config.INDEX_LOAD_MODE == "mmap",
+            quantization=config.FAISS_QUANTIZATION,
+        )
+        chunk_settings = ChunkSettings(config.CHUNK_STRATEGY, config.CHUNK_SIZE, config.CHUNK_OVERLAP)
+        self.chunker = StructuredChunker(
+            chunk_settings, parse_chunk_settings(config.CHUNK_SETTINGS_BY_TYPE, chunk_settings)
+        )
+        chunk_chars, overlap_chars = chunk_settings.characters()
+        self.ingestion_planner = IngestionPlanner(
+            config.LOCAL_KNOWLEDGE_DOC_TYPES,
+            self.docs_manager.ignored_types(),
+            max_file_bytes=int(config.LOCAL_KNOWLEDGE_MAX_FILE_MB * 1_048_576),
+            chunk_size=chunk_chars,
+            chunk_overlap=overlap_chars,
+        )
+        self._index_lock = threading.Lock()
+        self.retriever = self._build_retriever(self.docs_manager.iter_files())
         analyzer_prompt = prompts_mgr.get_analyzer_prompt()
         self.prompt_analyzer = PromptAnalyzerAgent(
-            self.connector.llm, analyzer_prompt, persona=self.config.AI_PERSONA, debug=self.config.DEBUG
+            self._analyzer_llm() if self.config.ROUTING_MODE != "rules" else None,
+            analyzer_prompt,
+            persona=self.config.AI_PERSONA,
+            debug=self.config.DEBUG,
+            router=self._load_router(),
+            router_threshold=self.config.ROUTER_CONFIDENCE_THRESHOLD,
+            routing_cache=self._routing_cache(),
+            stop=ANALYZER_STOP,
+            rules=self._routing_rules(),
+        )
+        retrieval_cache = None
+        if self.config.RETRIEVAL_CACHE_SIZE > 0:
+            retrieval_cache = RetrievalCache(self.config.RETRIEVAL_CACHE_SIZE, ttl=self.config.RETRIEVAL_CACHE_TTL)
+        self.rag_agent = RAGAgent(
+            self.document_chain,
+            self.retriever,
+            debug=self.config.DEBUG,
+            config=self.config,
+            retrieval_cache=retrieval_cache,
+            context_packer=ContextPacker(
+                self.config.LLM_TYPE, self.config.CONTEXT_TOKEN_BUDGET, debug=self.config.DEBUG
+            ),
         )
-        self.rag_agent = RAGAgent(self.document_chain, self.retriever, debug=self.config.DEBUG, config=self.config)
         self.simple_agent = SimpleLLMAgent(self.document_chain, debug=self.config.DEBUG)
+        self._speculation_pool = None
+        if self.config.SPECULATIVE_RETRIEVAL:
+            self._speculation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculative-retrieval")
+        self.speculations = 0
+        self.speculations_used = 0
+        self.watcher = self._start_watcher()
+
+    def _load_router(self) -> Optional[LocalRouter]:
+        # The router's confidence is not calibrated; it only runs when a threshold below 1 is chosen.
+        if self.config.ROUTER_CONFIDENCE_THRESHOLD >= 1:
+            return None
+        try:
+            return LocalRouter.from_examples(
+                PromptsManager.prompt_path("router_examples.txt"), self.config.ROUTER_MODEL_PATH, debug=self.config.DEBUG
+            )
+        except Exception as e:
+            if self.config.DEBUG:
+                print(f"[DEBUG] Local router unavailable, every question goes to the analyzer LLM: {e}")
+            return None
+
+    def _analyzer_llm(self):
+        """The routing model; the answering model if it cannot be built."""
+        try:
+            return build_analyzer_llm(self.config)
+        except Exception as e:
+            if self.config.DEBUG:
+                print(f"[DEBUG] Analyzer model unavailable, routing with the answering model: {e}")
+            return self.connector.llm
+
+    def _routing_rules(self) -> Optional[RoutingRules]:
+        """Keyword rules of every language, so questions route in any of them; built-in English if unavailable."""
+        try:
+            return RoutingRules.from_texts(load_all_texts().values())
+        except Exception as e:
+            if self.config.DEBUG:
+                print(f"[DEBUG] Routing rules unavailable, using built-in keywords: {e}")
+            return None
+
+    def _routing_cache(self) -> Optional[RoutingCache]:
+        if self.config.ROUTING_CACHE_SIZE <= 0:
+            return None
+        options = dict(max_entries=self.config.ROUTING_CACHE_SIZE, debug=self.config.DEBUG)
+        if not self.config.ROUTING_CACHE_PATH:
+            return RoutingCache(**options)
+        try:
+            return RoutingCache(path=self.config.ROUTING_CACHE_PATH, **options)
+        except Exception as e:
+            if self.config.DEBUG:
+                print(f"[DEBUG] Routing cache file unavailable, keeping it in memory only: {e}")
+            return RoutingCache(**options)
 
     def _build_document_chain(self):
         return create_stuff_documents_chain(self.connector.llm, self.prompts)
 
-    def _build_retriever(self, docs) -> Optional[object]:
-        if not docs or self.connector.embeddings is None:
+    def _wrap_embeddings(self, embeddings):
+        """Put request batching/pacing and the persistent caches in front of the connector's embeddings."""
+        if embeddings is None:
+            return embeddings
+        embeddings = BatchedEmbeddings(
+            embeddings,
+            provider=self.config.LLM_TYPE,
+            batch_size=self.config.EMBEDDINGS_BATCH_SIZE,
+            max_in_flight=self.config.EMBEDDINGS_MAX_IN_FLIGHT,
+            requests_per_minute=self.config.EMBEDDINGS_REQUESTS_PER_MINUTE,
+            debug=self.config.DEBUG,
+        )
+        if self.config.EMBEDDINGS_CACHE_MAX_ENTRIES > 0:
+            try:
+                embeddings = CachedEmbeddings(
+                    embeddings,
+                    self.config.EMBEDDINGS_CACHE_PATH,
+                    provider=self.config.LLM_TYPE,
+                    model=self.config.EMBEDDINGS_AI_MODEL,
+                    max_entries=self.config.EMBEDDINGS_CACHE_MAX_ENTRIES,
+                    debug=self.config.DEBUG,
+                )
+            except Exception as e:
+                if self.config.DEBUG:
+                    print(f"[DEBUG] Embedding cache unavailable: {e}")
+        return self._wrap_query_cache(embeddings)
+
+    def _wrap_query_cache(self, embeddings):
+        if self.config.QUERY_EMBEDDINGS_CACHE_SIZE <= 0:
+            return embeddings
+        path = self.config.EMBEDDINGS_CACHE_PATH if self.config.QUERY_EMBEDDINGS_CACHE_PERSIST else None
+        options = dict(
+            provider=self.config.LLM_TYPE,
+            model=self.config.EMBEDDINGS_AI_MODEL,
+            max_entries=self.config.QUERY_EMBEDDINGS_CACHE_SIZE,
+            debug=self.config.DEBUG,
+        )
+        try:
+            return QueryCachedEmbeddings(embeddings, path=path, **options)
+        except Exception as e:
+            if self.config.DEBUG:
+                print(f"[DEBUG] Query embedding cache file unavailable, keeping it in memory only: {e}")
+            return QueryCachedEmbeddings(embeddings, **options)
+
+    def _index_settings(self) -> dict:
+        return {
+            "chunker": {**self.chunker.describe(), "dedup_threshold": self.config.CHUNK_DEDUP_THRESHOLD},
+            "embeddings": {"provider": self.config.LLM_TYPE, "model": self.config.EMBEDDINGS_AI_MODEL},
+        }
+
+    def _build_retriever(self, files) -> Optional[object]:
+        """Bring the persisted index in line with ``files`` and return a retriever over it.
+
+        ``files`` yields ``(path, uploaded)`` pairs as produced by
+        ``DocsManager.iter_files``. Files the ingestion planner rejects are
+        never loaded; of the rest only added or modified files are loaded and
+        embedded; vectors of deleted files are dropped.
+        """
+        if self.connector.embeddings is None:
+            return None
+        files = list(files)
+        if not files:
             return None
-        splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=30)
-        chunks = splitter.split_documents(docs)
-        vector_store = FAISS.from_documents(chunks, self.connector.embeddings)
-        return vector_store.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={"score_threshold": 0.3, "k": 4},
+        self.index_store.open(self._index_settings())
+        changes, plan = self._plan_ingestion(files)
+        if changes.count:
+            self._apply_index_changes(changes, plan)
+        self.index_store.optimize()
+        if self.index_store.dirty:
+            try:
+                self.index_store.save()
+            except Exception as e:
+                if self.config.DEBUG:
+                    print(f"[DEBUG] Could not save index store: {e}")
+        if self.index_store.vector_store is None:
+            return None
+        return self._as_retriever()
+
+    def _plan_ingestion(self, files, scope=None):
+        """``(changes, plan)`` for ``(file, uploaded)`` pairs, loading and hashing as little as possible.
+
+        Files are filtered by type and size first, then diffed against the
+        manifest; duplicate hashing and cost estimates only run for the added
+        and modified files. A modified file that now duplicates another
+        source is removed like a deleted one.
+        """
+        candidates, skipped = self.ingestion_planner.select(files)
+        changes = self.index_store.plan((file for file, _, _ in candidates), scope=scope)
+        changed = set(changes.added + changes.modified)
+        outdated = {source_key(file) for file in changed}.union(changes.deleted)
+        indexed = {key: entry for key, entry in self.index_store.manifest["files"].items() if key not in outdated}
+        plan = self.ingestion_planner.estimate(
+            [candidate for candidate in candidates if candidate[0] in changed], indexed
+        )
+        planned = {estimate.file for estimate in plan.files}
+        dropped = [file for file in changes.modified if file not in planned]
+        changes = changes._replace(
+            added=[file for file in changes.added if file in planned],
+            modified=[file for file in changes.modified if file in planned],
+            deleted=changes.deleted + [source_key(file) for file in dropped],
+        )
+        plan = IngestionPlan(plan.files, skipped + plan.skipped)
+        if self.config.DEBUG:
+            for skipped_file in plan.skipped:
+                if skipped_file.reason == SKIP_TYPE:
+                    print(f"[DEBUG] {self.config.texts.get('file.type.skipped', 'Skipping document type')} "
+                          f"{skipped_file.detail}: {Path(skipped_file.file).name}")
+                else:
+                    detail = f": {skipped_file.detail}" if skipped_file.detail else ""
+                    print(f"[DEBUG] Skipping {Path(skipped_file.file).name} ({skipped_file.reason}{detail})")
+        return changes, plan
+
+    def _apply_index_changes(self, changes, plan):
+        if self.config.DEBUG:
+            print(
+                f"[DEBUG] Re-indexing: {len(changes.added)} added, "
+                f"{len(changes.modified)} modified, {len(changes.deleted)} deleted"
+            )
+        self.index_store.remove_sources(changes.deleted)
+        estimates = {estimate.file: estimate for estimate in plan.files}
+        to_load = IngestionPlan([estimates[file] for file in changes.added + changes.modified], [])
+        if self.config.DEBUG and to_load.files:
+            self._report_load_estimate(to_load)
+        deduplicator = None
+        if self.config.CHUNK_DEDUP_THRESHOLD > 0:
+            deduplicator = ChunkDeduplicator(threshold=self.config.CHUNK_DEDUP_THRESHOLD)
+        pipeline = IngestionPipeline(
+            self.docs_manager, self.chunker, self.index_store, batch_size=self.config.INGEST_BATCH_SIZE,
+            deduplicator=deduplicator,
+        )
+        started = time.perf_counter()
+        result = pipeline.run([(estimate.file, estimate.uploaded) for estimate in to_load.files])
+        # Sources that dropped chunks kept by a removed or replaced source must bring them back.
+        while self.index_store.stale:
+            stale = [self.docs_manager.classify(key) for key in self.index_store.stale]
+            stale = [file for file in stale if file is not None and os.path.isfile(file[0])]
+            self.index_store.stale.clear()
+            if not stale:
+                break
+            more = pipeline.run(stale)
+            result = IngestionResult(*(total + extra for total, extra in zip(result, more)))
+        if self.config.DEBUG:
+            self._report_index_build(result.files, result.chunks, time.perf_counter() - started)
+            if deduplicator is not None:
+                self._report_dedup(deduplicator)
+        return result
+
+    def _report_dedup(self, deduplicator) -> None:
+        saved = deduplicator.duplicates
+        requests = -(-saved // max(self.config.EMBEDDINGS_BATCH_SIZE, 1))
+        print(
+            f"[DEBUG] Deduplicated {saved} of {deduplicator.seen} chunks ({deduplicator.exact_duplicates} exact, "
+            f"{deduplicator.near_duplicates} near); {saved} texts / ~{requests} embedding requests saved"
         )
 
+    def _report_load_estimate(self, plan) -> None:
+        for estimate in plan.files:
+            pages = f", {estimate.pages} pages" if estimate.pages is not None else ""
+            print(f"[DEBUG] Plan: {Path(estimate.file).name} {estimate.size / 1024:.0f} KB{pages}, ~{estimate.chunks} chunks")
+        print(
+            f"[DEBUG] Plan: loading {len(plan.files)} files, {plan.total_bytes / 1_048_576:.1f} MB, "
+            f"{plan.total_pages} PDF pages, ~{plan.total_chunks} chunks"
+        )
+
+    def _report_index_build(self, files: int, chunks: int, seconds: float) -> None:
+        rate = chunks / seconds if seconds else 0.0
+        print(f"[DEBUG] Indexed {chunks} chunks from {files} files in {seconds:.2f}s ({rate:.1f} chunks/s)")
+        embeddings = self.connector.embeddings
+        if isinstance(embeddings, QueryCachedEmbeddings):
+            embeddings = embeddings.embeddings
+        if isinstance(embeddings, CachedEmbeddings):
+            stats = embeddings.stats()
+            print(
+                f"[DEBUG] Embedding cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']} entries ({stats['bytes'] / 1_048_576:.1f} MB)"
+            )
+            embeddings = embeddings.embeddings
+        if isinstance(embeddings, BatchedEmbeddings):
+            stats = embeddings.stats()
+            print(
+                f"[DEBUG] Embedding requests: {stats['requests']} sent, {stats['retries']} rate-limit retries, "
+                f"{stats['texts_per_second']:.1f} texts/s"
+            )
+
+    def _as_retriever(self):
+        return KnowledgeRetriever(
+            self.index_store,
+            k=4,
+            score_threshold=0.3,
+            mode=self.config.RETRIEVAL_MODE,
+            fetch_k=self.config.RETRIEVAL_FETCH_K,
+            mmr_lambda=self.config.MMR_LAMBDA,
+        )
+
+    def index_files(self, files):
+        """Bring the live index in line with ``(path, uploaded)`` pairs without a restart.
+
+        New or changed files are loaded and embedded, unchanged ones are
+        skipped and listed files that no longer exist are dropped; the rest of
+        the index is left alone. Meant to run on a worker thread: queries keep
+        being served from the current index meanwhile. Enables RAG if no index
+        existed yet. The result lists the files the ingestion planner skipped.
+        """
+        files = list(files)
+        return self._sync_index(files, scope={source_key(file) for file, _ in files})
+
+    def sync_paths(self, paths):
+        """Watcher callback: re-index the changed ``paths``, or everything on ``RESCAN``."""
+        if paths is RESCAN:
+            return self._sync_index(list(self.docs_manager.iter_files()), scope=None)
+        files = [file for file in map(self.docs_manager.classify, paths) if file is not None]
+        if not files:
+            return None
+        return self.index_files(files)
+
+    def _sync_index(self, files, scope):
+        if self.connector.embeddings is None:
+            return None
+        with self._index_lock:
+            if self.index_store.manifest is None:
+                self.index_store.open(self._index_settings())
+            changes, plan = self._plan_ingestion(files, scope)
+            if changes.count:
+                result = self._apply_index_changes(changes, plan)
+            else:
+                result = IngestionResult(0, 0)
+            result = result._replace(skipped=tuple(plan.skipped))
+            self.index_store.optimize()
+            if self.index_store.dirty:
+                try:
+                    self.index_store.save()
+                except Exception as e:
+                    # The live index already holds the changes; the next sync saves them again.
+                    if self.config.DEBUG:
+                        print(f"[DEBUG] Could not save index store: {e}")
+            if self.retriever is None and self.index_store.vector_store is not None:
+                self.retriever = self._as_retriever()
+                self.rag_agent.retriever = self.retriever
+        return result
+
+    def _start_watcher(self):
+        if not self.config.KNOWLEDGE_WATCH or self.connector.embeddings is None:
+            return None
+        try:
+            return KnowledgeWatcher(
+                self.docs_manager.watch_roots(),
+                self.sync_paths,
+                debounce=self.config.KNOWLEDGE_WATCH_DEBOUNCE,
+                poll_interval=self.config.KNOWLEDGE_WATCH_POLL_INTERVAL,
+                backend=self.config.KNOWLEDGE_WATCH_BACKEND,
+                debug=self.config.DEBUG,
+            ).start()
+        except Exception as e:
+            if self.config.DEBUG:
+                print(f"[DEBUG] Knowledge watcher unavailable: {e}")
+            return None
+
     def get_connector(self):
         llm_type = self.config.LLM_TYPE
         factory = _CONNECTOR_REGISTRY.get(llm_type)
@@ -177,8 +700,53 @@ class ConnectorManager:
             raise ValueError(f"Unsupported LLM type: {llm_type}")
         return factory(self.config)
 
-    def call(self, question: str) -> str:
-        decision = self.prompt_analyzer.decide(question)
+    def _resolve_scope(self, scope: RetrievalScope) -> RetrievalScope:
+        """``scope`` with a relative folder resolved against the knowledge folder, like the manifest keys."""
+        knowledge_dir = self.docs_manager._knowledge_dir()
+        if scope.folder and knowledge_dir is not None and not Path(scope.folder).is_absolute():
+            return scope._replace(folder=str(knowledge_dir / scope.folder))
+        return scope
+
+    def call(self, question: str, scope: RetrievalScope = None) -> str:
+        """Answer ``question``; a ``scope`` means the user asked about specific documents, so RAG is used directly."""
+        if scope is not None:
+            return self.rag_agent.answer(question, scope=self._resolve_scope(scope))
+        if self._speculation_pool is None:
+            decision = self.prompt_analyzer.decide(question)
+            if decision == RoutingDecision.RAG:
+                return self.rag_agent.answer(question)
+            return self.simple_agent.answer(question)
+
+        # Retrieval does not depend on the route: while the analyzer LLM
+        # classifies the question, fetch its context in the background.
+        speculative = None
+        decision = self.prompt_analyzer.local_decision(question)
+        if decision is None:
+            speculative = self._speculate(question)
+            decision = self.prompt_analyzer.llm_decision(question)
         if decision == RoutingDecision.RAG:
-            return self.rag_agent.answer(question)
+            return self.rag_agent.answer(question, context=self._speculated(speculative))
+        if speculative is not None:
+            speculative.cancel()
         return self.simple_agent.answer(question)
+
+    def _speculate(self, question: str) -> Optional[Future]:
+        if self.rag_agent.retriever is None:
+            return None
+        self.speculations += 1
+        return self._speculation_pool.submit(self.rag_agent.retrieve, question)
+
+    def _speculated(self, future: Optional[Future]):
+        """Documents of a speculative retrieval; ``None`` (retrieve again) if there was none or it failed."""
+        if future is None:
+            return None
+        try:
+            context = future.result()
+        except Exception as e:
+            if self.config.DEBUG:
+                print(f"[DEBUG] Speculative retrieval failed, retrying: {e}")
+            return None
+        self.speculations_used += 1
+        if self.config.DEBUG:
+            print(f"[DEBUG] Using speculative retrieval ({self.speculations_used} of {self.speculations} used)")
+        return context
@@ -0,0 +1,221 @@
+import threading
+from typing import NamedTuple, Optional
+
+from langchain_core.documents import Document
+
+from modules.chunking import CHARS_PER_TOKEN, estimate_tokens
+
+# Context tokens per question used when CONTEXT_TOKEN_BUDGET is not set; 0
+# means unlimited. Local servers often run models with small context windows.
+DEFAULT_CONTEXT_TOKEN_BUDGETS = {
+    "gemini": 6000,
+    "openai": 4000,
+    "anthropic": 4000,
+    "lmstudio": 1500,
+    "ollama": 1500,
+}
+_FALLBACK_TOKEN_BUDGET = 3000
+# Characters at the start of a chunk that must reappear in another chunk's tail to count as overlap.
+_MIN_OVERLAP = 16
+# Characters of whitespace the splitter may drop between two adjacent chunks.
+_MAX_GAP = 2
+# A passage is only cut to fit the budget if at least this many tokens of it still fit.
+_MIN_TRUNCATED_TOKENS = 32
+_SEPARATOR = "\n\n"
+
+
+class PackResult(NamedTuple):
+    documents: list
+    tokens_in: int
+    tokens_out: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+
+def _paragraph_key(paragraph: str) -> str:
+    return " ".join(paragraph.lower().split())
+
+
+def _overlap_join(first: str, second: str) -> Optional[str]:
+    """``first`` extended by ``second`` if ``second`` starts with a tail of ``first``, else ``None``."""
+    if second in first:
+        return first
+    probe = second[:_MIN_OVERLAP]
+    if len(probe) < _MIN_OVERLAP:
+        return None
+    position = first.find(probe, max(len(first) - len(second), 0))
+    while position != -1:
+        if second.startswith(first[position:]):
+            return first + second[len(first) - position:]
+        position = first.find(probe, position + 1)
+    return None
+
+
+class _Passage:
+    """A retrieved chunk, or several merged ones, split into its section heading and body."""
+
+    __slots__ = ("rank", "doc", "heading", "body", "start")
+
+    def __init__(self, rank: int, doc: Document):
+        self.rank = rank
+        self.doc = doc
+        metadata = doc.metadata
+        self.heading = metadata.get("section") or ""
+        text = doc.page_content
+        # Pieces of a split section repeat its heading in front of the body (see StructuredChunker).
+        if self.heading and text.startswith(self.heading + _SEPARATOR):
+            self.body = text[len(self.heading) + len(_SEPARATOR):]
+        else:
+            self.heading, self.body = "", text
+        self.start = metadata.get("start_index")
+
+    @property
+    def text(self) -> str:
+        return f"{self.heading}{_SEPARATOR}{self.body}" if self.heading else self.body
+
+    def location(self) -> tuple:
+        metadata = self.doc.metadata
+        return metadata.get("source"), metadata.get("page", metadata.get("page_number")), self.heading
+
+    def merge(self, other: "_Passage") -> bool:
+        """Absorb ``other`` if both come from the same stretch of text; the better rank is kept."""
+        if self.location() != other.location():
+            return False
+        if self.start is not None and other.start is not None:
+            first, second = (self, other) if self.start <= other.start else (other, self)
+            end = first.start + len(first.body)
+            if second.start > end + _MAX_GAP:
+                return False
+            if second.start <= end:
+                # Offsets only line up within the same text; check before trusting them.
+                overlap = first.body[second.start - first.start:]
+                if overlap.startswith(second.body):
+                    body = first.body
+                elif second.body.startswith(overlap):
+                    body = first.body + second.body[len(overlap):]
+                else:
+                    return False
+            else:
+                body = first.body + (" " if second.start - end == 1 else _SEPARATOR) + second.body
+            start = first.start
+        else:
+            body = _overlap_join(self.body, other.body) or _overlap_join(other.body, self.body)
+            if body is None:
+                return False
+            start = None
+        if other.rank < self.rank:
+            self.rank, self.doc = other.rank, other.doc
+        self.body, self.start = body, start
+        return True
+
+
+def _truncate(text: str, tokens: int) -> str:
+    """The longest prefix of ``text``, cut at whitespace, of at most ``tokens`` estimated tokens."""
+    cut = text[:tokens * CHARS_PER_TOKEN]
+    while cut and estimate_tokens(cut) > tokens:
+        cut = cut[:int(len(cut) * 0.9)]
+    space = cut.rfind(" ")
+    if 0 < space < len(text) and len(cut) < len(text):
+        cut = cut[:space]
+    return cut.rstrip() + " …"
+
+
+class ContextPacker:
+    """Turns retrieved chunks into the ``{context}`` of the stuff-documents chain within a token budget.
+
+    Neighbouring chunks of the same page or section (found by their
+    ``start_index``, or by overlapping text for chunks indexed without one)
+    are merged into a single passage with the overlap removed, so the model
+    reads the text once.
+    Paragraphs already included (repeated headers, legal notices, the same
+    text indexed from two files) are dropped. Passages keep the retrieval
+    order, best first, and are added until ``token_budget`` estimated tokens
+    are used; the passage crossing the budget is cut short if a useful part
+    of it still fits. ``token_budget`` defaults per provider
+    (``DEFAULT_CONTEXT_TOKEN_BUDGETS``); 0 means unlimited.
+    """
+
+    def __init__(self, provider: str = "", token_budget: Optional[int] = None, debug: bool = False):
+        if token_budget is None:
+            token_budget = DEFAULT_CONTEXT_TOKEN_BUDGETS.get(provider or "", _FALLBACK_TOKEN_BUDGET)
+        self.token_budget = token_budget
+        self.debug = debug
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.tokens_in = 0
+        self.tokens_saved = 0
+
+    def pack(self, documents) -> PackResult:
+        documents = list(documents)
+        tokens_in = estimate_tokens(_SEPARATOR.join(doc.page_content for doc in documents))
+        passages = self._budgeted(self._deduplicated(self._merged(documents)))
+        tokens_out = estimate_tokens(_SEPARATOR.join(doc.page_content for doc in passages))
+        with self._stats_lock:
+            self.requests += 1
+            self.tokens_in += tokens_in
+            self.tokens_saved += tokens_in - tokens_out
+        if self.debug:
+            print(
+                f"[DEBUG] Context: {len(documents)} chunks -> {len(passages)} passages, "
+                f"~{tokens_out} tokens ({tokens_in - tokens_out} saved)"
+            )
+        return PackResult(passages, tokens_in, tokens_out)
+
+    @staticmethod
+    def _merged(documents) -> list:
+        """``(text, document)`` passages, best first; adjacent or overlapping chunks of one source merged.
+
+        A merged passage ranks (and keeps the metadata of) its best ranked chunk.
+        """
+        passages = []
+        for rank, doc in enumerate(documents):
+            passage = _Passage(rank, doc)
+            merged = True
+            while merged:
+                merged = False
+                for other in passages:
+                    if passage.merge(other):
+                        passages.remove(other)
+                        merged = True
+                        break
+            passages.append(passage)
+        return [(passage.text, passage.doc) for passage in sorted(passages, key=lambda p: p.rank)]
+
+    @staticmethod
+    def _deduplicated(passages) -> list:
+        seen, kept = set(), []
+        for text, doc in passages:
+            paragraphs = []
+            for paragraph in text.split(_SEPARATOR):
+                key = _paragraph_key(paragraph)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                paragraphs.append(paragraph)
+            if paragraphs:
+                kept.append((_SEPARATOR.join(paragraphs), doc))
+        return kept
+
+    def _budgeted(self, passages) -> list:
+        packed, used = [], 0
+        for text, doc in passages:
+            tokens = estimate_tokens(text)
+            if self.token_budget and used + tokens > self.token_budget:
+                remaining = self.token_budget - used
+                if remaining >= _MIN_TRUNCATED_TOKENS:
+                    packed.append(Document(id=doc.id, page_content=_truncate(text, remaining - 1), metadata=doc.metadata))
+                break
+            packed.append(Document(id=doc.id, page_content=text, metadata=doc.metadata))
+            used += tokens
+        return packed
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "tokens_in": self.tokens_in,
+                "tokens_saved": self.tokens_saved,
+                "saved_per_request": self.tokens_saved / self.requests if self.requests else 0.0,
+            }
@@ -1,4 +1,9 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
 from pathlib import Path
+from typing import Optional
+
 from modules.configs import config
 
 from langchain_community.document_loaders import (
@@ -14,19 +19,71 @@ from langchain_community.document_loaders import (
 
 from langchain_unstructured import UnstructuredLoader
 
+# Images, media, archives, executables and other binaries no loader extracts text from.
+# Every other file goes to its specialized loader or the unstructured fallback.
+IGNORED_TYPES = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp", ".ico", ".svg", ".heic", ".psd",
+    ".mp3", ".wav", ".ogg", ".flac", ".m4a", ".aac", ".mid", ".midi",
+    ".mp4", ".mkv", ".avi", ".mov", ".webm", ".wmv", ".flv",
+    ".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz", ".tgz", ".iso", ".dmg",
+    ".exe", ".dll", ".so", ".dylib", ".bin", ".msi", ".apk", ".jar", ".class", ".pyc", ".o", ".obj",
+    ".ttf", ".otf", ".woff", ".woff2",
+    ".db", ".sqlite", ".sqlite3", ".mdb", ".dat", ".lock", ".tmp", ".swp",
+})
+
+
+def _load_with_fallback(file, loader_cls=None):
+    """Load ``file`` with ``loader_cls`` and fall back to ``UnstructuredLoader``.
+
+    Module-level so it can run in a worker process. Returns the documents and
+    the list of ``(fallback, error)`` attempts made, for the caller to report.
+    """
+    attempts = []
+
+    # 1️⃣ Specialized loader first
+    if loader_cls:
+        try:
+            docs = loader_cls(str(file)).load()
+            attempts.append((False, None))
+            return docs, attempts
+        except Exception as e:
+            attempts.append((False, e))
+
+    # 2️⃣ Generic unstructured fallback
+    try:
+        docs = UnstructuredLoader(str(file)).load()
+        attempts.append((True, None))
+        return docs, attempts
+    except Exception as e:
+        attempts.append((True, e))
+    return [], attempts
+
+
+def _resolve_workers(workers) -> int:
+    """``0`` means one worker per CPU; anything unparsable means sequential."""
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        return 1
+    if workers == 0:
+        return os.cpu_count() or 1
+    return max(workers, 1)
+
 
 class DocsManager:
     def __init__(self, config):
         self.local_knowledge_path = config.LOCAL_KNOWLEDGE_PATH
         self.config = config
+        self.loader_workers = _resolve_workers(config.DOCS_LOADER_WORKERS)
 
         self.specialized_loaders = {
             ".pdf": PyMuPDFLoader,
             ".txt": TextLoader,
             ".csv": CSVLoader,
-            ".md": UnstructuredMarkdownLoader,
-            ".html": UnstructuredHTMLLoader,
-            ".htm": UnstructuredHTMLLoader,
+            # One document per element, so the chunker can split at headings.
+            ".md": partial(UnstructuredMarkdownLoader, mode="elements"),
+            ".html": partial(UnstructuredHTMLLoader, mode="elements"),
+            ".htm": partial(UnstructuredHTMLLoader, mode="elements"),
 
             # Word / Rich text
             ".docx": UnstructuredWordDocumentLoader,
@@ -38,20 +95,42 @@ class DocsManager:
             ".ppt": UnstructuredPowerPointLoader,
         }
 
-    def _load(self, loader_cls, file_path):
-        loader = loader_cls(str(file_path))
-        return loader.load()
-
-    def getDocs(self):
-        docs = []
-        base_dir = Path(__file__).resolve().parent.parent
+    def ignored_types(self) -> set:
+        """Extensions never worth handing to a loader; see ``IGNORED_TYPES``."""
+        return set(IGNORED_TYPES)
 
-        # Load from local knowledge path (skip when not configured)
+    def _knowledge_dir(self):
+        # Skip when not configured
         if not self.local_knowledge_path:
-            knowledge_dir = None
-        else:
-            knowledge_dir = base_dir / self.local_knowledge_path
-
+            return None
+        base_dir = Path(__file__).resolve().parent.parent
+        return base_dir / self.local_knowledge_path
+
+    def watch_roots(self) -> list:
+        """Folders whose contents feed the index."""
+        roots = [self._knowledge_dir(), Path("uploads")]
+        return [root for root in roots if root is not None]
+
+    def classify(self, path):
+        """Return ``(file, uploaded)`` if ``path`` belongs in the index, else ``None``.
+
+        Applies the same rules as ``iter_files`` to a single path, which need
+        not exist any more (deleted files still have to leave the index).
+        """
+        path = Path(path)
+        resolved = path.resolve()
+        knowledge_dir = self._knowledge_dir()
+        if knowledge_dir is not None and resolved.is_relative_to(knowledge_dir.resolve()):
+            if path.name.startswith(".") and path.suffix == "":
+                return None
+            return path, False
+        if resolved.is_relative_to(Path("uploads").resolve()):
+            return path, True
+        return None
+
+    def iter_files(self):
+        """Yield ``(file, uploaded)`` for every candidate file, without loading it."""
+        knowledge_dir = self._knowledge_dir()
         for file in (knowledge_dir.glob("**/*") if knowledge_dir else []):
             if not file.is_file():
                 continue
@@ -60,87 +139,85 @@ class DocsManager:
             if file.name.startswith(".") and file.suffix == "":
                 continue
 
-            ext = file.suffix.lower()
-
-            # 1️⃣ Specialized loader first
-            loader_cls = self.specialized_loaders.get(ext)
-            if loader_cls:
-                try:
-                    docs.extend(self._load(loader_cls, file))
-                    if config.DEBUG:
-                        print(
-                            f"{self.config.texts['file']} {file.name} "
-                            f"{self.config.texts['loaded.successfully']} (specialized)"
-                        )
-                    continue
-                except Exception as e:
-                    if config.DEBUG:
-                        print(
-                            f"{self.config.texts['file.loading.error']} "
-                            f"{file.name} (specialized): {e}"
-                        )
-
-            # 2️⃣ Generic unstructured fallback
-            try:
-                loader = UnstructuredLoader(str(file))
-                docs.extend(loader.load())
-                if config.DEBUG:
-                    print(
-                        f"{self.config.texts['file']} {file.name} "
-                        f"{self.config.texts['loaded.successfully']} (unstructured fallback)"
-                    )
-            except Exception as e:
-                if config.DEBUG:
-                    print(
-                        f"{self.config.texts['file.loading.error']} "
-                        f"{file.name} (unstructured): {e}"
-                    )
+            yield file, False
 
-        # Load uploaded files
         try:
             upload_dir = Path("uploads")
             if upload_dir.exists():
                 for file in upload_dir.glob("**/*"):
-                    if not file.is_file():
-                        continue
-                    
-                    ext = file.suffix.lower()
-                    
-                    # Use the same loaders for uploaded files
-                    loader_cls = self.specialized_loaders.get(ext)
-                    if loader_cls:
-                        try:
-                            docs.extend(self._load(loader_cls, file))
-                            if config.DEBUG:
-                                print(
-                                    f"{self.config.texts['file']} {file.name} "
-                                    f"{self.config.texts['loaded.successfully']} (uploaded)"
-                                )
-                            continue
-                        except Exception as e:
-                            if config.DEBUG:
-                                print(
-                                    f"{self.config.texts['file.loading.error']} "
-                                    f"{file.name} (uploaded): {e}"
-                                )
-                    
-                    # Fallback for uploaded files
-                    try:
-                        loader = UnstructuredLoader(str(file))
-                        docs.extend(loader.load())
-                        if config.DEBUG:
-                            print(
-                                f"{self.config.texts['file']} {file.name} "
-                                f"{self.config.texts['loaded.successfully']} (uploaded fallback)"
-                            )
-                    except Exception as e:
-                        if config.DEBUG:
-                            print(
-                                f"{self.config.texts['file.loading.error']} "
-                                f"{file.name} (uploaded fallback): {e}"
-                            )
+                    if file.is_file():
+                        yield file, True
         except Exception as e:
             if config.DEBUG:
                 print(f"Error loading uploaded files: {e}")
 
-        return docs
\ No newline at end of file
+    def load_file(self, file, uploaded: bool = False) -> list:
+        """Load a single file: specialized loader first, then the unstructured fallback."""
+        docs, attempts = _load_with_fallback(file, self.specialized_loaders.get(Path(file).suffix.lower()))
+        self._report(file, uploaded, attempts)
+        return docs
+
+    def _report(self, file, uploaded: bool, attempts) -> None:
+        if not config.DEBUG:
+            return
+        for fallback, error in attempts:
+            if uploaded:
+                origin = "uploaded fallback" if fallback else "uploaded"
+            else:
+                origin = "unstructured fallback" if fallback else "specialized"
+            if error is None:
+                print(
+                    f"{self.config.texts['file']} {Path(file).name} "
+                    f"{self.config.texts['loaded.successfully']} ({origin})"
+                )
+            else:
+                print(f"{self.config.texts['file.loading.error']} {Path(file).name} ({origin}): {error}")
+
+    def iter_docs(self, files, workers: Optional[int] = None):
+        """Yield ``(file, docs)`` for each ``(file, uploaded)`` pair as soon as it is loaded.
+
+        With more than one worker the files are spread over a process pool and
+        results arrive in completion order; at most ``2 * workers`` files are in
+        flight so loaded documents are streamed rather than accumulated.
+        """
+        workers = self.loader_workers if workers is None else workers
+        files = iter(files)
+        if workers <= 1:
+            for file, uploaded in files:
+                yield file, self.load_file(file, uploaded)
+            return
+
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            if config.DEBUG:
+                print(f"[DEBUG] Process pool unavailable, loading sequentially: {e}")
+            yield from self.iter_docs(files, workers=1)
+            return
+
+        with pool:
+            pending = {}
+            for file, uploaded in files:
+                loader_cls = self.specialized_loaders.get(Path(file).suffix.lower())
+                pending[pool.submit(_load_with_fallback, file, loader_cls)] = (file, uploaded)
+                if len(pending) >= 2 * workers:
+                    yield from self._drain(pending)
+            while pending:
+                yield from self._drain(pending)
+
+    def _drain(self, pending: dict):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            file, uploaded = pending.pop(future)
+            try:
+                docs, attempts = future.result()
+            except Exception as e:
+                docs, attempts = [], [(True, e)]
+            self._report(file, uploaded, attempts)
+            yield file, docs
+
+    def getDocs(self):
+        docs = []
+        for _, loaded in self.iter_docs(self.iter_files()):
+            docs.extend(loaded)
+        return docs
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite's default limit on host parameters per statement is 999.
+_LOOKUP_BATCH = 900
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed, persistent cache in front of an ``Embeddings`` object.
+
+    Document vectors are stored in SQLite keyed by (provider, model, sha256 of
+    the text) as raw float32 bytes, so any chunk that was embedded before -- by
+    an earlier build, another chunker setting or another index -- is served
+    from disk. Least recently used entries are evicted past ``max_entries``.
+    Queries are passed straight through.
+    """
+
+    def __init__(self, embeddings, path, provider: str, model: str, max_entries: int = 200_000, debug: bool = False):
+        self.embeddings = embeddings
+        self.path = str(path)
+        self.provider = provider or ""
+        self.model = model or ""
+        self.max_entries = max_entries
+        self.debug = debug
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " provider TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (provider, model, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used)")
+        self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            found = self._lookup(set(keys))
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in missing:
+                    missing[key] = text
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += len(missing)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(computed)
+            found.update(computed)
+
+        return [list(found[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def _lookup(self, keys) -> dict:
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE provider = ? AND model = ? "
+                f"AND text_hash IN ({placeholders})",
+                (self.provider, self.model, *batch),
+            ).fetchall()
+            for text_hash, vector in rows:
+                found[bytes(text_hash)] = np.frombuffer(vector, dtype=np.float32).tolist()
+        if found:
+            now = time.time_ns()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE provider = ? AND model = ? AND text_hash = ?",
+                [(now, self.provider, self.model, key) for key in found],
+            )
+            self._conn.commit()
+        return found
+
+    def _store(self, computed: dict) -> None:
+        now = time.time_ns()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (provider, model, text_hash, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+            [
+                (self.provider, self.model, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for key, vector in computed.items()
+            ],
+        )
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE (provider, model, text_hash) IN "
+                "(SELECT provider, model, text_hash FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            if self.debug:
+                print(f"[DEBUG] Embedding cache evicted {excess} least recently used entries")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Bounded in-memory LRU of query embeddings in front of an ``Embeddings`` object.
+
+    Questions are short and often repeated (the fixed greeting and farewell
+    questions are sent on every start and exit), so a hit skips a provider
+    round-trip on the answer path. With ``path`` set, new query vectors are
+    also written to a SQLite table keyed by (provider, model, sha256 of the
+    text), and the ``max_entries`` most recently embedded queries of the same
+    provider and model are loaded back on start. Documents are passed
+    straight through.
+    """
+
+    def __init__(self, embeddings, provider: str, model: str, max_entries: int = 1024,
+                 path: Optional[str] = None, debug: bool = False):
+        self.embeddings = embeddings
+        self.provider = provider or ""
+        self.model = model or ""
+        self.max_entries = max_entries
+        self.path = str(path) if path else None
+        self.debug = debug
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.path:
+            self._open()
+
+    def _open(self) -> None:
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            " provider TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " created INTEGER NOT NULL,"
+            " PRIMARY KEY (provider, model, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT text_hash, vector FROM query_embeddings WHERE provider = ? AND model = ? "
+            "ORDER BY created DESC LIMIT ?",
+            (self.provider, self.model, self.max_entries),
+        ).fetchall()
+        for text_hash, vector in reversed(rows):
+            self._entries[bytes(text_hash)] = np.frombuffer(vector, dtype=np.float32).tolist()
+        if self.debug and rows:
+            print(f"[DEBUG] Loaded {len(rows)} cached query embeddings")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = text_key(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(vector)
+            self.misses += 1
+
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._entries[key] = list(vector)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._conn is not None:
+                self._persist(key, vector)
+        return vector
+
+    def _persist(self, key: bytes, vector) -> None:
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (provider, model, text_hash, vector, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.provider, self.model, key, np.asarray(vector, dtype=np.float32).tobytes(), time.time_ns()),
+            )
+            self._conn.execute(
+                "DELETE FROM query_embeddings WHERE provider = ? AND model = ? AND text_hash NOT IN "
+                "(SELECT text_hash FROM query_embeddings WHERE provider = ? AND model = ? "
+                "ORDER BY created DESC LIMIT ?)",
+                (self.provider, self.model, self.provider, self.model, self.max_entries),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            if self.debug:
+                print(f"[DEBUG] Could not persist query embedding: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
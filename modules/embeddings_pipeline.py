@@ -0,0 +1,185 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+# Requests per minute used when EMBEDDINGS_REQUESTS_PER_MINUTE is not set;
+# 0 means unlimited (local servers).
+DEFAULT_REQUESTS_PER_MINUTE = {
+    "gemini": 150,
+    "openai": 3000,
+    "lmstudio": 0,
+    "ollama": 0,
+}
+
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 60.0
+
+
+class RateLimitExceeded(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after a 429, so every caller slows down."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+
+
+_buckets: dict = {}
+_buckets_lock = threading.Lock()
+
+
+def provider_bucket(provider: str, requests_per_minute: float) -> TokenBucket:
+    """Return the process-wide bucket for ``provider`` so all callers share one budget."""
+    with _buckets_lock:
+        bucket = _buckets.get(provider)
+        if bucket is None or bucket.rate != requests_per_minute / 60.0:
+            bucket = TokenBucket(requests_per_minute / 60.0)
+            _buckets[provider] = bucket
+        return bucket
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    for obj in (exc, getattr(exc, "response", None)):
+        for attr in ("status_code", "code", "status"):
+            if getattr(obj, attr, None) == 429:
+                return True
+    name = type(exc).__name__
+    if "RateLimit" in name or "ResourceExhausted" in name:
+        return True
+    text = str(exc).lower()
+    return "429" in text or "rate limit" in text or "resource exhausted" in text
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeds documents in fixed-size batches with bounded concurrency and pacing.
+
+    At most ``max_in_flight`` batches are sent concurrently, every request
+    takes a token from the provider's shared bucket, and rate-limit errors
+    (HTTP 429 / resource exhausted) are retried with exponential backoff,
+    honouring ``Retry-After`` when the provider sends it.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        provider: str,
+        batch_size: int = 64,
+        max_in_flight: int = 4,
+        requests_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        debug: bool = False,
+        sleep=time.sleep,
+    ):
+        self.embeddings = embeddings
+        self.provider = provider or ""
+        self.batch_size = max(batch_size, 1)
+        self.max_in_flight = max(max_in_flight, 1)
+        if requests_per_minute is None:
+            requests_per_minute = DEFAULT_REQUESTS_PER_MINUTE.get(self.provider, 0)
+        self.bucket = provider_bucket(self.provider, requests_per_minute)
+        self.max_retries = max_retries
+        self.debug = debug
+        self._sleep = sleep
+        self._stats_lock = threading.Lock()
+        self.texts = 0
+        self.requests = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    def _call(self, fn, arg):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                result = fn(arg)
+                with self._stats_lock:
+                    self.requests += 1
+                return result
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                if attempt >= self.max_retries:
+                    raise RateLimitExceeded(f"{self.provider} embeddings still rate limited after {attempt} retries") from e
+                self.bucket.drain()
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random() / 2)
+                attempt += 1
+                with self._stats_lock:
+                    self.retries += 1
+                if self.debug:
+                    print(f"[DEBUG] {self.provider} embeddings rate limited, retrying in {delay:.1f}s")
+                self._sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        started = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1 or self.max_in_flight == 1:
+            results = [self._call(self.embeddings.embed_documents, batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches))) as pool:
+                results = list(pool.map(lambda batch: self._call(self.embeddings.embed_documents, batch), batches))
+        with self._stats_lock:
+            self.texts += len(texts)
+            self.seconds += time.perf_counter() - started
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call(self.embeddings.embed_query, text)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "texts": self.texts,
+                "requests": self.requests,
+                "retries": self.retries,
+                "seconds": self.seconds,
+                "texts_per_second": self.texts / self.seconds if self.seconds else 0.0,
+            }
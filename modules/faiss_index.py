@@ -0,0 +1,211 @@
+import math
+import os
+from pathlib import Path
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+# Scalar quantization of stored vectors: float16 halves memory at no measurable
+# recall cost, 8-bit codes (trained per-dimension ranges) quarter it. IVF-PQ
+# already stores compressed codes and ignores this setting.
+QUANTIZATIONS = ("none", "fp16", "sq8")
+_SQ_TYPES = {"fp16": faiss.ScalarQuantizer.QT_fp16, "sq8": faiss.ScalarQuantizer.QT_8bit}
+
+# "auto" keeps exact search for small corpora, moves to HNSW graphs once a
+# linear scan gets noticeable and to compressed IVF-PQ lists for corpora
+# whose float32 vectors no longer comfortably fit in memory.
+AUTO_HNSW_MIN_CHUNKS = 20_000
+AUTO_IVFPQ_MIN_CHUNKS = 500_000
+
+# Below these many vectors training is unreliable (k-means wants ~39 points
+# per centroid, PQ has 256 centroids per sub-quantizer), so a simpler index is used.
+MIN_IVF_VECTORS = 1_000
+MIN_IVFPQ_VECTORS = 39 * 256
+_TRAINING_POINTS_PER_LIST = 64
+_SQ_TRAINING_POINTS = 65_536
+_HNSW_M = 32
+_HNSW_EF_CONSTRUCTION = 80
+_PQ_DIMS_PER_SUBQUANTIZER = 4
+
+
+def choose_index_type(requested: str, count: int) -> str:
+    """Resolve ``requested`` ("auto" or one of ``INDEX_TYPES``) for a corpus of ``count`` chunks."""
+    if requested == "auto":
+        if count >= AUTO_IVFPQ_MIN_CHUNKS:
+            requested = "ivfpq"
+        elif count >= AUTO_HNSW_MIN_CHUNKS:
+            requested = "hnsw"
+        else:
+            requested = "flat"
+    if requested not in INDEX_TYPES:
+        raise ValueError(f"Unsupported FAISS index type: {requested}")
+    if requested == "ivfpq" and count < MIN_IVFPQ_VECTORS:
+        requested = "ivf"
+    if requested == "ivf" and count < MIN_IVF_VECTORS:
+        requested = "flat"
+    return requested
+
+
+def index_type(index) -> str:
+    """Name of the backend behind a (possibly ID-mapped) FAISS index."""
+    if isinstance(index, faiss.IndexIDMap2):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def index_quantization(index) -> str:
+    """Scalar quantization ("none", "fp16" or "sq8") of the vectors stored in ``index``."""
+    if isinstance(index, faiss.IndexIDMap2):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        for name, qtype in _SQ_TYPES.items():
+            if index.sq.qtype == qtype:
+                return name
+    return "none"
+
+
+def effective_quantization(kind: str, quantization: str) -> str:
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unsupported vector quantization: {quantization}")
+    return "none" if kind == "ivfpq" else quantization
+
+
+def is_lossy(index) -> bool:
+    """Whether vectors read back from ``index`` lost enough precision that they should be re-embedded."""
+    return index_type(index) == "ivfpq" or index_quantization(index) == "sq8"
+
+
+def vector_bytes(index) -> int:
+    """Memory taken by the stored vector codes (graph links and id maps not included)."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        inner = faiss.downcast_index(inner.storage)
+    code_size = getattr(inner, "code_size", 4 * index.d)
+    return int(index.ntotal) * int(code_size)
+
+
+def supports_remove(index) -> bool:
+    """HNSW graphs cannot drop vectors; their removed ids are filtered at search time."""
+    return index_type(index) != "hnsw"
+
+
+def _nlist(count: int) -> int:
+    return max(1, min(int(4 * math.sqrt(count)), count // 39, 65536))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    m = max(1, dim // _PQ_DIMS_PER_SUBQUANTIZER)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def new_index(kind: str, dim: int, count: int = 0, quantization: str = "none"):
+    """An empty, possibly untrained index of ``kind`` that accepts ``add_with_ids``."""
+    qtype = _SQ_TYPES.get(effective_quantization(kind, quantization))
+    if kind == "flat":
+        if qtype is None:
+            return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        return faiss.IndexIDMap2(faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2))
+    if kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, _HNSW_M) if qtype is None else faiss.IndexHNSWSQ(dim, qtype, _HNSW_M)
+        hnsw.hnsw.efConstruction = _HNSW_EF_CONSTRUCTION
+        return faiss.IndexIDMap2(hnsw)
+    quantizer = faiss.IndexFlatL2(dim)
+    if kind == "ivf" and qtype is not None:
+        index = faiss.IndexIVFScalarQuantizer(quantizer, dim, _nlist(count), qtype, faiss.METRIC_L2)
+    elif kind == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, dim, _nlist(count))
+    elif kind == "ivfpq":
+        index = faiss.IndexIVFPQ(quantizer, dim, _nlist(count), _pq_subquantizers(dim), 8)
+    else:
+        raise ValueError(f"Unsupported FAISS index type: {kind}")
+    # IVF indexes keep the caller's ids; a hash-table direct map adds
+    # reconstruct() by id without giving up remove_ids().
+    index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+
+def build_index(kind: str, vectors: np.ndarray, ids: np.ndarray, seed: int = 1234, quantization: str = "none"):
+    """Build a ``kind`` index over ``vectors``, training IVF, PQ or SQ8 on a random sample first."""
+    index = new_index(kind, vectors.shape[1], len(vectors), quantization=quantization)
+    if not index.is_trained:
+        if kind in ("ivf", "ivfpq"):
+            sample_size = _TRAINING_POINTS_PER_LIST * faiss.extract_index_ivf(index).nlist
+        else:
+            sample_size = _SQ_TRAINING_POINTS
+        if kind == "ivfpq":
+            sample_size = max(sample_size, MIN_IVFPQ_VECTORS)
+        sample_size = min(len(vectors), sample_size)
+        sample = np.random.default_rng(seed).choice(len(vectors), size=sample_size, replace=False)
+        index.train(vectors[np.sort(sample)])
+    if len(vectors):
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def write_index(index, path) -> None:
+    """Write ``index`` to a new file that replaces ``path``, so processes mapping the old file are unaffected."""
+    path = Path(path)
+    tmp_path = path.with_suffix(".tmp")
+    faiss.write_index(index, str(tmp_path))
+    os.replace(tmp_path, path)
+
+
+def read_index(path, mmap: bool = False):
+    """Load a saved index, or with ``mmap`` map it read-only so vectors are paged in on demand.
+
+    A mapped index is shared with other processes through the page cache;
+    flat and HNSW vectors are mapped in place, IVF indexes map their inverted
+    lists. It must not be modified: use ``read_index_copy`` for a private,
+    writable copy.
+    """
+    if not mmap:
+        return faiss.read_index(str(path))
+    with open(path, "rb") as fh:
+        header = fh.read(4)
+    # IndexIDMap2 wraps our flat and HNSW indexes; IVF indexes are stored bare.
+    flags = faiss.IO_FLAG_MMAP_IFC if header == b"IxM2" else faiss.IO_FLAG_MMAP
+    return faiss.read_index(str(path), flags | faiss.IO_FLAG_READ_ONLY)
+
+
+def read_index_copy(fh):
+    """Read a private in-memory copy of the index saved in the open binary file ``fh``."""
+    fh.seek(0)
+    return faiss.read_index(faiss.PyCallbackIOReader(fh.read))
+
+
+def search_params(index, nprobe: int = 16, ef_search: int = 64, removed: Optional[set] = None, allowed=None):
+    """Per-query parameters for ``index.search``.
+
+    ``removed`` ids are excluded from the results; when ``allowed`` is given
+    only those ids are searched (callers leave removed ids out of it).
+    """
+    selector = batch = None
+    if allowed is not None:
+        selector = faiss.IDSelectorBatch(np.asarray(allowed, dtype=np.int64))
+    elif removed:
+        batch = faiss.IDSelectorBatch(np.fromiter(removed, dtype=np.int64))
+        selector = faiss.IDSelectorNot(batch)
+    kind = index_type(index)
+    if kind == "hnsw":
+        params = faiss.SearchParametersHNSW(efSearch=ef_search)
+    elif kind in ("ivf", "ivfpq"):
+        params = faiss.SearchParametersIVF(nprobe=nprobe)
+    else:
+        params = faiss.SearchParameters()
+    if selector is not None:
+        params.sel = selector
+        # SWIG does not own the selectors; keep them alive as long as the params.
+        params.referenced_objects = [batch, selector]
+    return params
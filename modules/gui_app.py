@@ -9,6 +9,7 @@ from ttkbootstrap.constants import *
 
 from modules.configs import Config, _resource_base
 from modules.connectors_manager import ConnectorManager
+from modules.retrieval import RetrievalScope
 
 
 class ChatApp:
@@ -61,6 +62,13 @@ class ChatApp:
         upload_button = ttk.Button(input_frame, text=upload_button_text, command=self.upload_files, bootstyle="primary")
         upload_button.pack(side=LEFT, padx=(0, 5))
 
+        self.scope_all_text = self.config.texts.get('ui.scope.all', 'All documents')
+        self.scope_choice = ttk.Combobox(
+            input_frame, width=22, state="readonly", values=[self.scope_all_text], postcommand=self._refresh_scopes
+        )
+        self.scope_choice.set(self.scope_all_text)
+        self.scope_choice.pack(side=LEFT, padx=(0, 5))
+
         self.input_field = ttk.Entry(input_frame, width=60)
         self.input_field.pack(side=LEFT, fill=BOTH, expand=True, padx=(0, 5))
         self.input_field.bind("<Return>", self.send_message)
@@ -138,6 +146,60 @@ class ChatApp:
         except Exception as e:
             error_msg = self.config.texts.get('error.file.upload', f'Error uploading file: {str(e)}')
             self.display_message("System", error_msg, is_user=False)
+            return
+
+        thread = threading.Thread(target=self.index_uploaded_file, args=(destination,))
+        thread.daemon = True
+        thread.start()
+
+    def index_uploaded_file(self, destination):
+        """Load, chunk and embed an uploaded file into the live index in a background thread."""
+        filename = os.path.basename(destination)
+        try:
+            result = self.connector.index_files([(destination, True)])
+            if result is None:
+                return
+            if result.skipped:
+                # Unsupported, oversized, empty or duplicate uploads are never loaded; say why.
+                skipped = result.skipped[0]
+                reason = self.config.texts.get(f'ui.upload.skipped.{skipped.reason}', skipped.reason)
+                detail = f": {skipped.detail}" if skipped.detail else ""
+                skipped_msg = self.config.texts.get('ui.upload.skipped', 'Not indexed')
+                msg = f"{skipped_msg}: {filename} ({reason}{detail})"
+            else:
+                indexed_msg = self.config.texts.get('ui.upload.indexed', 'Indexed')
+                msg = f"{indexed_msg}: {filename}"
+            self.root.after(0, lambda: self.display_message("System", msg, is_user=False))
+        except Exception as e:
+            error_msg = self.config.texts.get('error.file.index', 'Error indexing file')
+            # ``e`` is unbound once the except block ends, before Tk runs the callback.
+            msg = f"{error_msg} {filename}: {e}"
+            self.root.after(0, lambda: self.display_message("System", msg, is_user=False))
+
+    def scope_options(self):
+        """Label -> ``RetrievalScope`` (``None`` for the whole knowledge base) for the scope selector."""
+        options = {self.scope_all_text: None}
+        if self.uploaded_files:
+            session_text = self.config.texts.get('ui.scope.session', 'Uploaded this session')
+            options[session_text] = RetrievalScope(sources=tuple(self.uploaded_files))
+            last_text = self.config.texts.get('ui.scope.last', 'Last upload')
+            last = self.uploaded_files[-1]
+            options[f"{last_text}: {os.path.basename(last)}"] = RetrievalScope(sources=(last,))
+        # Resolved like the indexed sources, not against the working directory.
+        knowledge_dir = self.connector.docs_manager._knowledge_dir()
+        if knowledge_dir is not None and os.path.isdir(knowledge_dir):
+            folder_text = self.config.texts.get('ui.scope.folder', 'Folder')
+            for entry in sorted(os.scandir(knowledge_dir), key=lambda e: e.name.lower()):
+                if entry.is_dir() and not entry.name.startswith('.'):
+                    options[f"{folder_text}: {entry.name}"] = RetrievalScope(folder=entry.path)
+        return options
+
+    def _refresh_scopes(self):
+        self.scope_choice.config(values=list(self.scope_options()))
+
+    def selected_scope(self):
+        """Scope chosen in the selector; a choice that no longer exists falls back to everything."""
+        return self.scope_options().get(self.scope_choice.get())
 
     def show_initial_greeting(self):
         """Display initial greeting from the AI."""
@@ -174,14 +236,17 @@ class ChatApp:
         self.input_field.delete(0, END)
         self.input_field.config(state=DISABLED)
 
-        thread = threading.Thread(target=self.get_response, args=(user_input,))
+        thread = threading.Thread(target=self.get_response, args=(user_input, self.selected_scope()))
         thread.daemon = True
         thread.start()
 
-    def get_response(self, question):
+    def get_response(self, question, scope=None):
         """Get AI response in background thread."""
         try:
-            response = self.connector.call(question)
+            if scope is None:
+                response = self.connector.call(question)
+            else:
+                response = self.connector.call(question, scope=scope)
             self.root.after(0, lambda: self.display_message(self.config.AI_PERSONA, response, is_user=False))
         except Exception as e:
             error_msg = self.config.texts.get('error.connection', f'Error: {str(e)}')
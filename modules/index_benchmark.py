@@ -0,0 +1,165 @@
+"""Measure recall, latency and memory of each FAISS backend against the exact flat baseline.
+
+Usage: python -m modules.index_benchmark [INDEX_STORE_PATH]
+
+Runs on the vectors of a saved index store; queries are stored vectors with
+a little noise added, so each one has a known neighbourhood in the corpus.
+Also reports how much MMR reranking adds per query for several candidate
+pool sizes (``RETRIEVAL_FETCH_K``).
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from modules.faiss_index import (
+    INDEX_TYPES,
+    QUANTIZATIONS,
+    build_index,
+    choose_index_type,
+    effective_quantization,
+    search_params,
+    vector_bytes,
+)
+from modules.retrieval import maximal_marginal_relevance
+
+MMR_POOL_SIZES = (10, 20, 50, 100, 200)
+
+
+def load_vectors(path):
+    """Return ``(ids, vectors)`` of the live chunks in the index store at ``path``."""
+    path = Path(path)
+    with open(path / "manifest.json", "r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    ids = np.asarray([i for entry in manifest["files"].values() for i in entry.get("chunks", [])], dtype=np.int64)
+    index = faiss.read_index(str(path / "index.faiss"))
+    return ids, index.reconstruct_batch(ids)
+
+
+def _noisy_queries(vectors, queries: int, seed: int):
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=min(queries, len(vectors)), replace=False)
+    noise = rng.normal(scale=0.01 * float(np.linalg.norm(vectors, axis=1).mean()), size=(len(picks), vectors.shape[1]))
+    return (vectors[picks] + noise).astype(np.float32)
+
+
+def benchmark(vectors, ids, types=INDEX_TYPES, k: int = 4, queries: int = 200, nprobe: int = 16,
+              ef_search: int = 64, seed: int = 0, quantizations=("none",)) -> list:
+    """Build every backend in ``types`` (with each of ``quantizations``) over ``vectors`` and compare it with exact search.
+
+    Returns one dict per backend with its build time, mean and p95 query
+    latency (one query at a time, as the retriever issues them), the bytes
+    its vectors take and recall@k relative to the exact float32 flat index.
+    Backends the corpus is too small to train are reported with ``skipped``
+    set; IVF-PQ is only reported once, as it ignores quantization.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    query_vectors = _noisy_queries(vectors, queries, seed)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(query_vectors, k)
+    truth = ids[truth]
+
+    results = []
+    runs = dict.fromkeys((kind, effective_quantization(kind, q)) for kind in types for q in quantizations)
+    for kind, quantization in runs:
+        if choose_index_type(kind, len(vectors)) != kind:
+            results.append({
+                "type": kind,
+                "quantization": quantization,
+                "skipped": f"needs more than {len(vectors)} chunks to train",
+            })
+            continue
+        started = time.perf_counter()
+        index = build_index(kind, vectors, ids, quantization=quantization)
+        build_seconds = time.perf_counter() - started
+        params = search_params(index, nprobe=nprobe, ef_search=ef_search)
+
+        latencies, hits = [], 0
+        for query, expected in zip(query_vectors, truth):
+            started = time.perf_counter()
+            _, found = index.search(query[None, :], k, params=params)
+            latencies.append(time.perf_counter() - started)
+            hits += len(set(found[0]) & set(expected))
+        results.append({
+            "type": kind,
+            "quantization": quantization,
+            "bytes": vector_bytes(index),
+            "build_seconds": build_seconds,
+            "mean_ms": 1000 * float(np.mean(latencies)),
+            "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+            f"recall@{k}": hits / (len(truth) * k),
+        })
+    return results
+
+
+def benchmark_mmr(vectors, pool_sizes=MMR_POOL_SIZES, k: int = 4, queries: int = 200, lambda_mult: float = 0.5,
+                  seed: int = 0) -> list:
+    """Time MMR selection of ``k`` chunks from the nearest ``pool`` candidates, for each pool size.
+
+    Only the reranking is timed (the search itself is the same as for the
+    plain vector mode, apart from fetching a larger pool). Each row also
+    reports the mean cosine similarity between the picked chunks, next to
+    that of the plain top ``k``, to show how much redundancy MMR removes.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    query_vectors = _noisy_queries(vectors, queries, seed)
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, neighbours = exact.search(query_vectors, min(max(pool_sizes), len(vectors)))
+
+    results = []
+    for pool in pool_sizes:
+        latencies, overlap, baseline = [], [], []
+        for query, found in zip(query_vectors, neighbours):
+            candidates = vectors[found[:pool]]
+            started = time.perf_counter()
+            picked = maximal_marginal_relevance(query, candidates, k, lambda_mult)
+            latencies.append(time.perf_counter() - started)
+            overlap.append(_mean_pairwise_similarity(candidates[picked]))
+            baseline.append(_mean_pairwise_similarity(candidates[:k]))
+        results.append({
+            "pool": pool,
+            "mean_ms": 1000 * float(np.mean(latencies)),
+            "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+            "similarity": float(np.mean(overlap)),
+            "top_k_similarity": float(np.mean(baseline)),
+        })
+    return results
+
+
+def _mean_pairwise_similarity(vectors) -> float:
+    unit = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = unit @ unit.T
+    count = len(unit)
+    return float((similarity.sum() - np.trace(similarity)) / (count * (count - 1))) if count > 1 else 0.0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else "index_store"
+    ids, vectors = load_vectors(path)
+    print(f"{len(ids)} chunks, {vectors.shape[1]} dimensions")
+    for row in benchmark(vectors, ids, quantizations=QUANTIZATIONS):
+        name = f"{row['type']}/{row['quantization']}"
+        if "skipped" in row:
+            print(f"{name:>11}: skipped ({row['skipped']})")
+            continue
+        print(
+            f"{name:>11}: recall@4 {row['recall@4']:.3f}, {row['mean_ms']:.3f} ms mean, "
+            f"{row['p95_ms']:.3f} ms p95, {row['bytes'] / 1_048_576:.1f} MB vectors, "
+            f"built in {row['build_seconds']:.2f}s"
+        )
+    for row in benchmark_mmr(vectors):
+        print(
+            f"mmr pool {row['pool']:>3}: {row['mean_ms']:.3f} ms mean, {row['p95_ms']:.3f} ms p95, "
+            f"similarity between picks {row['similarity']:.3f} (top-4: {row['top_k_similarity']:.3f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,646 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from modules.chunk_docstore import ChunkDocstore
+from modules.faiss_index import (
+    build_index,
+    choose_index_type,
+    effective_quantization,
+    index_quantization,
+    index_type,
+    is_lossy,
+    new_index,
+    read_index,
+    read_index_copy,
+    search_params,
+    supports_remove,
+    vector_bytes,
+    write_index,
+)
+from modules.lexical_index import BM25Index
+
+MANIFEST_VERSION = 2
+_MANIFEST_FILE = "manifest.json"
+_INDEX_NAME = "index"
+_INDEX_FILE = "index.faiss"
+# Name of the docstore in manifests that do not name one; every save writes a new "chunks-<n>.sqlite".
+_DOCSTORE_FILE = "chunks.sqlite"
+_LEXICAL_FILE = "lexical.json"
+_HASH_BLOCK = 1 << 20
+# Rebuild an index that cannot delete in place once this share of its vectors is dead.
+_MAX_TOMBSTONE_RATIO = 0.2
+# Scoped searches over at most this many chunks compare against their vectors directly,
+# copying them out this many at a time.
+_SUBSET_SCAN_MAX = 20_000
+_SCAN_BLOCK = 1024
+
+
+def source_key(path) -> str:
+    """Stable manifest key for a source file."""
+    return str(Path(path).resolve())
+
+
+def file_fingerprint(path) -> dict:
+    """Cheap change-detection fingerprint for a source file (no content read)."""
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, ordinal: int, content_hash: str) -> int:
+    """Deterministic positive int64 FAISS id for a chunk of ``source``."""
+    digest = hashlib.sha256(f"{source}\0{ordinal}\0{content_hash}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+class IndexChanges(NamedTuple):
+    added: list
+    modified: list
+    deleted: list
+
+    @property
+    def count(self) -> int:
+        return len(self.added) + len(self.modified) + len(self.deleted)
+
+
+class IndexStore:
+    """On-disk, ID-mapped FAISS index plus a manifest describing what it holds.
+
+    The manifest records the index settings (chunker, embeddings provider and
+    model) and, per source file, its fingerprint, content hash, when it was
+    indexed, the ids of the chunks it contributed and, when chunks were
+    dropped as duplicates, the sources holding the originals. It doubles as
+    the metadata index that ``ids_in_scope`` filters searches with. Vectors live in an ``IndexIDMap2``
+    keyed by those ids, so a source can be removed or replaced without
+    touching the rest of the index.
+
+    ``lock`` guards the vector store; it is held only while vectors are
+    added, removed or saved, never while embedding, so readers holding it
+    for a search are not blocked by provider round-trips.
+
+    ``index_type`` selects the FAISS backend ("flat", "ivf", "ivfpq",
+    "hnsw" or "auto", see ``modules.faiss_index``). New stores start flat
+    (HNSW needs no training and starts as HNSW); ``optimize`` moves the
+    vectors to the configured backend once the corpus size is known. HNSW
+    cannot delete vectors, so removed ids become tombstones that searches
+    skip until the next rebuild. ``quantization`` ("none", "fp16" or "sq8")
+    stores the vectors as scalar-quantized codes; it is applied by the same
+    rebuild.
+
+    ``lexical`` is a BM25 index over the same chunk ids, updated in the same
+    calls as the vectors and saved next to them; it is loaded on first use.
+
+    Chunk texts are saved in a SQLite docstore. With ``mmap`` a saved index is
+    memory-mapped read-only and chunk texts are read from the docstore only
+    when a search returns them, so opening even a very large store is
+    immediate and processes sharing it share the page cache. The first change
+    to a mapped index loads a private copy of it.
+
+    ``version`` increases with every change to the searchable chunks, so
+    callers can tell whether results they cached are still current.
+    """
+
+    def __init__(self, path, embeddings, debug: bool = False, index_type: str = "auto", nprobe: int = 16,
+                 ef_search: int = 64, mmap: bool = False, quantization: str = "none"):
+        self.path = Path(path)
+        self.embeddings = embeddings
+        self.debug = debug
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.quantization = quantization
+        self.mmap = mmap
+        self.tombstones = set()
+        self._lexical = BM25Index()
+        self._lexical_saved = True
+        self._mapped_file = None
+        self._saved_version = None
+        self.vector_store: Optional[FAISS] = None
+        self.manifest: Optional[dict] = None
+        self.dirty = False
+        self.stale = set()
+        self.version = 0
+        self.lock = threading.RLock()
+
+    @property
+    def lexical(self) -> BM25Index:
+        with self.lock:
+            if self._lexical is None:
+                self._lexical = self._load_lexical()
+            return self._lexical
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / _MANIFEST_FILE
+
+    def read_manifest(self) -> Optional[dict]:
+        if not self.manifest_path.exists():
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (json.JSONDecodeError, OSError):
+            return None
+
+    def open(self, settings: dict) -> None:
+        """Load the saved index if it was built with ``settings``, else start empty."""
+        self.stale = set()
+        self.version += 1
+        self._release_mapping()
+        saved = self.read_manifest()
+        if saved and saved.get("version") == MANIFEST_VERSION and saved.get("settings") == settings:
+            ids = [i for entry in saved.get("files", {}).values() for i in entry.get("chunks", [])]
+            vector_store = self._load_vector_store(ids, self._docstore_path(saved)) if ids else None
+            if vector_store is not None or not ids:
+                self.vector_store = vector_store
+                self.manifest = saved
+                self.tombstones = set(saved.pop("tombstones", []))
+                self.dirty = False
+                self._lexical = None
+                self._lexical_saved = True
+                self._saved_version = self.version
+                if vector_store is not None and not self._docstore_path(saved).exists():
+                    # Saved in the earlier pickle format; re-save in the current one.
+                    self._saved_version = None
+                    self.dirty = True
+                if self.debug:
+                    mapped = " (memory-mapped)" if self._mapped_file is not None else ""
+                    print(f"[DEBUG] Loaded index store from {self.path}{mapped}")
+                return
+        if self.debug:
+            print("[DEBUG] Index store is stale or missing, rebuilding from scratch")
+        self.vector_store = None
+        self.tombstones = set()
+        self._lexical = BM25Index()
+        self._lexical_saved = False
+        self._saved_version = None
+        self.manifest = {"version": MANIFEST_VERSION, "settings": dict(settings), "files": {}}
+        self.dirty = True
+
+    def _docstore_path(self, manifest: dict) -> Path:
+        return self.path / manifest.get("docstore", _DOCSTORE_FILE)
+
+    def _load_vector_store(self, ids, docstore_path: Path) -> Optional[FAISS]:
+        try:
+            if not docstore_path.exists():
+                return self._load_pickled_vector_store()
+            index = self._read_index()
+            docstore = ChunkDocstore.load(docstore_path, lazy=self.mmap)
+            # Docstore ids are the chunk ids as strings (see _add).
+            return FAISS(self.embeddings, index, docstore, {i: str(i) for i in ids})
+        except Exception as e:
+            if self.debug:
+                print(f"[DEBUG] Could not load index store: {e}")
+            self._release_mapping()
+            return None
+
+    def _load_pickled_vector_store(self) -> FAISS:
+        # The pickle side of the store is only ever written by earlier versions of save().
+        vector_store = FAISS.load_local(
+            str(self.path),
+            self.embeddings,
+            index_name=_INDEX_NAME,
+            allow_dangerous_deserialization=True,
+        )
+        vector_store.docstore = ChunkDocstore(vector_store.docstore._dict)
+        return vector_store
+
+    def _read_index(self):
+        path = self.path / _INDEX_FILE
+        if not self.mmap:
+            return read_index(path)
+        fh = open(path, "rb")
+        try:
+            index = read_index(path, mmap=True)
+        except Exception as e:
+            if self.debug:
+                print(f"[DEBUG] Could not memory-map the index, loading it into memory: {e}")
+            index = read_index_copy(fh)
+            fh.close()
+            return index
+        # Keep the mapped file open: a private copy is read from it before the first change,
+        # even if another process has replaced the index file meanwhile.
+        if os.fstat(fh.fileno()).st_ino != os.stat(path).st_ino:
+            index = read_index_copy(fh)
+            fh.close()
+            return index
+        self._mapped_file = fh
+        return index
+
+    def _release_mapping(self) -> None:
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+            self._mapped_file = None
+
+    def _ensure_writable(self) -> None:
+        """Swap a memory-mapped (read-only) index for an in-memory copy before it is modified."""
+        if self._mapped_file is None:
+            return
+        self.vector_store.index = read_index_copy(self._mapped_file)
+        self._release_mapping()
+        if self.debug:
+            print("[DEBUG] Loaded a writable copy of the memory-mapped index")
+
+    def _load_lexical(self) -> BM25Index:
+        """Load the saved BM25 index, rebuilding it from the stored chunk texts if it is missing or out of sync."""
+        lexical = None
+        try:
+            with open(self.path / _LEXICAL_FILE, "r", encoding="utf-8") as fh:
+                lexical = BM25Index.from_json(fh.read())
+        except OSError:
+            pass
+        mapping = self.vector_store.index_to_docstore_id if self.vector_store is not None else {}
+        if lexical is not None and lexical.ids() == set(mapping):
+            return lexical
+        if self.debug:
+            print("[DEBUG] Lexical index is missing or out of date, rebuilding it from the stored chunks")
+        lexical = BM25Index()
+        if self.vector_store is not None:
+            live = set(mapping.values())
+            chunks = [(int(i), doc.page_content) for i, doc in self.vector_store.docstore.items() if i in live]
+            lexical.add([i for i, _ in chunks], [text for _, text in chunks])
+        self._lexical_saved = False
+        self.dirty = True
+        return lexical
+
+    def plan(self, files, scope=None) -> IndexChanges:
+        """Compare ``files`` with the manifest and return what needs re-indexing.
+
+        Files whose size and mtime are unchanged are skipped without being read;
+        when only the mtime moved, the content hash decides. Indexed sources
+        missing from ``files`` are reported as deleted; pass ``scope`` (a set
+        of source keys) when ``files`` is only a partial listing.
+        """
+        indexed = self.manifest["files"]
+        added, modified, seen = [], [], set()
+        for file in files:
+            key = source_key(file)
+            try:
+                fingerprint = file_fingerprint(file)
+            except OSError:
+                continue
+            seen.add(key)
+            entry = indexed.get(key)
+            if entry is None:
+                added.append(file)
+            elif entry["size"] == fingerprint["size"] and entry["mtime_ns"] == fingerprint["mtime_ns"]:
+                continue
+            elif entry["size"] == fingerprint["size"] and entry.get("sha256") == file_sha256(file):
+                with self.lock:
+                    entry.update(fingerprint)
+                self.dirty = True
+            else:
+                modified.append(file)
+        deleted = [key for key in (indexed if scope is None else scope) if key in indexed and key not in seen]
+        return IndexChanges(added, modified, deleted)
+
+    def remove_sources(self, keys) -> None:
+        removed = set()
+        with self.lock:
+            for key in keys:
+                entry = self.manifest["files"].pop(key, None)
+                if entry is None:
+                    continue
+                self._remove_ids(entry.get("chunks", []))
+                removed.add(key)
+                self.dirty = True
+            if removed:
+                self._invalidate_dependents(removed)
+
+    def _invalidate_dependents(self, removed: set) -> None:
+        """Mark sources whose duplicate chunks were kept only by ``removed`` sources for re-indexing.
+
+        Their fingerprint is cleared so the next ``plan`` reports them as
+        modified; callers that can re-index right away use ``stale``.
+        """
+        for key, entry in self.manifest["files"].items():
+            if removed.intersection(entry.get("duplicate_of", ())):
+                entry["size"] = -1
+                entry.pop("duplicate_of")
+                self.stale.add(key)
+
+    def invalidate_sources(self, keys) -> None:
+        """Clear the fingerprint of ``keys`` so the next ``plan`` reports them as modified."""
+        with self.lock:
+            for key in keys:
+                entry = self.manifest["files"].get(key)
+                if entry is not None:
+                    entry["size"] = -1
+                    self.dirty = True
+
+    def start_source(self, file) -> str:
+        """Register ``file`` (dropping any previous version) before its chunks are added."""
+        key = source_key(file)
+        entry = file_fingerprint(file)
+        entry["sha256"] = file_sha256(file)
+        entry["added"] = time.time()
+        entry["chunks"] = []
+        with self.lock:
+            self.remove_sources([key])
+            self.stale.discard(key)
+            self.manifest["files"][key] = entry
+        self.dirty = True
+        return key
+
+    def add_duplicate_of(self, key: str, original: str) -> None:
+        """Record that ``key`` dropped a chunk because ``original`` already holds it."""
+        with self.lock:
+            owners = self.manifest["files"][key].setdefault("duplicate_of", [])
+            if original not in owners:
+                owners.append(original)
+                self.dirty = True
+
+    def add_chunks(self, items) -> int:
+        """Embed ``(key, chunk)`` pairs in one call and add them to sources opened with ``start_source``."""
+        ids, texts, metadatas, owners = [], [], [], []
+        next_ordinal = {}
+        for key, chunk in items:
+            ordinal = next_ordinal.get(key, len(self.manifest["files"][key]["chunks"]))
+            next_ordinal[key] = ordinal + 1
+            content_hash = text_sha256(chunk.page_content)
+            ids.append(chunk_id(key, ordinal, content_hash))
+            texts.append(chunk.page_content)
+            metadatas.append({**chunk.metadata, "source": chunk.metadata.get("source", key), "content_hash": content_hash})
+            owners.append(key)
+        if not texts:
+            return 0
+
+        vectors = self.embeddings.embed_documents(texts)
+        with self.lock:
+            self._add(ids, texts, metadatas, vectors)
+            for key, i in zip(owners, ids):
+                self.manifest["files"][key]["chunks"].append(i)
+        self.dirty = True
+        return len(ids)
+
+    def add_source(self, file, chunks) -> int:
+        """Embed ``chunks`` of ``file`` and add them, replacing any previous version."""
+        key = self.start_source(file)
+        return self.add_chunks((key, chunk) for chunk in chunks)
+
+    def _add(self, ids, texts, metadatas, vectors) -> None:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        documents = {
+            str(i): Document(id=str(i), page_content=t, metadata=m)
+            for i, t, m in zip(ids, texts, metadatas)
+        }
+        with self.lock:
+            if self.vector_store is None:
+                # fp16 needs no training, so new stores can start with it; SQ8 waits for optimize().
+                quantization = "fp16" if self.quantization == "fp16" else "none"
+                kind = "hnsw" if self.index_type == "hnsw" else "flat"
+                index = new_index(kind, matrix.shape[1], quantization=quantization)
+                self.vector_store = FAISS(self.embeddings, index, ChunkDocstore(), {})
+            self._ensure_writable()
+            self.tombstones.difference_update(ids)
+            self.version += 1
+            self.lexical.add(ids, texts)
+            self.vector_store.index.add_with_ids(matrix, np.asarray(ids, dtype=np.int64))
+            self.vector_store.docstore.add(documents)
+            self.vector_store.index_to_docstore_id.update({i: str(i) for i in ids})
+
+    def _remove_ids(self, ids) -> None:
+        if not ids or self.vector_store is None:
+            return
+        with self.lock:
+            self.version += 1
+            if supports_remove(self.vector_store.index):
+                self._ensure_writable()
+                self.vector_store.index.remove_ids(np.asarray(ids, dtype=np.int64))
+            else:
+                self.tombstones.update(ids)
+            self.lexical.remove(ids)
+            mapping = self.vector_store.index_to_docstore_id
+            doc_ids = [mapping.pop(i) for i in ids if i in mapping]
+            if doc_ids:
+                self.vector_store.docstore.delete(doc_ids)
+
+    def chunk_ids(self) -> list:
+        with self.lock:
+            return [i for entry in self.manifest["files"].values() for i in entry.get("chunks", [])]
+
+    def _manifest_snapshot(self) -> list:
+        """``(key, added, chunk ids)`` of every source, copied under ``lock``.
+
+        Sources are added and removed by indexing threads while questions are
+        answered; every manifest change holds ``lock``, so the copy is consistent.
+        """
+        with self.lock:
+            return [
+                (key, entry.get("added", 0), list(entry.get("chunks", [])))
+                for key, entry in self.manifest["files"].items()
+            ]
+
+    def ids_in_scope(self, scope) -> list:
+        """Chunk ids of the sources matching ``scope`` (see ``modules.retrieval.RetrievalScope``)."""
+        sources = {source_key(source) for source in scope.sources}
+        folder = Path(scope.folder).resolve() if scope.folder else None
+        doc_types = {t.lower() if t.startswith(".") else f".{t.lower()}" for t in scope.doc_types}
+        ids = []
+        for key, added, chunks in self._manifest_snapshot():
+            path = Path(key)
+            if sources and key not in sources:
+                continue
+            if folder is not None and not path.is_relative_to(folder):
+                continue
+            if doc_types and path.suffix.lower() not in doc_types:
+                continue
+            if scope.since is not None and added < scope.since:
+                continue
+            ids.extend(chunks)
+        return ids
+
+    def search(self, embedding, k: int = 4, ids=None, with_vectors: bool = False) -> list:
+        """Return ``(document, distance)`` pairs for the ``k`` nearest live chunks.
+
+        With ``ids`` only those chunks are searched: small subsets are compared
+        with their stored vectors directly, larger ones filtered inside FAISS.
+        ``with_vectors`` appends each chunk's stored vector (as reconstructed
+        by the index, so quantized stores return approximations).
+        """
+        query = np.asarray([embedding], dtype=np.float32)
+        pairs = self._scan_subset(query, k, ids) if ids is not None else None
+        with self.lock:
+            if self.vector_store is None:
+                return []
+            index = self.vector_store.index
+            if ids is None:
+                params = search_params(index, nprobe=self.nprobe, ef_search=self.ef_search, removed=self.tombstones)
+                distances, found = index.search(query, k, params=params)
+                pairs = zip(distances[0], found[0])
+            elif pairs is None:
+                allowed = np.fromiter((i for i in ids if i not in self.tombstones), dtype=np.int64)
+                params = search_params(index, nprobe=self.nprobe, ef_search=self.ef_search, allowed=allowed)
+                distances, found = index.search(query, k, params=params)
+                pairs = zip(distances[0], found[0])
+            mapping = self.vector_store.index_to_docstore_id
+            hits, seen = [], {}
+            for distance, i in pairs:
+                # A re-added tombstoned id can briefly exist twice in an HNSW graph.
+                if i == -1 or i in seen or i not in mapping:
+                    continue
+                seen[i] = None
+                hits.append((self.vector_store.docstore.search(mapping[i]), float(distance)))
+            if with_vectors and hits:
+                vectors = index.reconstruct_batch(np.fromiter(seen, dtype=np.int64))
+                hits = [(doc, distance, vector) for (doc, distance), vector in zip(hits, vectors)]
+        return hits
+
+    def _scan_subset(self, query, k: int, ids) -> Optional[list]:
+        """``(distance, id)`` pairs of the ``k`` nearest of ``ids``, or ``None`` when there are too many to scan.
+
+        Vectors are copied out ``_SCAN_BLOCK`` at a time under ``lock`` and
+        scored after releasing it, so a scoped question neither holds up
+        indexing nor materializes every vector of the subset at once.
+        """
+        with self.lock:
+            live = np.fromiter((i for i in ids if i not in self.tombstones), dtype=np.int64)
+        if len(live) > _SUBSET_SCAN_MAX:
+            return None
+        best_distances, best_ids = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for start in range(0, len(live), _SCAN_BLOCK):
+            with self.lock:
+                if self.vector_store is None:
+                    return []
+                # Chunks removed since ``ids`` was computed are no longer in the index.
+                mapping = self.vector_store.index_to_docstore_id
+                block = np.fromiter((i for i in live[start:start + _SCAN_BLOCK] if i in mapping), dtype=np.int64)
+                if not len(block):
+                    continue
+                vectors = self.vector_store.index.reconstruct_batch(block)
+            best_distances = np.concatenate([best_distances, ((vectors - query) ** 2).sum(axis=1)])
+            best_ids = np.concatenate([best_ids, block])
+            if len(best_distances) > k:
+                top = np.argpartition(best_distances, k)[:k]
+                best_distances, best_ids = best_distances[top], best_ids[top]
+        order = np.argsort(best_distances)
+        return list(zip(best_distances[order], best_ids[order]))
+
+    def search_lexical(self, query: str, k: int = 4, ids=None) -> list:
+        """Return ``(document, bm25 score)`` pairs for the ``k`` chunks best matching ``query``'s terms."""
+        with self.lock:
+            if self.vector_store is None:
+                return []
+            mapping = self.vector_store.index_to_docstore_id
+            allowed = set(ids) if ids is not None else None
+            return [
+                (self.vector_store.docstore.search(mapping[i]), score)
+                for i, score in self.lexical.search(query, k, allowed=allowed)
+                if i in mapping
+            ]
+
+    def optimize(self) -> bool:
+        """Rebuild the index when the configured backend, quantization or a tombstone build-up calls for it.
+
+        Vectors are read back from the current index (re-embedded from the
+        stored texts, normally cache hits, when it is lossy IVF-PQ or SQ8),
+        the new backend is trained on a sample of them, and the indexes are
+        swapped under ``lock``; queries keep using the old index meanwhile.
+        """
+        if self.vector_store is None:
+            return False
+        ids = self.chunk_ids()
+        old_index = self.vector_store.index
+        current = (index_type(old_index), index_quantization(old_index))
+        kind = choose_index_type(self.index_type, len(ids))
+        target = (kind, effective_quantization(kind, self.quantization))
+        too_many_tombstones = len(self.tombstones) > _MAX_TOMBSTONE_RATIO * max(len(ids), 1)
+        if not ids or (target == current and not too_many_tombstones):
+            return False
+
+        started = time.perf_counter()
+        id_array = np.asarray(ids, dtype=np.int64)
+        if is_lossy(old_index):
+            mapping = self.vector_store.index_to_docstore_id
+            texts = [self.vector_store.docstore.search(mapping[i]).page_content for i in ids]
+            vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        else:
+            with self.lock:
+                vectors = self.vector_store.index.reconstruct_batch(id_array)
+        index = build_index(target[0], vectors, id_array, quantization=target[1])
+        with self.lock:
+            self.vector_store.index = index
+            self._release_mapping()
+            self.tombstones.clear()
+            self.version += 1
+        self.dirty = True
+        if self.debug:
+            print(
+                f"[DEBUG] Rebuilt {'/'.join(current)} index as {'/'.join(target)} over {len(ids)} chunks "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+            self._report_vector_memory(index, len(ids), vectors.shape[1])
+        return True
+
+    def _report_vector_memory(self, index, count: int, dim: int) -> None:
+        stored = vector_bytes(index)
+        full = count * dim * 4
+        print(
+            f"[DEBUG] Vectors take {stored / 1_048_576:.1f} MB, {full / 1_048_576:.1f} MB as float32 "
+            f"({(full - stored) / 1_048_576:.1f} MB saved)"
+        )
+
+    def save(self) -> None:
+        """Persist the index; the manifest is written last so a partial save reads as stale."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self.manifest_path.exists():
+            self.manifest_path.unlink()
+        with self.lock:
+            # Only what changed since the last load or save is rewritten.
+            if self.vector_store is not None and self.version != self._saved_version:
+                write_index(self.vector_store.index, self.path / _INDEX_FILE)
+                # A new file per save: the previous one may still be open here or in other processes,
+                # and Windows refuses to replace an open file.
+                docstore = f"chunks-{time.time_ns()}.sqlite"
+                self.vector_store.docstore.write(self.path / docstore)
+                self.manifest["docstore"] = docstore
+            files = []
+            if self._lexical is not None and (self.version != self._saved_version or not self._lexical_saved):
+                files.append((self.path / _LEXICAL_FILE, self._lexical.to_json()))
+                self._lexical_saved = True
+            files.append((self.manifest_path, json.dumps({**self.manifest, "tombstones": sorted(self.tombstones)})))
+            self._saved_version = self.version
+        pickle_path = self.path / f"{_INDEX_NAME}.pkl"
+        if pickle_path.exists():
+            pickle_path.unlink()
+        for path, content in files:
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                fh.write(content)
+            os.replace(tmp_path, path)
+        self._remove_old_docstores()
+        self.dirty = False
+        if self.debug:
+            print(f"[DEBUG] Saved index store to {self.path}")
+
+    def _remove_old_docstores(self) -> None:
+        """Delete docstore files the manifest no longer names; those still open elsewhere go on a later save."""
+        current = self.manifest.get("docstore")
+        for path in self.path.glob("chunks*.sqlite"):
+            if path.name == current:
+                continue
+            try:
+                path.unlink()
+            except OSError as e:
+                if self.debug:
+                    print(f"[DEBUG] Could not remove old docstore {path.name}: {e}")
@@ -0,0 +1,204 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+# inotify(7) constants
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE | _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Sentinel reported when the backend lost track of events and a full rescan is needed.
+RESCAN = None
+
+
+class _PollingBackend:
+    """Portable backend: compares (size, mtime) snapshots of the watched trees."""
+
+    name = "poll"
+
+    def __init__(self, roots, interval: float = 5.0):
+        self.roots = [Path(root) for root in roots]
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._scanned = time.monotonic()
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout: float) -> set:
+        time.sleep(timeout)
+        if time.monotonic() - self._scanned < self.interval:
+            return set()
+        current = self._scan()
+        self._scanned = time.monotonic()
+        previous, self._snapshot = self._snapshot, current
+        changed = {path for path, stat in current.items() if previous.get(path) != stat}
+        changed.update(path for path in previous if path not in current)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyBackend:
+    """Linux backend: recursive inotify watches read through ctypes."""
+
+    name = "inotify"
+
+    def __init__(self, roots):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        for root in roots:
+            self._watch_tree(str(root))
+
+    def _watch_tree(self, top: str) -> set:
+        """Watch ``top`` and its sub-directories; return the files already inside."""
+        found = set()
+        for dirpath, _, filenames in os.walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = dirpath
+            found.update(os.path.join(dirpath, filename) for filename in filenames)
+        return found
+
+    def poll(self, timeout: float):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                return RESCAN
+            directory = self._dirs.get(wd)
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    changed.update(self._watch_tree(path))
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    # The files under a removed directory are unknown here.
+                    return RESCAN
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def make_backend(roots, poll_interval: float = 5.0, prefer: str = "auto"):
+    """inotify on Linux when available (and not disabled), polling otherwise."""
+    if prefer != "poll" and sys.platform.startswith("linux"):
+        try:
+            return _InotifyBackend(roots)
+        except (OSError, AttributeError):
+            pass
+    return _PollingBackend(roots, interval=poll_interval)
+
+
+class KnowledgeWatcher:
+    """Background thread that turns bursts of file events into debounced syncs.
+
+    Changed paths accumulate until no new event has arrived for ``debounce``
+    seconds; ``on_change`` is then called once with the set of paths (or
+    ``RESCAN`` when the backend overflowed). The callback runs on the watcher
+    thread, so the caller keeps serving queries from the current index.
+    """
+
+    def __init__(self, roots, on_change, debounce: float = 2.0, poll_interval: float = 5.0,
+                 backend: str = "auto", debug: bool = False):
+        self.roots = [Path(root) for root in roots if Path(root).is_dir()]
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.prefer = backend
+        self.debug = debug
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "KnowledgeWatcher":
+        self.backend = make_backend(self.roots, poll_interval=self.poll_interval, prefer=self.prefer)
+        if self.debug:
+            print(f"[DEBUG] Watching {len(self.roots)} knowledge folders ({self.backend.name})")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.backend is not None:
+            self.backend.close()
+
+    def _run(self) -> None:
+        pending = set()
+        rescan = False
+        last_event = 0.0
+        while not self._stop.is_set():
+            timeout = self.debounce if (pending or rescan) else 0.5
+            events = self.backend.poll(timeout)
+            if events is RESCAN:
+                rescan = True
+                last_event = time.monotonic()
+            elif events:
+                pending.update(events)
+                last_event = time.monotonic()
+
+            if (pending or rescan) and time.monotonic() - last_event >= self.debounce:
+                batch, pending = (RESCAN if rescan else pending), set()
+                rescan = False
+                try:
+                    self.on_change(batch)
+                except Exception as e:
+                    if self.debug:
+                        print(f"[DEBUG] Knowledge watcher sync failed: {e}")
@@ -0,0 +1,128 @@
+import queue
+import threading
+from typing import NamedTuple
+
+from modules.index_store import source_key
+
+# Chunk batches that may wait between the load/split and embed stages.
+_MAX_PENDING_BATCHES = 2
+_PUT_TIMEOUT = 0.1
+
+
+class IngestionResult(NamedTuple):
+    files: int
+    chunks: int
+    duplicates: int = 0
+    # ``SkippedFile`` entries of files the ingestion planner refused to load.
+    skipped: tuple = ()
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+_DONE = object()
+
+
+class IngestionPipeline:
+    """Streams files through load -> split -> embed -> index in bounded batches.
+
+    A background thread loads files (via ``DocsManager.iter_docs``) and splits
+    them one file at a time (so the splitter sees the whole structure of a
+    file, see ``StructuredChunker``), handing chunk batches of ``batch_size`` to the
+    caller's thread through a queue holding at most ``_MAX_PENDING_BATCHES``
+    batches. The caller embeds and indexes each batch while the next one is
+    being prepared; when embedding falls behind, the loader blocks. Peak
+    memory is therefore bounded by the batch size and the documents of the
+    files currently being loaded, not by the size of the corpus.
+
+    With a ``deduplicator`` (see ``ChunkDeduplicator``), chunks duplicating
+    one already indexed in this run are dropped before they are batched, and
+    the source that kept the original is recorded for the dropping file.
+    """
+
+    def __init__(self, docs_manager, splitter, index_store, batch_size: int = 256, deduplicator=None):
+        self.docs_manager = docs_manager
+        self.splitter = splitter
+        self.index_store = index_store
+        self.batch_size = max(batch_size, 1)
+        self.deduplicator = deduplicator
+
+    def run(self, files) -> IngestionResult:
+        """Index ``(file, uploaded)`` pairs; returns how many files and chunks were indexed."""
+        messages = queue.Queue(maxsize=_MAX_PENDING_BATCHES)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(files, messages, stop), daemon=True)
+        producer.start()
+
+        indexed_files = indexed_chunks = duplicates = 0
+        # Sources started whose chunks may not all be in the index yet.
+        unfinished = []
+        try:
+            while True:
+                message = messages.get()
+                if message is _DONE:
+                    break
+                if isinstance(message, _Failure):
+                    raise message.error
+                started, batch, dropped = message
+                for file in started:
+                    unfinished.append(self.index_store.start_source(file))
+                    indexed_files += 1
+                for key, original in dropped:
+                    duplicates += 1
+                    if original != key:
+                        self.index_store.add_duplicate_of(key, original)
+                if batch:
+                    indexed_chunks += self.index_store.add_chunks(batch)
+                # The last started source may continue in the next batch; every earlier one is complete.
+                del unfinished[:-1]
+        except BaseException:
+            # Partially indexed sources must not keep a fingerprint, or they would never be retried.
+            self.index_store.invalidate_sources(unfinished)
+            raise
+        finally:
+            stop.set()
+            producer.join()
+        return IngestionResult(indexed_files, indexed_chunks, duplicates)
+
+    def _produce(self, files, messages: queue.Queue, stop: threading.Event) -> None:
+        try:
+            started, batch, dropped = [], [], []
+            for file, docs in self.docs_manager.iter_docs(files):
+                if not docs:
+                    # Failed or empty loads stay out of the manifest so the next plan retries them.
+                    continue
+                started.append(file)
+                key = source_key(file)
+                for chunk in self.splitter.split_documents(docs):
+                    if self.deduplicator is not None:
+                        original = self.deduplicator.check(key, chunk.page_content)
+                        if original is not None:
+                            dropped.append((key, original))
+                            continue
+                    batch.append((key, chunk))
+                    if len(batch) >= self.batch_size:
+                        if not self._put(messages, (started, batch, dropped), stop):
+                            return
+                        started, batch, dropped = [], [], []
+                if len(started) >= self.batch_size:
+                    if not self._put(messages, (started, batch, dropped), stop):
+                        return
+                    started, batch, dropped = [], [], []
+            if (started or batch or dropped) and not self._put(messages, (started, batch, dropped), stop):
+                return
+            self._put(messages, _DONE, stop)
+        except BaseException as e:
+            self._put(messages, _Failure(e), stop)
+
+    @staticmethod
+    def _put(messages: queue.Queue, message, stop: threading.Event) -> bool:
+        """Block until there is room for ``message`` (backpressure) or the consumer stopped."""
+        while not stop.is_set():
+            try:
+                messages.put(message, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,179 @@
+import math
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from modules.index_store import file_sha256, source_key
+
+# Rough extracted-text characters per byte on disk, used for chunk estimates.
+_TEXT_PER_BYTE = {
+    ".txt": 1.0,
+    ".md": 1.0,
+    ".csv": 1.0,
+    ".html": 0.4,
+    ".htm": 0.4,
+    ".rtf": 0.5,
+}
+_DEFAULT_TEXT_PER_BYTE = 0.3
+_CHARS_PER_PAGE = 2000
+
+SKIP_TYPE = "type"
+SKIP_SIZE = "size"
+SKIP_EMPTY = "empty"
+SKIP_DUPLICATE = "duplicate"
+
+
+class FileEstimate(NamedTuple):
+    file: object
+    uploaded: bool
+    size: int
+    pages: Optional[int]
+    chunks: int
+
+
+class SkippedFile(NamedTuple):
+    file: object
+    reason: str
+    detail: str = ""
+
+
+class IngestionPlan(NamedTuple):
+    files: list
+    skipped: list
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(estimate.size for estimate in self.files)
+
+    @property
+    def total_pages(self) -> int:
+        return sum(estimate.pages or 0 for estimate in self.files)
+
+    @property
+    def total_chunks(self) -> int:
+        return sum(estimate.chunks for estimate in self.files)
+
+
+def normalize_doc_types(doc_types) -> set:
+    """``["pdf", " .TXT"]`` -> ``{".pdf", ".txt"}``."""
+    normalized = set()
+    for doc_type in doc_types or []:
+        doc_type = doc_type.strip().lower()
+        if doc_type:
+            normalized.add(doc_type if doc_type.startswith(".") else f".{doc_type}")
+    return normalized
+
+
+def _pdf_pages(path) -> Optional[int]:
+    try:
+        import pymupdf
+        with pymupdf.open(path) as pdf:
+            return pdf.page_count
+    except Exception:
+        return None
+
+
+class IngestionPlanner:
+    """Decides which files are worth loading, using only ``stat`` and (rarely) hashing.
+
+    Runs before any loader, in two steps. ``select`` filters files by type
+    (``doc_types`` when an allowlist is set, else everything but the
+    ``ignored_types`` no loader reads, such as images and archives; the
+    allowlist does not apply to uploads, which the user picked explicitly)
+    and by size. ``estimate``, meant for the files the
+    index does not hold yet, filters by content so the same file in the knowledge folder and
+    ``uploads/`` is embedded once. Only files whose size collides with
+    another candidate (or an indexed source) are hashed, since a file of a
+    unique size cannot be a duplicate. Each accepted file gets a cost
+    estimate: bytes, pages for PDFs and expected chunks.
+    """
+
+    def __init__(self, doc_types, ignored_types, max_file_bytes: int = 0, chunk_size: int = 300,
+                 chunk_overlap: int = 30):
+        self.doc_types = normalize_doc_types(doc_types)
+        self.ignored_types = normalize_doc_types(ignored_types)
+        self.max_file_bytes = max_file_bytes
+        self.chunk_step = max(chunk_size - chunk_overlap, 1)
+
+    def _allowed(self, suffix: str, uploaded: bool) -> bool:
+        if self.doc_types and not uploaded:
+            return suffix in self.doc_types
+        return suffix not in self.ignored_types
+
+    def plan(self, files, indexed: Optional[dict] = None) -> IngestionPlan:
+        """Plan ``(file, uploaded)`` pairs; missing files are left out silently.
+
+        ``indexed`` maps source keys of already indexed files that are *not*
+        part of ``files`` to their manifest entries, so content already in the
+        index under another name is skipped too.
+        """
+        candidates, skipped = self.select(files)
+        plan = self.estimate(candidates, indexed)
+        return IngestionPlan(plan.files, skipped + plan.skipped)
+
+    def select(self, files) -> tuple:
+        """``(candidates, skipped)``: the ``(file, uploaded, size)`` triples passing the type and size filters.
+
+        Only ``stat`` is called, so this is cheap enough to run on every file
+        before the index manifest tells which of them changed.
+        """
+        candidates, skipped = [], []
+        for file, uploaded in files:
+            suffix = Path(file).suffix.lower()
+            if not self._allowed(suffix, uploaded):
+                skipped.append(SkippedFile(file, SKIP_TYPE, suffix or Path(file).name))
+                continue
+            try:
+                size = os.stat(file).st_size
+            except OSError:
+                continue
+            if size == 0:
+                skipped.append(SkippedFile(file, SKIP_EMPTY))
+            elif self.max_file_bytes and size > self.max_file_bytes:
+                skipped.append(SkippedFile(file, SKIP_SIZE, f"{size / 1_048_576:.1f} MB"))
+            else:
+                candidates.append((file, uploaded, size))
+        return candidates, skipped
+
+    def estimate(self, candidates, indexed: Optional[dict] = None) -> IngestionPlan:
+        """Drop duplicate content from ``select`` candidates and estimate the cost of the rest."""
+        skipped = []
+        by_size = defaultdict(list)
+        for key, entry in (indexed or {}).items():
+            if entry.get("sha256"):
+                by_size[entry["size"]].append((key, entry["sha256"]))
+        candidate_sizes = defaultdict(int)
+        for _, _, size in candidates:
+            candidate_sizes[size] += 1
+
+        # Knowledge files win over uploads, then path order, so the same copy is kept on every run.
+        seen, dropped = {}, set()
+        for file, uploaded, size in sorted(candidates, key=lambda candidate: (candidate[1], str(candidate[0]))):
+            if candidate_sizes[size] == 1 and not by_size.get(size):
+                continue
+            try:
+                digest = file_sha256(file)
+            except OSError:
+                dropped.add(file)
+                continue
+            original = seen.get(digest) or next((key for key, sha in by_size.get(size, []) if sha == digest), None)
+            if original is not None:
+                skipped.append(SkippedFile(file, SKIP_DUPLICATE, Path(original).name))
+                dropped.add(file)
+            else:
+                seen[digest] = source_key(file)
+
+        estimates = [
+            self._estimate(file, uploaded, size) for file, uploaded, size in candidates if file not in dropped
+        ]
+        return IngestionPlan(estimates, skipped)
+
+    def _estimate(self, file, uploaded: bool, size: int) -> FileEstimate:
+        suffix = Path(file).suffix.lower()
+        pages = _pdf_pages(file) if suffix == ".pdf" else None
+        if pages is not None:
+            chars = pages * _CHARS_PER_PAGE
+        else:
+            chars = size * _TEXT_PER_BYTE.get(suffix, _DEFAULT_TEXT_PER_BYTE)
+        return FileEstimate(file, uploaded, size, pages, max(math.ceil(chars / self.chunk_step), 1))
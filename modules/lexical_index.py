@@ -0,0 +1,115 @@
+import heapq
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Optional
+
+LEXICAL_INDEX_VERSION = 1
+
+# Words, plus codes and identifiers joined by - . / : (e.g. "XR-220", "v2.1").
+_TOKEN = re.compile(r"\w+(?:[-./:]\w+)*")
+_JOINER = re.compile(r"[-./:]")
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased word tokens; joined codes are kept whole and also split into their parts.
+
+    ``"Part XR-220"`` -> ``["part", "xr-220", "xr", "220"]``, so a query for
+    the full code ranks exact matches first while ``"xr 220"`` still matches.
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        parts = _JOINER.split(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over chunk ids.
+
+    Keeps per-chunk term counts (what ``to_json`` persists) and the postings
+    derived from them, so chunks can be removed as cheaply as they are added.
+    Scores use Okapi BM25 with the non-negative ``log(1 + ...)`` idf.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs = {}
+        self._lengths = {}
+        self._postings = defaultdict(dict)
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def ids(self) -> set:
+        return set(self._docs)
+
+    def add(self, ids, texts) -> None:
+        for i, text in zip(ids, texts):
+            self._add_counts(int(i), Counter(tokenize(text)))
+
+    def _add_counts(self, i: int, counts: dict) -> None:
+        if i in self._docs:
+            self.remove([i])
+        self._docs[i] = counts
+        self._lengths[i] = sum(counts.values())
+        self._total_length += self._lengths[i]
+        for term, tf in counts.items():
+            self._postings[term][i] = tf
+
+    def remove(self, ids) -> None:
+        for i in ids:
+            counts = self._docs.pop(int(i), None)
+            if counts is None:
+                continue
+            self._total_length -= self._lengths.pop(int(i))
+            for term in counts:
+                postings = self._postings[term]
+                postings.pop(int(i), None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query: str, k: int = 4, allowed=None) -> list:
+        """Return ``(chunk id, score)`` pairs of the ``k`` best matching chunks, best first.
+
+        With ``allowed`` (a set of chunk ids) only those chunks are scored.
+        """
+        if not self._docs:
+            return []
+        count = len(self._docs)
+        average_length = self._total_length / count or 1.0
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings.items():
+                if allowed is not None and i not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / average_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def to_json(self) -> str:
+        docs = {str(i): counts for i, counts in self._docs.items()}
+        return json.dumps({"version": LEXICAL_INDEX_VERSION, "k1": self.k1, "b": self.b, "docs": docs})
+
+    @classmethod
+    def from_json(cls, data: str) -> Optional["BM25Index"]:
+        """Rebuild an index saved by ``to_json``; ``None`` when ``data`` is not a current save."""
+        try:
+            saved = json.loads(data)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(saved, dict) or saved.get("version") != LEXICAL_INDEX_VERSION:
+            return None
+        index = cls(k1=saved["k1"], b=saved["b"])
+        for i, counts in saved["docs"].items():
+            index._add_counts(int(i), counts)
+        return index
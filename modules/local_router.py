@@ -0,0 +1,129 @@
+import hashlib
+import math
+import os
+import re
+import zlib
+from typing import Optional
+
+import numpy as np
+
+ROUTER_LABELS = ("simple", "rag")
+# Bump when features change, so models saved by older versions are retrained.
+_FEATURE_VERSION = 1
+_WORD = re.compile(r"\w+")
+
+
+def _features(question: str) -> list:
+    """Words, word pairs, character trigrams of each word and a length bucket; language agnostic."""
+    words = _WORD.findall(question.lower())
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    features.append(f"n:{int(math.log2(len(words) + 1))}")
+    return features
+
+
+def load_examples(path) -> list:
+    """``(label, question)`` pairs from a tab separated examples file; ``#`` starts a comment line."""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            label, _, question = line.partition("\t")
+            label = label.strip().lower()
+            if label not in ROUTER_LABELS or not question.strip():
+                raise ValueError(f"Invalid router example: {line}")
+            examples.append((label, question.strip()))
+    return examples
+
+
+class LocalRouter:
+    """Logistic regression over hashed n-gram features that tells RAG questions from small talk.
+
+    Trained in milliseconds from labelled examples and run without any
+    network call, so a confident decision costs microseconds instead of an
+    LLM round-trip. ``predict`` returns the label and the probability of it.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float = 0.0):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.dim = len(self.weights)
+
+    def _encode(self, question: str) -> tuple:
+        counts = {}
+        for feature in _features(question):
+            slot = zlib.crc32(feature.encode("utf-8")) % self.dim
+            counts[slot] = counts.get(slot, 0.0) + 1.0
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        norm = float(np.sqrt(values @ values)) or 1.0
+        return np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)), values / norm
+
+    def predict(self, question: str) -> tuple:
+        """``(label, confidence)`` with confidence between 0.5 and 1."""
+        slots, values = self._encode(question or "")
+        rag = 1.0 / (1.0 + math.exp(-(float(self.weights[slots] @ values) + self.bias)))
+        return ("rag", rag) if rag >= 0.5 else ("simple", 1.0 - rag)
+
+    @classmethod
+    def train(cls, examples, dim: int = 1 << 14, epochs: int = 300, learning_rate: float = 2.0,
+              l2: float = 1e-4) -> "LocalRouter":
+        """Fit on ``(label, question)`` pairs by full-batch gradient descent, weighting both classes equally."""
+        router = cls(np.zeros(dim, dtype=np.float32))
+        if not examples:
+            return router
+        x = np.zeros((len(examples), dim), dtype=np.float32)
+        for row, (_, question) in enumerate(examples):
+            slots, values = router._encode(question)
+            x[row, slots] = values
+        y = np.array([label == "rag" for label, _ in examples], dtype=np.float32)
+        positives = max(float(y.sum()), 1.0)
+        negatives = max(len(y) - float(y.sum()), 1.0)
+        sample_weights = np.where(y == 1, 0.5 / positives, 0.5 / negatives).astype(np.float32)
+        weights, bias = np.zeros(dim, dtype=np.float32), 0.0
+        for _ in range(epochs):
+            predicted = 1.0 / (1.0 + np.exp(-(x @ weights + bias)))
+            error = (predicted - y) * sample_weights
+            weights -= learning_rate * (x.T @ error + l2 * weights)
+            bias -= learning_rate * float(error.sum())
+        router.weights, router.bias = weights, bias
+        return router
+
+    def save(self, path, digest: str = "") -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, weights=self.weights, bias=np.float32(self.bias), digest=np.array(digest))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, digest: str = None) -> Optional["LocalRouter"]:
+        """The router saved at ``path``, or ``None`` if missing, unreadable or trained on other examples."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if digest is not None and str(data["digest"]) != digest:
+                    return None
+                return cls(data["weights"], float(data["bias"]))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    @classmethod
+    def from_examples(cls, examples_path, model_path=None, debug: bool = False) -> "LocalRouter":
+        """Train on ``examples_path``, reusing the model saved at ``model_path`` while the examples are unchanged."""
+        with open(examples_path, "rb") as f:
+            digest = hashlib.sha256(f.read() + f"|{_FEATURE_VERSION}".encode()).hexdigest()
+        if model_path:
+            router = cls.load(model_path, digest)
+            if router is not None:
+                return router
+        router = cls.train(load_examples(examples_path))
+        if model_path:
+            try:
+                router.save(model_path, digest)
+            except OSError as e:
+                if debug:
+                    print(f"[DEBUG] Could not save router model: {e}")
+        return router
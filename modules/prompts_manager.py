@@ -17,10 +17,14 @@ class PromptsManager:
         except FileNotFoundError:
             self.analyzer_prompt = None
 
+    @staticmethod
+    def prompt_path(name):
+        import os
+        return os.path.join(os.path.dirname(__file__), "prompts", name)
+
     def _load_prompt(self, prompt_type):
         import os
-        base_dir = os.path.dirname(__file__)
-        file_path = os.path.join(base_dir, "prompts", f"{prompt_type}_en_us.txt")
+        file_path = self.prompt_path(f"{prompt_type}_en_us.txt")
 
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Prompt file not found: {file_path}")
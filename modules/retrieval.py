@@ -0,0 +1,159 @@
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical", "mmr")
+# Rank offset of reciprocal rank fusion; 60 is the value from the original RRF paper.
+RRF_K = 60
+
+
+class RetrievalScope(NamedTuple):
+    """Restricts retrieval to part of the knowledge base; empty fields do not filter.
+
+    ``sources`` are file paths, ``folder`` keeps files below a directory,
+    ``doc_types`` are extensions ("pdf" or ".pdf") and ``since`` keeps files
+    indexed at or after that time (seconds since the epoch).
+    """
+
+    sources: tuple = ()
+    folder: Optional[str] = None
+    doc_types: tuple = ()
+    since: Optional[float] = None
+
+
+def reciprocal_rank_fusion(rankings, k: int = RRF_K) -> list:
+    """Fuse ranked document lists into ``(document, score)`` pairs, best first.
+
+    Each list contributes ``1 / (k + rank)`` for every document it holds, so
+    documents found by several retrievers rise to the top without their
+    incomparable raw scores ever being mixed.
+    """
+    scores, documents = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            documents.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return [(documents[key], score) for key, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)]
+
+
+def maximal_marginal_relevance(query, candidates, k: int = 4, lambda_mult: float = 0.5) -> list:
+    """Greedily pick up to ``k`` rows of ``candidates`` that are relevant to ``query`` but unlike each other.
+
+    Each step takes the candidate maximising ``lambda_mult * sim(query) -
+    (1 - lambda_mult) * max sim(already picked)`` (cosine similarities).
+    All pairwise similarities come from one matrix product and the running
+    maximum is updated with one vector operation per pick. Returns row
+    indices in pick order.
+    """
+    candidates = np.asarray(candidates, dtype=np.float32)
+    if not len(candidates) or k <= 0:
+        return []
+    unit = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query, dtype=np.float32)
+    relevance = unit @ (query / max(float(np.linalg.norm(query)), 1e-12))
+    similarity = unit @ unit.T
+
+    picked = [int(np.argmax(relevance))]
+    redundancy = similarity[picked[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[picked[0]] = False
+    while len(picked) < min(k, len(candidates)):
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return picked
+
+
+class KnowledgeRetriever:
+    """Similarity retriever over the live ``IndexStore``.
+
+    The query is embedded outside the store lock; only the vector search and
+    docstore lookups (``IndexStore.search``) hold it, so background indexing (uploads, re-indexing)
+    never sees a half-updated index and queries never wait on an embedding
+    request made by the indexer.
+
+    ``mode`` picks the ranking: "vector" (embedding similarity, filtered by
+    ``score_threshold``), "lexical" (BM25 over the same chunks; no query
+    embedding is requested at all) or "hybrid", which fuses the top
+    ``fetch_k`` of both with reciprocal rank fusion so exact codes and names
+    are found even when their vector similarity falls below the threshold.
+    "mmr" takes the ``fetch_k`` nearest chunks above the threshold and keeps
+    the ``k`` most relevant yet mutually different ones (maximal marginal
+    relevance, weighted by ``mmr_lambda``), so overlapping neighbour chunks
+    do not crowd out the rest of the context.
+
+    A ``RetrievalScope`` limits every mode to the chunks of matching sources
+    before ranking, so out-of-scope chunks are never scanned.
+    """
+
+    def __init__(self, index_store, k: int = 4, score_threshold: float = 0.3, mode: str = "vector",
+                 fetch_k: int = 20, mmr_lambda: float = 0.5):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode: {mode}")
+        self.index_store = index_store
+        self.k = k
+        self.score_threshold = score_threshold
+        self.mode = mode
+        self.fetch_k = fetch_k
+        self.mmr_lambda = mmr_lambda
+
+    @property
+    def index_version(self) -> int:
+        return self.index_store.version
+
+    def invoke(self, query: str, mode: Optional[str] = None, scope: Optional[RetrievalScope] = None) -> List[Document]:
+        return [doc for doc, _ in self.search(query, mode=mode, scope=scope)]
+
+    def search(self, query: str, mode: Optional[str] = None, scope: Optional[RetrievalScope] = None):
+        """Return ``(document, score)`` pairs, best first, ranked by ``mode`` (default: ``self.mode``).
+
+        Scores are relevance in [0, 1] for "vector" and "mmr", BM25 scores for
+        "lexical" and fused RRF scores for "hybrid".
+        """
+        mode = mode or self.mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode: {mode}")
+        if self.index_store.vector_store is None:
+            return []
+        ids = None
+        if scope is not None:
+            ids = self.index_store.ids_in_scope(scope)
+            if not ids:
+                return []
+        if mode == "lexical":
+            return self.index_store.search_lexical(query, k=self.k, ids=ids)
+        if mode == "vector":
+            return self._vector_search(query, self.k, ids)
+        if mode == "mmr":
+            return self._mmr_search(query, ids)
+        vector_hits = self._vector_search(query, max(self.fetch_k, self.k), ids)
+        lexical_hits = self.index_store.search_lexical(query, k=max(self.fetch_k, self.k), ids=ids)
+        fused = reciprocal_rank_fusion([[doc for doc, _ in vector_hits], [doc for doc, _ in lexical_hits]])
+        return fused[:self.k]
+
+    def _vector_search(self, query: str, k: int, ids=None):
+        embedding = self.index_store.embeddings.embed_query(query)
+        vector_store = self.index_store.vector_store
+        if vector_store is None:
+            return []
+        relevance = vector_store._select_relevance_score_fn()
+        scored = [(doc, relevance(distance)) for doc, distance in self.index_store.search(embedding, k=k, ids=ids)]
+        return [(doc, score) for doc, score in scored if score >= self.score_threshold]
+
+    def _mmr_search(self, query: str, ids=None):
+        embedding = self.index_store.embeddings.embed_query(query)
+        vector_store = self.index_store.vector_store
+        if vector_store is None:
+            return []
+        relevance = vector_store._select_relevance_score_fn()
+        hits = self.index_store.search(embedding, k=max(self.fetch_k, self.k), ids=ids, with_vectors=True)
+        pool = [(doc, relevance(distance), vector) for doc, distance, vector in hits]
+        pool = [hit for hit in pool if hit[1] >= self.score_threshold]
+        if not pool:
+            return []
+        picked = maximal_marginal_relevance(embedding, [vector for _, _, vector in pool], self.k, self.mmr_lambda)
+        return [(pool[i][0], pool[i][1]) for i in picked]
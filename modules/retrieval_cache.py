@@ -0,0 +1,83 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Words and joined codes ("XR-220", "v2.1"); everything else (case, punctuation,
+# spacing) is treated as a trivial rewording.
+_WORD = re.compile(r"\w+(?:[-./:]\w+)*")
+
+
+def normalize_question(question: str) -> str:
+    """``"  What is XR-220?"`` -> ``"what is xr-220"``."""
+    return " ".join(_WORD.findall(question.casefold()))
+
+
+class RetrievalCache:
+    """LRU + TTL cache of retrieved context, keyed by normalized question, mode, scope and index version.
+
+    Entries are only valid for the index version they were retrieved from:
+    the first lookup against a newer version drops the whole cache, so
+    answers never use context from before an index change. ``max_entries``
+    bounds the size (least recently used entries go first) and entries older
+    than ``ttl`` seconds are treated as misses.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync_version(self, version) -> None:
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, question: str, version, mode: Optional[str] = None, scope=None):
+        """Cached documents for ``question`` at index ``version``, or ``None``."""
+        key = (normalize_question(question), mode, scope)
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, question: str, version, documents, mode: Optional[str] = None, scope=None) -> None:
+        key = (normalize_question(question), mode, scope)
+        with self._lock:
+            self._sync_version(version)
+            self._entries[key] = (self._clock(), documents)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "invalidations": self.invalidations,
+            }
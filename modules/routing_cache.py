@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from modules.retrieval_cache import normalize_question
+
+
+def routing_key(question: str, persona: str = "", prompt_version: str = "") -> bytes:
+    """sha256 of the normalized question, the persona and the analyzer prompt version."""
+    text = "\x1f".join((normalize_question(question or ""), persona or "", prompt_version or ""))
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class RoutingCache:
+    """Bounded LRU of analyzer LLM routing decisions, keyed by ``routing_key``.
+
+    The fixed greeting and farewell questions, and any question asked
+    before, are classified once instead of on every ask. With ``path`` set,
+    decisions are also written to a SQLite table and the ``max_entries``
+    most recent ones are loaded back on start.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None, debug: bool = False):
+        self.max_entries = max_entries
+        self.path = str(path) if path else None
+        self.debug = debug
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if self.path:
+            self._open()
+
+    def _open(self) -> None:
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS routing_decisions ("
+            " key BLOB PRIMARY KEY,"
+            " decision TEXT NOT NULL,"
+            " created INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT key, decision FROM routing_decisions ORDER BY created DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for key, decision in reversed(rows):
+            self._entries[bytes(key)] = decision
+        if self.debug and rows:
+            print(f"[DEBUG] Loaded {len(rows)} cached routing decisions")
+
+    def get(self, key: bytes) -> Optional[str]:
+        with self._lock:
+            decision = self._entries.get(key)
+            if decision is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decision
+
+    def put(self, key: bytes, decision: str) -> None:
+        decision = str(getattr(decision, "value", decision))
+        with self._lock:
+            self._entries[key] = decision
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._conn is not None:
+                self._persist(key, decision)
+
+    def _persist(self, key: bytes, decision: str) -> None:
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO routing_decisions (key, decision, created) VALUES (?, ?, ?)",
+                (key, decision, time.time_ns()),
+            )
+            self._conn.execute(
+                "DELETE FROM routing_decisions WHERE key NOT IN "
+                "(SELECT key FROM routing_decisions ORDER BY created DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            if self.debug:
+                print(f"[DEBUG] Could not persist routing decision: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
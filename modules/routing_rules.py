@@ -0,0 +1,107 @@
+import re
+import unicodedata
+
+_WORD = re.compile(r"\w+")
+# Trie node keys that cannot collide with words.
+_END = ""
+_PREFIXES = "*"
+
+# Keys in texts/*.properties with comma separated "term:weight" lists.
+RAG_TERMS_KEY = "routing.rag.terms"
+SIMPLE_TERMS_KEY = "routing.simple.terms"
+
+
+def _fold(text: str) -> str:
+    """Casefolded text without accents, so "página", "Pagina" and "PÁGINA" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def parse_terms(spec: str) -> dict:
+    """``"find:2, according to:3, document*"`` -> ``{"find": 2.0, "according to": 3.0, "document*": 1.0}``.
+
+    A term is a word or phrase; a trailing ``*`` also matches longer words
+    ("document*" matches "documents", "documentation"). Weights default to 1.
+    """
+    terms = {}
+    for item in (spec or "").split(","):
+        term, _, weight = item.strip().rpartition(":")
+        if not term:
+            term, weight = weight, ""
+        term = " ".join(_fold(term).split())
+        if not term:
+            continue
+        try:
+            terms[term] = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid routing term weight: {item.strip()}") from None
+    return terms
+
+
+class RoutingRules:
+    """Weighted keyword and phrase rules that route a question without any model.
+
+    All terms of every language are compiled once into a trie over whole
+    words, so a question is scanned in one pass over its words and "file"
+    no longer matches inside "profile". Each distinct RAG term found adds
+    its weight, each small-talk term subtracts its own, and a question
+    longer than ``long_question_chars`` counts ``long_question_weight``
+    towards RAG. A positive score routes to RAG.
+    """
+
+    def __init__(self, rag_terms: dict = None, simple_terms: dict = None, long_question_chars: int = 200,
+                 long_question_weight: float = 1.0):
+        weights = {}
+        for terms, sign in ((rag_terms or {}, 1.0), (simple_terms or {}, -1.0)):
+            for term, weight in terms.items():
+                term = " ".join(_fold(term).split())
+                weights[term] = weights.get(term, 0.0) + sign * weight
+        self.terms = sorted(weights)
+        self.weights = [weights[term] for term in self.terms]
+        self.long_question_chars = long_question_chars
+        self.long_question_weight = long_question_weight
+        # Each node maps a word to the next node; _END holds the index of the
+        # term ending there and _PREFIXES the wildcard prefixes of the next word.
+        self._trie = {}
+        for index, term in enumerate(self.terms):
+            node, words = self._trie, _WORD.findall(term)
+            if not words:
+                continue
+            for word in words[:-1]:
+                node = node.setdefault(word, {})
+            if term.endswith("*"):
+                node.setdefault(_PREFIXES, {})[words[-1]] = index
+            else:
+                node.setdefault(words[-1], {})[_END] = index
+
+    @classmethod
+    def from_texts(cls, texts, **options) -> "RoutingRules":
+        """Rules from the ``routing.*.terms`` entries of several languages' texts, merged."""
+        rag_terms, simple_terms = {}, {}
+        for language_texts in texts:
+            for key, terms in ((RAG_TERMS_KEY, rag_terms), (SIMPLE_TERMS_KEY, simple_terms)):
+                for term, weight in parse_terms(language_texts.get(key, "")).items():
+                    terms[term] = max(weight, terms.get(term, weight))
+        return cls(rag_terms, simple_terms, **options)
+
+    def score(self, question: str) -> float:
+        question = question or ""
+        score = self.long_question_weight if len(question) > self.long_question_chars else 0.0
+        words = _WORD.findall(_fold(question))
+        matched = set()
+        for start in range(len(words)):
+            node = self._trie
+            for word in words[start:]:
+                prefixes = node.get(_PREFIXES)
+                if prefixes:
+                    matched.update(prefixes[word[:end]] for end in range(1, len(word) + 1) if word[:end] in prefixes)
+                node = node.get(word)
+                if node is None:
+                    break
+                if _END in node:
+                    matched.add(node[_END])
+        return score + sum(self.weights[index] for index in matched)
+
+    def decide(self, question: str) -> str:
+        """``"rag"`` or ``"simple"``."""
+        return "rag" if self.score(question) > 0 else "simple"
@@ -0,0 +1,73 @@
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.chunk_dedup import ChunkDeduplicator, lsh_params
+
+_NOTICE = (
+    "Copyright 2024 Example Games. All rights reserved. Permission is granted to photocopy this page "
+    "for personal use at the table. Reproduction for any other purpose, including resale, is prohibited "
+    "without the prior written consent of the publisher."
+)
+
+
+def test_lsh_params_err_below_threshold():
+    bands, rows = lsh_params(0.9, 64)
+    assert bands * rows == 64
+    assert (1 / bands) ** (1 / rows) <= 0.9
+
+
+def test_exact_duplicates_ignore_case_and_whitespace():
+    dedup = ChunkDeduplicator(threshold=0.9)
+    assert dedup.check("a.pdf", _NOTICE) is None
+    assert dedup.check("b.pdf", "  " + _NOTICE.upper().replace(" ", "\n")) == "a.pdf"
+    assert dedup.exact_duplicates == 1
+    assert dedup.near_duplicates == 0
+
+
+def test_near_duplicates_are_dropped_and_distinct_text_kept():
+    dedup = ChunkDeduplicator(threshold=0.8)
+    assert dedup.check("a.pdf", _NOTICE) is None
+    assert dedup.check("b.pdf", _NOTICE.replace("2024", "2025")) == "a.pdf"
+    assert dedup.check("c.txt", "The red dragon sleeps on a hoard of copper coins beneath the old mill.") is None
+    assert dedup.near_duplicates == 1
+    assert dedup.duplicates == 1
+    assert dedup.seen == 3
+
+
+def test_threshold_one_keeps_exact_matching_only():
+    dedup = ChunkDeduplicator(threshold=1.0)
+    assert dedup.check("a.pdf", _NOTICE) is None
+    assert dedup.check("b.pdf", _NOTICE.replace("2024", "2025")) is None
+    assert dedup.check("c.pdf", _NOTICE) == "a.pdf"
+
+
+def test_signature_estimates_jaccard_similarity():
+    """Signature agreement tracks the true Jaccard similarity of the 5-gram shingle sets."""
+    dedup = ChunkDeduplicator(num_perm=256)
+    first = _NOTICE.lower()
+    second = first.replace("personal use at the table", "any home game you run")
+
+    def shingles(text):
+        data = text.encode("utf-8")
+        return {data[i:i + 5] for i in range(len(data) - 4)}
+
+    a, b = shingles(first), shingles(second)
+    jaccard = len(a & b) / len(a | b)
+    estimate = (dedup.signature(first) == dedup.signature(second)).mean()
+    assert abs(estimate - jaccard) < 0.1
+
+
+def test_near_duplicates_are_verified_with_exact_jaccard():
+    """Stat blocks differing in one number are kept whatever the MinHash estimate says."""
+    block = (
+        "Goblin. Small humanoid, neutral evil. Armor Class {} (leather armor, shield). Hit Points 7 (2d6). "
+        "Speed 30 ft. STR 8 DEX 14 CON 10 INT 10 WIS 8 CHA 8. Skills Stealth +6. Senses darkvision 60 ft."
+    )
+    for seed in range(20):
+        dedup = ChunkDeduplicator(threshold=0.95, seed=seed)
+        assert dedup.check("a.pdf", block.format(13)) is None
+        assert dedup.check("b.pdf", block.format(15)) is None
+    assert dedup.jaccard(block.format(13), block.format(15)) < 0.95
@@ -0,0 +1,96 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from langchain_core.documents import Document
+
+from modules.chunking import ChunkSettings, StructuredChunker, estimate_tokens, parse_chunk_settings
+
+
+def _element(text, category="NarrativeText", **metadata):
+    return Document(page_content=text, metadata={"source": "guide.md", "category": category, **metadata})
+
+
+def test_estimate_tokens_counts_words_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("The dragon sleeps.") == 6
+    assert estimate_tokens("XR-220") == 3
+    assert estimate_tokens("incomprehensibilities") == 6
+
+
+def test_parse_chunk_settings_per_extension():
+    default = ChunkSettings("tokens", 256, 32)
+    settings = parse_chunk_settings("pdf=tokens:512:64, .CSV=characters:300:0, md=128", default)
+    assert settings == {
+        ".pdf": ChunkSettings("tokens", 512, 64),
+        ".csv": ChunkSettings("characters", 300, 0),
+        ".md": ChunkSettings("tokens", 128, 32),
+    }
+    assert parse_chunk_settings("") == {}
+    with pytest.raises(ValueError):
+        parse_chunk_settings("pdf=words:100")
+    with pytest.raises(ValueError):
+        parse_chunk_settings("pdf=tokens:100:100")
+
+
+def test_chunker_sizes_by_tokens_and_keeps_pages_apart():
+    """Token-sized chunks never cross a page; small pages stay whole."""
+    chunker = StructuredChunker(ChunkSettings("tokens", 50, 0))
+    pages = [
+        Document(page_content="Short first page.", metadata={"source": "book.pdf", "page": 0}),
+        Document(page_content=" ".join(["lore"] * 120), metadata={"source": "book.pdf", "page": 1}),
+    ]
+    chunks = chunker.split_documents(pages)
+
+    assert chunks[0].page_content == "Short first page."
+    assert [chunk.metadata["page"] for chunk in chunks] == [0, 1, 1, 1]
+    assert all(estimate_tokens(chunk.page_content) <= 50 for chunk in chunks)
+
+
+def test_chunker_per_extension_override():
+    chunker = StructuredChunker(ChunkSettings("tokens", 256, 0), {".csv": ChunkSettings("characters", 20, 0)})
+    rows = Document(page_content="a,b,c\n1,2,3\n4,5,6\n7,8,9", metadata={"source": "table.csv"})
+    assert len(chunker.split_documents([rows])) == 2
+    assert len(chunker.split_documents([Document(page_content=rows.page_content, metadata={"source": "t.txt"})])) == 1
+
+
+def test_chunker_splits_elements_at_headings():
+    """Small sections are packed together; a large one is split and every piece keeps its heading."""
+    chunker = StructuredChunker(ChunkSettings("tokens", 40, 0))
+    elements = [
+        _element("Preface text.", page_number=1, coordinates="dropped"),
+        _element("Setup", "Title"),
+        _element("Install the dice."),
+        _element("Combat", "Title"),
+        _element(" ".join(["attack"] * 100)),
+        _element("Magic", "Title"),
+        _element("Spells cost mana."),
+    ]
+    chunks = chunker.split_documents(elements)
+
+    assert chunks[0].page_content == "Preface text.\n\nSetup\n\nInstall the dice."
+    assert chunks[0].metadata == {"source": "guide.md", "page_number": 1}
+    combat = [chunk for chunk in chunks if chunk.metadata.get("section") == "Combat"]
+    assert len(combat) > 1
+    assert all(chunk.page_content.startswith("Combat\n\nattack") for chunk in combat)
+    assert chunks[-1].page_content == "Magic\n\nSpells cost mana."
+    assert chunks[-1].metadata == {"source": "guide.md", "section": "Magic"}
+
+
+def test_chunking_benchmark_reports_each_strategy():
+    from modules.chunking_benchmark import benchmark
+
+    pages = [Document(page_content=" ".join(["quest"] * 400), metadata={"source": "book.pdf", "page": i}) for i in range(3)]
+    strategies = {
+        "small": StructuredChunker(ChunkSettings("tokens", 64, 0)),
+        "large": StructuredChunker(ChunkSettings("tokens", 256, 0)),
+    }
+    rows = {row["strategy"]: row for row in benchmark([("book.pdf", pages)], strategies, dim=8, queries=5)}
+
+    assert rows["small"]["chunks"] > rows["large"]["chunks"] > 0
+    assert rows["large"]["embedding_requests"] == 1
+    assert rows["small"]["mean_ms"] > 0
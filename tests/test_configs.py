@@ -207,6 +207,9 @@ def test_config_default_values():
                 assert config.EMBEDDINGS_AI_MODEL is None
                 assert config.DEBUG is False
                 assert config.MODE == 'gui'
+                assert config.RETRIEVAL_MODE == 'vector'
+                assert config.CHUNK_DEDUP_THRESHOLD == 1.0
+                assert config.ROUTER_CONFIDENCE_THRESHOLD == 1.0
                 
     finally:
         # Restore original environment
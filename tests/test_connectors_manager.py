@@ -1,7 +1,10 @@
 import os
 import sys
+import threading
 from unittest.mock import patch, MagicMock
 
+import pytest
+
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
 
@@ -13,6 +16,9 @@ from modules.connectors_manager import (
     RoutingDecision,
     _CONNECTOR_REGISTRY,
 )
+from modules.chunking import StructuredChunker
+from modules.ingestion_planner import IngestionPlanner
+from modules.retrieval import KnowledgeRetriever
 
 
 def test_routing_decision_enum():
@@ -166,6 +172,73 @@ def test_rag_agent_answer():
     assert result == "No knowledge base available"
 
 
+def test_rag_agent_retrieval_mode_override():
+    """A RAGAgent with its own retrieval mode passes it to the retriever."""
+    mock_retriever = MagicMock()
+    mock_retriever.invoke.return_value = []
+    agent = RAGAgent(MagicMock(), mock_retriever, retrieval_mode="lexical")
+
+    agent.answer("where is XR-220")
+    mock_retriever.invoke.assert_called_once_with("where is XR-220", mode="lexical")
+
+
+def test_rag_agent_passes_scope_and_caches_per_scope():
+    """A scope reaches the retriever and scoped context is cached apart from unscoped context."""
+    from modules.retrieval import RetrievalScope
+    from modules.retrieval_cache import RetrievalCache
+
+    mock_retriever = MagicMock(index_version=1, mode="hybrid")
+    mock_retriever.invoke.return_value = []
+    agent = RAGAgent(MagicMock(), mock_retriever, retrieval_cache=RetrievalCache())
+    scope = RetrievalScope(sources=("/kb/manual.pdf",))
+
+    agent.answer("what is XR-220", scope=scope)
+    mock_retriever.invoke.assert_called_once_with("what is XR-220", scope=scope)
+    agent.answer("what is XR-220")
+    assert mock_retriever.invoke.call_count == 2
+
+
+def test_rag_agent_packs_context():
+    """With a context packer, the chain receives the packed passages instead of the raw chunks."""
+    from langchain_core.documents import Document
+    from modules.context_packer import ContextPacker
+
+    notice = "Copyright notice repeated on every page."
+    mock_retriever = MagicMock()
+    mock_retriever.invoke.return_value = [
+        Document(page_content=f"Dragons sleep.\n\n{notice}", metadata={"source": "a.pdf", "page": 1}),
+        Document(page_content=f"Elves sing.\n\n{notice}", metadata={"source": "a.pdf", "page": 2}),
+    ]
+    mock_document_chain = MagicMock()
+    packer = ContextPacker(token_budget=0)
+    agent = RAGAgent(mock_document_chain, mock_retriever, context_packer=packer)
+
+    agent.answer("what do dragons do")
+    context = mock_document_chain.invoke.call_args.args[0]["context"]
+    assert [doc.page_content for doc in context] == [f"Dragons sleep.\n\n{notice}", "Elves sing."]
+    assert packer.stats()["tokens_saved"] > 0
+
+
+def test_rag_agent_retrieval_cache():
+    """A repeated question skips retrieval until the index version changes."""
+    from modules.retrieval_cache import RetrievalCache
+
+    mock_retriever = MagicMock(index_version=1, mode="hybrid")
+    mock_retriever.invoke.return_value = ["context"]
+    mock_document_chain = MagicMock()
+    agent = RAGAgent(mock_document_chain, mock_retriever, retrieval_cache=RetrievalCache())
+
+    agent.answer("What is XR-220?")
+    agent.answer("what is xr-220")
+    assert mock_retriever.invoke.call_count == 1
+    assert mock_document_chain.invoke.call_args.args[0]["context"] == ["context"]
+
+    mock_retriever.index_version = 2
+    agent.answer("what is xr-220")
+    assert mock_retriever.invoke.call_count == 2
+    assert agent.retrieval_cache.stats()["hits"] == 1
+
+
 def test_simple_llm_agent_init():
     """Test SimpleLLMAgent initialization"""
     mock_document_chain = MagicMock()
@@ -190,11 +263,31 @@ def test_simple_llm_agent_answer():
 
 def _make_connector_manager(mock_config, mock_connector):
     """Helper: build a ConnectorManager with fully mocked internals."""
+    mock_config.EMBEDDINGS_CACHE_MAX_ENTRIES = 0
+    mock_config.QUERY_EMBEDDINGS_CACHE_SIZE = 0
+    mock_config.EMBEDDINGS_BATCH_SIZE = 64
+    mock_config.EMBEDDINGS_MAX_IN_FLIGHT = 4
+    mock_config.EMBEDDINGS_REQUESTS_PER_MINUTE = None
+    mock_config.KNOWLEDGE_WATCH = False
+    mock_config.LOCAL_KNOWLEDGE_DOC_TYPES = []
+    mock_config.LOCAL_KNOWLEDGE_MAX_FILE_MB = 100
+    mock_config.RETRIEVAL_MODE = "hybrid"
+    mock_config.RETRIEVAL_FETCH_K = 20
+    mock_config.MMR_LAMBDA = 0.5
+    mock_config.RETRIEVAL_CACHE_SIZE = 0
+    mock_config.CHUNK_STRATEGY = "tokens"
+    mock_config.CHUNK_SIZE = 256
+    mock_config.CHUNK_OVERLAP = 32
+    mock_config.CHUNK_SETTINGS_BY_TYPE = ""
+    mock_config.CONTEXT_TOKEN_BUDGET = None
+    mock_config.ROUTER_CONFIDENCE_THRESHOLD = 1.0
+    mock_config.ROUTING_CACHE_SIZE = 0
+    mock_config.SPECULATIVE_RETRIEVAL = False
     with patch("modules.connectors_manager.ConnectorManager.get_connector", return_value=mock_connector), \
          patch("modules.prompts_manager.PromptsManager") as mock_prompts_mgr, \
          patch("modules.docs_manager.DocsManager") as mock_docs_mgr, \
-         patch("modules.connectors_manager.RecursiveCharacterTextSplitter") as mock_splitter, \
-         patch("modules.connectors_manager.FAISS") as mock_faiss:
+         patch("modules.connectors_manager.StructuredChunker") as mock_splitter, \
+         patch("modules.connectors_manager.IndexStore"):
 
         mock_prompts_instance = MagicMock()
         mock_prompts_instance.get_prompts.return_value = "test_prompts"
@@ -209,12 +302,21 @@ def _make_connector_manager(mock_config, mock_connector):
         mock_splitter.return_value = mock_splitter_instance
         mock_splitter_instance.split_documents.return_value = ["chunk1"]
 
-        mock_vs = MagicMock()
-        mock_faiss.from_documents.return_value = mock_vs
-
         return ConnectorManager(mock_config)
 
 
+def _accept_all_planner():
+    """Ingestion planner stub that accepts every file without touching the disk."""
+    from modules.ingestion_planner import FileEstimate, IngestionPlan
+
+    planner = MagicMock()
+    planner.select.side_effect = lambda files: ([(file, uploaded, 0) for file, uploaded in files], [])
+    planner.estimate.side_effect = lambda candidates, indexed=None: IngestionPlan(
+        [FileEstimate(file, uploaded, size, None, 1) for file, uploaded, size in candidates], []
+    )
+    return planner
+
+
 def test_connector_manager_init():
     """Test ConnectorManager initialization"""
     mock_config = MagicMock()
@@ -234,7 +336,7 @@ def test_connector_manager_init():
 
 
 def test_connector_manager_build_retriever_no_docs():
-    """_build_retriever returns None when docs list is empty."""
+    """_build_retriever returns None when there are no source files."""
     mock_config = MagicMock()
     mock_config.AI_PERSONA = "Test"
     mock_config.DEBUG = False
@@ -245,11 +347,12 @@ def test_connector_manager_build_retriever_no_docs():
     cm = ConnectorManager.__new__(ConnectorManager)
     cm.config = mock_config
     cm.connector = mock_connector
+    cm.index_store = MagicMock()
 
-    with patch("modules.connectors_manager.FAISS") as mock_faiss:
-        result = cm._build_retriever([])
-        mock_faiss.from_documents.assert_not_called()
-        assert result is None
+    result = cm._build_retriever([])
+    cm.index_store.open.assert_not_called()
+    mock_connector.embeddings.embed_documents.assert_not_called()
+    assert result is None
 
 
 def test_connector_manager_build_retriever_no_embeddings():
@@ -261,11 +364,174 @@ def test_connector_manager_build_retriever_no_embeddings():
     cm = ConnectorManager.__new__(ConnectorManager)
     cm.config = mock_config
     cm.connector = mock_connector
+    cm.index_store = MagicMock()
+
+    result = cm._build_retriever([("doc1.txt", False)])
+    cm.index_store.open.assert_not_called()
+    assert result is None
+
+
+def test_connector_manager_build_retriever_uses_saved_index():
+    """An unchanged index is reused without loading any document."""
+    from modules.index_store import IndexChanges
+
+    mock_config = MagicMock()
+    mock_config.DEBUG = False
+    mock_config.RETRIEVAL_MODE = "hybrid"
+    mock_config.RETRIEVAL_FETCH_K = 20
+    mock_config.MMR_LAMBDA = 0.5
+    mock_config.RETRIEVAL_CACHE_SIZE = 0
+
+    cm = ConnectorManager.__new__(ConnectorManager)
+    cm.config = mock_config
+    cm.connector = MagicMock(embeddings=MagicMock())
+    cm.docs_manager = MagicMock()
+    cm.index_store = MagicMock()
+    cm.index_store.plan.return_value = IndexChanges([], [], [])
+    cm.index_store.dirty = False
+    cm.chunker = StructuredChunker()
+    cm.ingestion_planner = _accept_all_planner()
+
+    result = cm._build_retriever([("a.txt", False)])
+
+    cm.docs_manager.iter_docs.assert_not_called()
+    cm.index_store.add_source.assert_not_called()
+    cm.index_store.save.assert_not_called()
+    assert isinstance(result, KnowledgeRetriever)
+    assert result.index_store is cm.index_store
+
 
-    with patch("modules.connectors_manager.FAISS") as mock_faiss:
-        result = cm._build_retriever(["doc1"])
-        mock_faiss.from_documents.assert_not_called()
-        assert result is None
+def test_connector_manager_build_retriever_only_reindexes_changes():
+    """Only added/modified files are loaded; deleted ones are removed from the index."""
+    from modules.index_store import IndexChanges
+
+    mock_config = MagicMock()
+    mock_config.DEBUG = False
+
+    cm = ConnectorManager.__new__(ConnectorManager)
+    cm.config = mock_config
+    cm.connector = MagicMock(embeddings=MagicMock())
+    cm.docs_manager = MagicMock()
+    cm.docs_manager.iter_docs.side_effect = lambda files: ((file, ["doc"]) for file, _ in files)
+    cm.index_store = MagicMock()
+    cm.index_store.plan.return_value = IndexChanges(["new.txt"], ["edited.txt"], ["/gone.txt"])
+    cm.index_store.dirty = True
+    cm.ingestion_planner = _accept_all_planner()
+    mock_config.INGEST_BATCH_SIZE = 256
+    mock_config.CHUNK_DEDUP_THRESHOLD = 0.9
+    mock_config.RETRIEVAL_MODE = "hybrid"
+    mock_config.RETRIEVAL_FETCH_K = 20
+    mock_config.MMR_LAMBDA = 0.5
+    mock_config.RETRIEVAL_CACHE_SIZE = 0
+
+    cm.chunker = MagicMock()
+    cm._build_retriever([("new.txt", True), ("edited.txt", False), ("same.txt", False)])
+
+    loaded = cm.docs_manager.iter_docs.call_args.args[0]
+    assert loaded == [("new.txt", True), ("edited.txt", False)]
+    cm.index_store.remove_sources.assert_called_once_with(["/gone.txt"])
+    started = [c.args[0] for c in cm.index_store.start_source.call_args_list]
+    assert started == ["new.txt", "edited.txt"]
+    cm.index_store.save.assert_called_once()
+
+
+def test_connector_manager_index_files_enables_rag():
+    """index_files adds uploads to the live index and enables RAG when no index existed."""
+    import tempfile
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from modules.index_store import IndexStore
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        upload = os.path.join(temp_dir, "notes.txt")
+        with open(upload, "w", encoding="utf-8") as fh:
+            fh.write("uploaded notes")
+
+        mock_config = MagicMock()
+        mock_config.DEBUG = False
+        mock_config.LLM_TYPE = "gemini"
+        mock_config.EMBEDDINGS_AI_MODEL = "emb-model"
+        mock_config.INGEST_BATCH_SIZE = 256
+        mock_config.CHUNK_DEDUP_THRESHOLD = 0.9
+        mock_config.RETRIEVAL_MODE = "hybrid"
+        mock_config.RETRIEVAL_FETCH_K = 20
+        mock_config.MMR_LAMBDA = 0.5
+
+        cm = ConnectorManager.__new__(ConnectorManager)
+        cm.config = mock_config
+        cm.connector = MagicMock(embeddings=DeterministicFakeEmbedding(size=8))
+        cm.docs_manager = MagicMock()
+        cm.docs_manager.iter_docs.side_effect = lambda files: (
+            (file, [Document(page_content="uploaded notes")]) for file, _ in files
+        )
+        cm.index_store = IndexStore(os.path.join(temp_dir, "store"), cm.connector.embeddings)
+        cm.chunker = StructuredChunker()
+        cm.ingestion_planner = IngestionPlanner([], [".png"])
+        cm._index_lock = threading.Lock()
+        cm.retriever = None
+        cm.rag_agent = RAGAgent(MagicMock(), None)
+
+        result = cm.index_files([(upload, True)])
+
+        assert result.chunks == 1
+        assert cm.retriever is not None
+        assert cm.rag_agent.retriever is cm.retriever
+        assert cm.index_store.vector_store.index.ntotal == 1
+        assert os.path.exists(os.path.join(temp_dir, "store", "manifest.json"))
+
+        unsupported = os.path.join(temp_dir, "map.png")
+        with open(unsupported, "w", encoding="utf-8") as fh:
+            fh.write("{}")
+        skipped = cm.index_files([(unsupported, True)]).skipped
+        assert [(item.file, item.reason) for item in skipped] == [(unsupported, "type")]
+
+
+def test_connector_manager_only_estimates_changed_files():
+    """Unchanged files are diffed by fingerprint and never estimated or hashed again."""
+    import tempfile
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from modules.index_store import IndexStore
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for name in ("a.txt", "b.txt"):
+            paths.append(os.path.join(temp_dir, name))
+            with open(paths[-1], "w", encoding="utf-8") as fh:
+                fh.write(f"same size {name}")
+
+        mock_config = MagicMock()
+        mock_config.DEBUG = False
+        mock_config.INGEST_BATCH_SIZE = 256
+        mock_config.CHUNK_DEDUP_THRESHOLD = 0
+        mock_config.RETRIEVAL_MODE = "vector"
+        mock_config.RETRIEVAL_FETCH_K = 20
+        mock_config.MMR_LAMBDA = 0.5
+        mock_config.RETRIEVAL_CACHE_SIZE = 0
+
+        cm = ConnectorManager.__new__(ConnectorManager)
+        cm.config = mock_config
+        cm.connector = MagicMock(embeddings=DeterministicFakeEmbedding(size=8))
+        cm.docs_manager = MagicMock()
+        cm.docs_manager.iter_docs.side_effect = lambda files: (
+            (file, [Document(page_content=os.path.basename(file))]) for file, _ in files
+        )
+        cm.index_store = IndexStore(os.path.join(temp_dir, "store"), cm.connector.embeddings)
+        cm.chunker = StructuredChunker()
+        cm.ingestion_planner = IngestionPlanner([], [".png"])
+        cm._index_settings = lambda: {"embeddings": {"provider": "t", "model": "t"}}
+        files = [(path, False) for path in paths]
+        cm._build_retriever(files)
+
+        with open(paths[1], "a", encoding="utf-8") as fh:
+            fh.write(" edited")
+        with patch.object(cm.ingestion_planner, "estimate", wraps=cm.ingestion_planner.estimate) as estimate, \
+             patch("modules.ingestion_planner.file_sha256") as hashed:
+            cm._build_retriever(files)
+
+        assert estimate.call_args.args[0] == [(paths[1], False, os.path.getsize(paths[1]))]
+        hashed.assert_not_called()
+        assert cm.docs_manager.iter_docs.call_args.args[0] == [(paths[1], False)]
 
 
 def test_connector_manager_get_connector_unknown_type():
@@ -289,6 +555,15 @@ def test_connector_manager_anthropic_no_rag():
     mock_config.LLM_TYPE = "anthropic"
     mock_config.AI_PERSONA = "Test"
     mock_config.DEBUG = False
+    mock_config.RETRIEVAL_CACHE_SIZE = 0
+    mock_config.CHUNK_STRATEGY = "tokens"
+    mock_config.CHUNK_SIZE = 256
+    mock_config.CHUNK_OVERLAP = 32
+    mock_config.CHUNK_SETTINGS_BY_TYPE = ""
+    mock_config.CONTEXT_TOKEN_BUDGET = None
+    mock_config.ROUTER_CONFIDENCE_THRESHOLD = 1.0
+    mock_config.ROUTING_CACHE_SIZE = 0
+    mock_config.SPECULATIVE_RETRIEVAL = False
 
     mock_connector = MagicMock()
     mock_connector.embeddings = None
@@ -296,7 +571,7 @@ def test_connector_manager_anthropic_no_rag():
     with patch("modules.connectors_manager.ConnectorManager.get_connector", return_value=mock_connector), \
          patch("modules.prompts_manager.PromptsManager") as mock_prompts_mgr, \
          patch("modules.docs_manager.DocsManager") as mock_docs_mgr, \
-         patch("modules.connectors_manager.FAISS") as mock_faiss:
+         patch("modules.connectors_manager.IndexStore") as mock_index_store:
 
         mock_prompts_instance = MagicMock()
         mock_prompts_instance.get_prompts.return_value = "test_prompts"
@@ -310,7 +585,7 @@ def test_connector_manager_anthropic_no_rag():
         cm = ConnectorManager(mock_config)
 
     assert cm.retriever is None
-    mock_faiss.from_documents.assert_not_called()
+    mock_index_store.return_value.add_source.assert_not_called()
 
 
 def test_connector_manager_supported_types():
@@ -335,6 +610,86 @@ def test_connector_manager_supported_types():
             assert mock_cls.called, f"{class_name} was not instantiated for LLM_TYPE={llm_type}"
 
 
+def test_build_analyzer_llm_limits_output_and_time():
+    """The routing model is built per ANALYZER_LLM_TYPE with a few output tokens and a short timeout."""
+    from modules.connectors_manager import build_analyzer_llm
+
+    mock_config = MagicMock()
+    mock_config.ANALYZER_AI_API_KEY = "key"
+    mock_config.ANALYZER_AI_BASE_URL = None
+    mock_config.ANALYZER_AI_MODEL = "small-model"
+    mock_config.ANALYZER_MAX_TOKENS = 2
+    mock_config.ANALYZER_TIMEOUT = 3.0
+
+    mock_config.ANALYZER_LLM_TYPE = "ollama"
+    ollama = build_analyzer_llm(mock_config)
+    assert (ollama.model, ollama.num_predict, ollama.timeout, ollama.temperature) == ("small-model", 2, 3, 0.0)
+
+    mock_config.ANALYZER_LLM_TYPE = "anthropic"
+    anthropic = build_analyzer_llm(mock_config)
+    assert (anthropic.model, anthropic.max_tokens, anthropic.timeout) == ("small-model", 2, 3.0)
+
+    mock_config.ANALYZER_LLM_TYPE = "unknown"
+    with pytest.raises(ValueError):
+        build_analyzer_llm(mock_config)
+
+
+def test_gemini_analyzer_llm_keeps_thinking_out_of_the_token_limit():
+    """Thinking is off where Gemini allows it; models that must think get room for it."""
+    from modules.connectors.gemini_connector import build_analyzer_llm
+
+    flash = build_analyzer_llm("key", "gemini-2.5-flash", 3, 2.0)
+    assert (flash.thinking_budget, flash.max_output_tokens) == (0, 3)
+
+    pro = build_analyzer_llm("key", "gemini-2.5-pro", 3, 2.0)
+    assert pro.thinking_budget == 128
+    assert pro.max_output_tokens > 128 + 3
+
+    assert build_analyzer_llm("key", "gemini-3-pro-preview", 3, 2.0).thinking_level == "low"
+
+    lite = build_analyzer_llm("key", "gemini-2.0-flash-lite", 3, 2.0)
+    assert (lite.thinking_budget, lite.max_output_tokens) == (None, 3)
+
+
+def test_prompt_analyzer_agent_logs_empty_llm_answer(capsys):
+    """An empty analyzer answer falls back to the heuristic and says so in debug output."""
+    from langchain_core.messages import AIMessage
+
+    llm = MagicMock()
+    llm.invoke.return_value = AIMessage(content="")
+    agent = PromptAnalyzerAgent(llm, "{QUESTION}", debug=True)
+
+    assert agent._ask_llm("What does the rulebook say about grappling?") is None
+    assert "empty answer" in capsys.readouterr().out
+
+
+def test_anthropic_model_drops_whitespace_stop_sequences():
+    from modules.connectors.anthropic_connector import build_analyzer_llm
+
+    with patch("modules.connectors.anthropic_connector.anthropic_sdk.Anthropic") as mock_client:
+        mock_client.return_value.messages.create.return_value = MagicMock(content=[MagicMock(text="rag")])
+        model = build_analyzer_llm("key", "small-model", 3, 2.0)
+        assert model.invoke("question", stop=["\n", "."]).content == "rag"
+
+    mock_client.assert_called_once_with(api_key="key", timeout=2.0, max_retries=0)
+    create_kwargs = mock_client.return_value.messages.create.call_args.kwargs
+    assert create_kwargs["max_tokens"] == 3
+    assert create_kwargs["stop_sequences"] == ["."]
+
+
+def test_connector_manager_rules_mode_skips_analyzer_llm():
+    """ROUTING_MODE=rules routes without an analyzer LLM, using the rules of every bundled language."""
+    mock_config = MagicMock()
+    mock_config.AI_PERSONA = "Test"
+    mock_config.DEBUG = False
+    mock_config.ROUTING_MODE = "rules"
+
+    cm = _make_connector_manager(mock_config, MagicMock())
+    assert cm.prompt_analyzer.llm is None
+    assert cm.prompt_analyzer.decide("Onde está a regra de furtividade no livro?") == RoutingDecision.RAG
+    assert cm.prompt_analyzer.decide("Olá, tudo bem?") == RoutingDecision.SIMPLE
+
+
 def test_connector_manager_call_routes_to_rag():
     """call() delegates to RAGAgent when analyzer returns RAG."""
     mock_config = MagicMock()
@@ -377,3 +732,180 @@ def test_connector_manager_call_routes_to_simple():
     assert result == "simple answer"
     cm.simple_agent.answer.assert_called_once_with("hello there")
     cm.rag_agent.answer.assert_not_called()
+
+
+def test_connector_manager_speculative_retrieval():
+    """Retrieval runs while the analyzer LLM decides; SIMPLE discards it, a local decision skips it."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    mock_config = MagicMock()
+    mock_config.AI_PERSONA = "Test"
+    mock_config.DEBUG = False
+
+    cm = _make_connector_manager(mock_config, MagicMock())
+    cm._speculation_pool = ThreadPoolExecutor(max_workers=2)
+    retrieving = threading.Event()
+    retriever = MagicMock()
+    retriever.invoke.side_effect = lambda question: retrieving.set() or ["doc"]
+    document_chain = MagicMock()
+    document_chain.invoke.return_value = "rag answer"
+    cm.rag_agent = RAGAgent(document_chain, retriever)
+    cm.simple_agent = MagicMock()
+    cm.simple_agent.answer.return_value = "simple answer"
+    analyzer_llm = MagicMock()
+    # The analyzer only answers once retrieval has started, which it must not wait for.
+    analyzer_llm.invoke.side_effect = lambda prompt: "rag" if retrieving.wait(5) else "simple"
+    cm.prompt_analyzer = PromptAnalyzerAgent(analyzer_llm, "{QUESTION}")
+
+    assert cm.call("what about dragons") == "rag answer"
+    retriever.invoke.assert_called_once_with("what about dragons")
+    assert document_chain.invoke.call_args.args[0]["context"] == ["doc"]
+    assert (cm.speculations, cm.speculations_used) == (1, 1)
+
+    retrieving.clear()
+    analyzer_llm.invoke.side_effect = lambda prompt: retrieving.wait(5) and "simple"
+    assert cm.call("how are you") == "simple answer"
+    assert retriever.invoke.call_count == 2
+    assert (cm.speculations, cm.speculations_used) == (2, 1)
+
+    cm.prompt_analyzer.router = MagicMock()
+    cm.prompt_analyzer.router.predict.return_value = ("simple", 0.99)
+    assert cm.call("hello") == "simple answer"
+    assert retriever.invoke.call_count == 2
+    cm._speculation_pool.shutdown()
+
+
+# Questions that are not in router_examples.txt.
+_HELD_OUT = [
+    ("rag", "Summarize chapter 3"),
+    ("rag", "According to the notes, what is XR-220?"),
+    ("rag", "Resuma o capítulo 5 do livro"),
+    ("simple", "What's the weather like on Mars?"),
+    ("simple", "Qual é a sua comida favorita?"),
+]
+
+
+def test_default_routing_of_questions_outside_the_router_examples():
+    """With the default threshold the uncalibrated router stays off and unseen questions follow the rules."""
+    from modules.configs import load_all_texts
+    from modules.local_router import load_examples
+    from modules.prompts_manager import PromptsManager
+    from modules.routing_rules import RoutingRules
+
+    trained = {question for _, question in load_examples(PromptsManager.prompt_path("router_examples.txt"))}
+    assert not trained.intersection(question for _, question in _HELD_OUT)
+
+    cm = ConnectorManager.__new__(ConnectorManager)
+    cm.config = MagicMock(ROUTER_CONFIDENCE_THRESHOLD=1.0)
+    assert cm._load_router() is None
+
+    rules = RoutingRules.from_texts(load_all_texts().values())
+    agent = PromptAnalyzerAgent(None, "{QUESTION}", rules=rules)
+    for label, question in _HELD_OUT:
+        assert agent.decide(question).value == label, question
+
+
+def test_router_below_threshold_defers_to_the_analyzer_llm():
+    """An unsure router decision on an unseen question is left to the analyzer LLM."""
+    llm = MagicMock()
+    llm.invoke.return_value = "rag"
+    router = MagicMock()
+    router.predict.return_value = ("simple", 0.83)
+    agent = PromptAnalyzerAgent(llm, "{QUESTION}", router=router, router_threshold=0.9)
+
+    assert agent.decide("Summarize chapter 3") == RoutingDecision.RAG
+    llm.invoke.assert_called_once()
+
+
+def test_connector_manager_call_with_scope_skips_analyzer():
+    """A scoped question always goes to RAGAgent without asking the analyzer."""
+    from modules.retrieval import RetrievalScope
+
+    mock_config = MagicMock()
+    mock_config.AI_PERSONA = "Test"
+    mock_config.DEBUG = False
+
+    cm = _make_connector_manager(mock_config, MagicMock())
+    cm.prompt_analyzer = MagicMock()
+    cm.rag_agent = MagicMock()
+    cm.rag_agent.answer.return_value = "scoped answer"
+    scope = RetrievalScope(folder="/kb/manuals")
+
+    assert cm.call("hello there", scope=scope) == "scoped answer"
+    cm.rag_agent.answer.assert_called_once_with("hello there", scope=scope)
+    cm.prompt_analyzer.decide.assert_not_called()
+
+
+def test_connector_manager_resolves_relative_scope_folders_from_the_knowledge_dir():
+    """A relative folder scope names a folder of the knowledge base, wherever the app was started."""
+    from pathlib import Path
+    from modules.retrieval import RetrievalScope
+
+    cm = ConnectorManager.__new__(ConnectorManager)
+    cm.docs_manager = MagicMock()
+    cm.docs_manager._knowledge_dir.return_value = Path("/repo/knowledge")
+    cm.rag_agent = MagicMock()
+
+    cm.call("hello there", scope=RetrievalScope(folder="manuals"))
+    cm.call("hello there", scope=RetrievalScope(folder="/elsewhere"))
+
+    scopes = [call.kwargs["scope"] for call in cm.rag_agent.answer.call_args_list]
+    assert scopes == [
+        RetrievalScope(folder=str(Path("/repo/knowledge") / "manuals")),
+        RetrievalScope(folder="/elsewhere"),
+    ]
+
+
+def test_connector_manager_sync_paths_updates_only_affected_files():
+    """Watcher batches re-index changed files, skip unchanged ones and drop deleted ones."""
+    import tempfile
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from modules.index_store import IndexStore, source_key
+    from modules.index_watcher import RESCAN
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for name in ("a.txt", "b.txt"):
+            paths.append(os.path.join(temp_dir, name))
+            with open(paths[-1], "w", encoding="utf-8") as fh:
+                fh.write(name)
+
+        mock_config = MagicMock()
+        mock_config.DEBUG = False
+        mock_config.LLM_TYPE = "gemini"
+        mock_config.EMBEDDINGS_AI_MODEL = "emb-model"
+        mock_config.INGEST_BATCH_SIZE = 256
+        mock_config.CHUNK_DEDUP_THRESHOLD = 0.9
+        mock_config.RETRIEVAL_MODE = "hybrid"
+        mock_config.RETRIEVAL_FETCH_K = 20
+        mock_config.MMR_LAMBDA = 0.5
+
+        cm = ConnectorManager.__new__(ConnectorManager)
+        cm.config = mock_config
+        cm.connector = MagicMock(embeddings=DeterministicFakeEmbedding(size=8))
+        cm.docs_manager = MagicMock()
+        cm.docs_manager.classify.side_effect = lambda path: (path, False)
+        cm.docs_manager.iter_files.side_effect = lambda: iter([(path, False) for path in paths if os.path.exists(path)])
+        cm.docs_manager.iter_docs.side_effect = lambda files: (
+            (file, [Document(page_content=os.path.basename(file))]) for file, _ in files
+        )
+        cm.index_store = IndexStore(os.path.join(temp_dir, "store"), cm.connector.embeddings)
+        cm.chunker = StructuredChunker()
+        cm.ingestion_planner = IngestionPlanner([], [".png"])
+        cm._index_lock = threading.Lock()
+        cm.retriever = None
+        cm.rag_agent = RAGAgent(MagicMock(), None)
+
+        assert cm.sync_paths(set(paths)).files == 2
+        assert cm.sync_paths({paths[0]}).files == 0
+
+        os.remove(paths[1])
+        cm.sync_paths({paths[1]})
+        assert set(cm.index_store.manifest["files"]) == {source_key(paths[0])}
+        assert cm.index_store.vector_store.index.ntotal == 1
+
+        os.remove(paths[0])
+        cm.sync_paths(RESCAN)
+        assert cm.index_store.manifest["files"] == {}
@@ -0,0 +1,73 @@
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from langchain_core.documents import Document
+
+from modules.chunking import ChunkSettings, StructuredChunker, estimate_tokens
+from modules.context_packer import DEFAULT_CONTEXT_TOKEN_BUDGETS, ContextPacker
+
+_TEXT = "\n\n".join(f"Rule {i}: roll {i} dice against the dragon." for i in range(80))
+
+
+def _chunks(size=60, overlap=20, source="rules.txt"):
+    return StructuredChunker(ChunkSettings("tokens", size, overlap)).split_documents(
+        [Document(page_content=_TEXT, metadata={"source": source})]
+    )
+
+
+def test_packer_stitches_neighbours_and_strips_overlap():
+    """Overlapping neighbours become one passage equal to the original text, ranked like its best chunk."""
+    chunks = _chunks()
+    other = Document(page_content="A different file about dice.", metadata={"source": "dice.txt"})
+    result = ContextPacker(token_budget=0).pack([chunks[4], other, chunks[3], chunks[5]])
+
+    first = chunks[3].metadata["start_index"]
+    last = chunks[5].metadata["start_index"] + len(chunks[5].page_content)
+    assert [doc.page_content for doc in result.documents] == [_TEXT[first:last], other.page_content]
+    assert result.documents[0].metadata == chunks[4].metadata
+    assert result.tokens_saved > 0
+    assert result.tokens_out == estimate_tokens("\n\n".join(doc.page_content for doc in result.documents))
+
+
+def test_packer_merges_overlapping_chunks_without_offsets():
+    """Chunks indexed before offsets were recorded are merged by their overlapping text."""
+    chunks = _chunks()
+    for chunk in chunks:
+        del chunk.metadata["start_index"]
+    result = ContextPacker(token_budget=0).pack([chunks[7], chunks[6]])
+    assert len(result.documents) == 1
+    assert result.documents[0].page_content.startswith(chunks[6].page_content)
+    assert result.documents[0].page_content.endswith(chunks[7].page_content)
+
+
+def test_packer_drops_repeated_paragraphs():
+    notice = "All rights reserved by the publisher of this game."
+    docs = [
+        Document(page_content=f"Dragons sleep.\n\n{notice}", metadata={"source": "a.txt"}),
+        Document(page_content=f"{notice}\n\nElves sing.", metadata={"source": "b.txt"}),
+        Document(page_content=notice.upper(), metadata={"source": "c.txt"}),
+    ]
+    result = ContextPacker(token_budget=0).pack(docs)
+    assert [doc.page_content for doc in result.documents] == [f"Dragons sleep.\n\n{notice}", "Elves sing."]
+
+
+def test_packer_fills_budget_and_cuts_the_last_passage():
+    chunks = _chunks(size=60, overlap=0)
+    budget = estimate_tokens(chunks[0].page_content) + 40
+    packer = ContextPacker(token_budget=budget)
+    result = packer.pack([chunks[0], chunks[10], chunks[15]])
+
+    assert len(result.documents) == 2
+    assert result.documents[1].page_content.endswith(" …")
+    assert result.tokens_out <= budget + 1
+    assert packer.stats()["requests"] == 1
+    assert packer.stats()["tokens_saved"] == result.tokens_saved
+
+
+def test_packer_budget_defaults_per_provider():
+    assert ContextPacker("ollama").token_budget == DEFAULT_CONTEXT_TOKEN_BUDGETS["ollama"]
+    assert ContextPacker("gemini", token_budget=0).token_budget == 0
+    assert ContextPacker("unknown").token_budget > 0
@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+from unittest.mock import MagicMock
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.docs_manager import DocsManager, _load_with_fallback, _resolve_workers
+
+
+def _mock_docs_config(knowledge_path, workers=1):
+    mock_config = MagicMock()
+    mock_config.LOCAL_KNOWLEDGE_PATH = knowledge_path
+    mock_config.DOCS_LOADER_WORKERS = workers
+    mock_config.DEBUG = False
+    mock_config.texts = {
+        "file": "File",
+        "loaded.successfully": "loaded successfully",
+        "file.loading.error": "Error loading file",
+    }
+    return mock_config
+
+
+def _make_knowledge_dir(temp_dir, count):
+    knowledge_dir = os.path.join(temp_dir, "kb")
+    os.makedirs(knowledge_dir)
+    for i in range(count):
+        with open(os.path.join(knowledge_dir, f"note{i}.txt"), "w", encoding="utf-8") as fh:
+            fh.write(f"note number {i}")
+    with open(os.path.join(knowledge_dir, ".gitkeep"), "w") as fh:
+        fh.write("")
+    return knowledge_dir
+
+
+def test_resolve_workers():
+    """0 means one worker per CPU; invalid values fall back to sequential loading."""
+    assert _resolve_workers(4) == 4
+    assert _resolve_workers("2") == 2
+    assert _resolve_workers(0) == (os.cpu_count() or 1)
+    assert _resolve_workers(-3) == 1
+    assert _resolve_workers("many") == 1
+
+
+def test_load_with_fallback_uses_unstructured_when_specialized_fails():
+    """A failing specialized loader is recorded and the unstructured fallback is tried."""
+    failing_loader = MagicMock(side_effect=RuntimeError("broken"))
+    docs, attempts = _load_with_fallback("/does/not/exist.xyz", failing_loader)
+    assert docs == []
+    assert [fallback for fallback, _ in attempts] == [False, True]
+    assert all(error is not None for _, error in attempts)
+
+
+def test_iter_files_skips_extensionless_dotfiles():
+    """iter_files lists knowledge files without loading them and skips .gitkeep."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            knowledge_dir = _make_knowledge_dir(temp_dir, 3)
+            files = list(DocsManager(_mock_docs_config(knowledge_dir)).iter_files())
+            assert sorted(f.name for f, _ in files) == ["note0.txt", "note1.txt", "note2.txt"]
+            assert all(uploaded is False for _, uploaded in files)
+        finally:
+            os.chdir(original_cwd)
+
+
+def test_classify_applies_iter_files_rules():
+    """classify maps watcher paths to (file, uploaded), including files already deleted."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            knowledge_dir = _make_knowledge_dir(temp_dir, 1)
+            manager = DocsManager(_mock_docs_config(knowledge_dir))
+
+            assert manager.classify(os.path.join(knowledge_dir, "note0.txt"))[1] is False
+            assert manager.classify(os.path.join(knowledge_dir, "removed.txt"))[1] is False
+            assert manager.classify(os.path.join("uploads", "sheet.csv"))[1] is True
+            assert manager.classify(os.path.join(knowledge_dir, ".gitkeep")) is None
+            assert manager.classify(os.path.join(temp_dir, "elsewhere.txt")) is None
+        finally:
+            os.chdir(original_cwd)
+
+
+def test_iter_docs_parallel_matches_sequential():
+    """The process-pool loader returns the same documents as sequential loading."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            knowledge_dir = _make_knowledge_dir(temp_dir, 6)
+            sequential = DocsManager(_mock_docs_config(knowledge_dir, workers=1))
+            parallel = DocsManager(_mock_docs_config(knowledge_dir, workers=2))
+
+            expected = sorted(d.page_content for d in sequential.getDocs())
+            streamed = list(parallel.iter_docs(parallel.iter_files()))
+
+            assert len(streamed) == 6
+            assert sorted(d.page_content for _, docs in streamed for d in docs) == expected
+        finally:
+            os.chdir(original_cwd)
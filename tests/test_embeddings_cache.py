@@ -0,0 +1,146 @@
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from modules.embeddings_cache import CachedEmbeddings, QueryCachedEmbeddings
+
+
+class _CountingEmbeddings(Embeddings):
+    """Deterministic fake embeddings that record every embedded document and query text."""
+
+    def __init__(self):
+        self.fake = DeterministicFakeEmbedding(size=8)
+        self.embedded = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self.fake.embed_query(text)
+
+
+def test_cached_embeddings_serves_repeated_texts_from_disk():
+    """Texts embedded once are not sent to the provider again, even by a new instance."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cache.sqlite")
+        inner = _CountingEmbeddings()
+        cache = CachedEmbeddings(inner, path, provider="gemini", model="m1")
+
+        first = cache.embed_documents(["a", "b", "a"])
+        assert inner.embedded == ["a", "b"]
+        assert first[0] == first[2]
+        cache.close()
+
+        inner = _CountingEmbeddings()
+        cache = CachedEmbeddings(inner, path, provider="gemini", model="m1")
+        second = cache.embed_documents(["b", "c", "a"])
+        assert inner.embedded == ["c"]
+        assert second[0] == pytest.approx(first[1], rel=1e-6)
+        assert second[2] == pytest.approx(first[0], rel=1e-6)
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["entries"] == 3
+        assert stats["bytes"] > 0
+        cache.close()
+
+
+def test_cached_embeddings_keyed_by_provider_and_model():
+    """The same text under another embeddings model is a cache miss."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cache.sqlite")
+        CachedEmbeddings(_CountingEmbeddings(), path, provider="gemini", model="m1").embed_documents(["a"])
+
+        inner = _CountingEmbeddings()
+        CachedEmbeddings(inner, path, provider="gemini", model="m2").embed_documents(["a"])
+        assert inner.embedded == ["a"]
+
+        inner = _CountingEmbeddings()
+        CachedEmbeddings(inner, path, provider="openai", model="m1").embed_documents(["a"])
+        assert inner.embedded == ["a"]
+
+
+def test_cached_embeddings_lru_eviction():
+    """Past max_entries the least recently used vectors are evicted."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inner = _CountingEmbeddings()
+        cache = CachedEmbeddings(inner, os.path.join(temp_dir, "cache.sqlite"), "gemini", "m1", max_entries=2)
+
+        cache.embed_documents(["a"])
+        time.sleep(0.001)
+        cache.embed_documents(["b"])
+        time.sleep(0.001)
+        cache.embed_documents(["a"])  # refresh "a"
+        time.sleep(0.001)
+        cache.embed_documents(["c"])  # evicts "b"
+        assert cache.stats()["entries"] == 2
+
+        inner.embedded.clear()
+        cache.embed_documents(["a", "b", "c"])
+        assert inner.embedded == ["b"]
+        cache.close()
+
+
+def test_cached_embeddings_query_passthrough():
+    """embed_query is not cached at this layer."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inner = _CountingEmbeddings()
+        cache = CachedEmbeddings(inner, os.path.join(temp_dir, "cache.sqlite"), "gemini", "m1")
+        assert cache.embed_query("q") == inner.embed_query("q")
+        assert cache.stats()["entries"] == 0
+        cache.close()
+
+
+def test_query_cache_second_identical_query_makes_no_call():
+    """A repeated query is answered from memory without calling the provider."""
+    inner = _CountingEmbeddings()
+    cache = QueryCachedEmbeddings(inner, "gemini", "m1")
+    first = cache.embed_query("Introduce yourself.")
+    second = cache.embed_query("Introduce yourself.")
+    assert second == first
+    assert inner.queries == ["Introduce yourself."]
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+    cache.embed_documents(["Introduce yourself."])
+    assert inner.embedded == ["Introduce yourself."]
+
+
+def test_query_cache_lru_bound():
+    """Past max_entries the least recently used query is embedded again."""
+    inner = _CountingEmbeddings()
+    cache = QueryCachedEmbeddings(inner, "gemini", "m1", max_entries=2)
+    for text in ["a", "b", "a", "c", "a", "b"]:
+        cache.embed_query(text)
+    assert inner.queries == ["a", "b", "c", "b"]
+
+
+def test_query_cache_persisted_per_model():
+    """Persisted query vectors are reused after a restart, but only for the same model."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cache.sqlite")
+        cache = QueryCachedEmbeddings(_CountingEmbeddings(), "gemini", "m1", path=path)
+        vector = cache.embed_query("Goodbye.")
+        cache.close()
+
+        inner = _CountingEmbeddings()
+        cache = QueryCachedEmbeddings(inner, "gemini", "m1", path=path)
+        assert cache.embed_query("Goodbye.") == pytest.approx(vector, rel=1e-6)
+        assert inner.queries == []
+        cache.close()
+
+        inner = _CountingEmbeddings()
+        cache = QueryCachedEmbeddings(inner, "gemini", "m2", path=path)
+        cache.embed_query("Goodbye.")
+        assert inner.queries == ["Goodbye."]
+        cache.close()
@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from modules.embeddings_pipeline import (
+    BatchedEmbeddings,
+    RateLimitExceeded,
+    TokenBucket,
+    is_rate_limit_error,
+)
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class _RecordingEmbeddings(Embeddings):
+    """Fake provider that records batch sizes and peak concurrency."""
+
+    def __init__(self, fail_first=0, delay=0.0):
+        self.fake = DeterministicFakeEmbedding(size=4)
+        self.batches = []
+        self.fail_first = fail_first
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            if self.fail_first:
+                self.fail_first -= 1
+                raise _HTTPError(429)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+            self.batches.append(len(texts))
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.fake.embed_query(text)
+
+
+def test_is_rate_limit_error():
+    """429 status codes and provider rate-limit exceptions are recognised."""
+    assert is_rate_limit_error(_HTTPError(429))
+    assert is_rate_limit_error(Exception("Error code: 429 - quota"))
+    assert is_rate_limit_error(type("ResourceExhausted", (Exception,), {})("quota"))
+    assert not is_rate_limit_error(_HTTPError(500))
+    assert not is_rate_limit_error(ValueError("bad input"))
+
+
+def test_batched_embeddings_preserves_order_and_batches():
+    """Texts are split into batch_size requests and results keep input order."""
+    inner = _RecordingEmbeddings()
+    batched = BatchedEmbeddings(inner, provider="test-order", batch_size=3, max_in_flight=2, requests_per_minute=0)
+    texts = [f"t{i}" for i in range(8)]
+
+    vectors = batched.embed_documents(texts)
+
+    assert sorted(inner.batches) == [2, 3, 3]
+    assert vectors == DeterministicFakeEmbedding(size=4).embed_documents(texts)
+    stats = batched.stats()
+    assert stats["texts"] == 8
+    assert stats["requests"] == 3
+    assert stats["texts_per_second"] > 0
+
+
+def test_batched_embeddings_limits_in_flight_requests():
+    """No more than max_in_flight batches are sent concurrently."""
+    inner = _RecordingEmbeddings(delay=0.02)
+    batched = BatchedEmbeddings(inner, provider="test-flight", batch_size=1, max_in_flight=3, requests_per_minute=0)
+    batched.embed_documents([f"t{i}" for i in range(12)])
+    assert 1 < inner.peak <= 3
+
+
+def test_batched_embeddings_backs_off_on_429():
+    """Rate-limited requests are retried with backoff and counted."""
+    sleeps = []
+    inner = _RecordingEmbeddings(fail_first=2)
+    batched = BatchedEmbeddings(
+        inner, provider="test-429", batch_size=10, max_in_flight=1, requests_per_minute=0, sleep=sleeps.append
+    )
+
+    vectors = batched.embed_documents(["a", "b"])
+
+    assert len(vectors) == 2
+    assert len(sleeps) == 2
+    assert sleeps[1] > sleeps[0] * 0.5
+    assert batched.stats()["retries"] == 2
+
+
+def test_batched_embeddings_gives_up_after_max_retries():
+    """Persistent 429s raise RateLimitExceeded instead of retrying forever."""
+    inner = _RecordingEmbeddings(fail_first=10)
+    batched = BatchedEmbeddings(
+        inner, provider="test-giveup", max_in_flight=1, requests_per_minute=0, max_retries=2, sleep=lambda _: None
+    )
+    try:
+        batched.embed_documents(["a"])
+        assert False, "Should have raised RateLimitExceeded"
+    except RateLimitExceeded:
+        pass
+
+
+def test_token_bucket_paces_requests():
+    """Once the burst is spent, acquire waits 1/rate seconds per token."""
+    now = [0.0]
+    waits = []
+
+    def fake_sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2.0, capacity=2.0, clock=lambda: now[0], sleep=fake_sleep)
+    for _ in range(4):
+        bucket.acquire()
+
+    assert waits == [0.5, 0.5]
+    assert now[0] == 1.0
@@ -0,0 +1,123 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.faiss_index import (
+    INDEX_TYPES,
+    MIN_IVFPQ_VECTORS,
+    QUANTIZATIONS,
+    build_index,
+    choose_index_type,
+    index_quantization,
+    index_type,
+    search_params,
+    supports_remove,
+    vector_bytes,
+)
+from modules.index_benchmark import benchmark, benchmark_mmr
+
+
+def _corpus(count, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    ids = np.arange(count, dtype=np.int64) * 7 + 3
+    return vectors, ids
+
+
+def test_choose_index_type_auto_and_training_minimums():
+    assert choose_index_type("auto", 100) == "flat"
+    assert choose_index_type("auto", 50_000) == "hnsw"
+    assert choose_index_type("auto", 1_000_000) == "ivfpq"
+    assert choose_index_type("ivfpq", 5_000) == "ivf"
+    assert choose_index_type("ivf", 10) == "flat"
+    assert choose_index_type("hnsw", 10) == "hnsw"
+    with pytest.raises(ValueError):
+        choose_index_type("lsh", 10)
+
+
+@pytest.mark.parametrize("kind", INDEX_TYPES)
+def test_build_index_keeps_caller_ids(kind):
+    """Every backend returns the ids it was built with and finds a stored vector."""
+    vectors, ids = _corpus(MIN_IVFPQ_VECTORS if kind == "ivfpq" else 2_000)
+    index = build_index(kind, vectors, ids)
+
+    assert index_type(index) == kind
+    assert index.ntotal == len(ids)
+    _, found = index.search(vectors[:1], 1, params=search_params(index, nprobe=64, ef_search=64))
+    assert found[0][0] == ids[0]
+
+
+@pytest.mark.parametrize("kind", ("flat", "ivf", "hnsw"))
+def test_build_index_quantization_shrinks_vectors(kind):
+    """fp16 halves and SQ8 quarters the vector memory; ids and nearest hits are kept."""
+    vectors, ids = _corpus(2_000)
+    sizes = {}
+    for quantization in QUANTIZATIONS:
+        index = build_index(kind, vectors, ids, quantization=quantization)
+        assert index_type(index) == kind
+        assert index_quantization(index) == quantization
+        _, found = index.search(vectors[:1], 1, params=search_params(index, nprobe=64))
+        assert found[0][0] == ids[0]
+        sizes[quantization] = vector_bytes(index)
+    assert sizes == {"none": 2_000 * 16 * 4, "fp16": 2_000 * 16 * 2, "sq8": 2_000 * 16}
+
+
+def test_ivfpq_ignores_quantization():
+    vectors, ids = _corpus(MIN_IVFPQ_VECTORS)
+    assert index_quantization(build_index("ivfpq", vectors, ids, quantization="sq8")) == "none"
+
+
+def test_search_params_exclude_removed_ids_on_hnsw():
+    vectors, ids = _corpus(500)
+    index = build_index("hnsw", vectors, ids)
+    assert not supports_remove(index)
+
+    _, found = index.search(vectors[:1], 3, params=search_params(index, removed={int(ids[0])}))
+
+    assert ids[0] not in found[0]
+    assert len(found[0]) == 3
+
+
+@pytest.mark.parametrize("kind", ("flat", "ivf", "hnsw"))
+def test_search_params_restrict_to_allowed_ids(kind):
+    vectors, ids = _corpus(2_000)
+    index = build_index(kind, vectors, ids)
+    allowed = ids[1::2]
+
+    _, found = index.search(vectors[:1], 4, params=search_params(index, nprobe=64, allowed=allowed))
+
+    assert set(found[0]) <= set(allowed)
+
+
+def test_benchmark_reports_recall_against_flat():
+    vectors, ids = _corpus(2_000)
+    rows = {row["type"]: row for row in benchmark(vectors, ids, types=("flat", "hnsw", "ivfpq"), queries=20)}
+
+    assert rows["flat"]["recall@4"] == 1.0
+    assert 0.0 < rows["hnsw"]["recall@4"] <= 1.0
+    assert rows["hnsw"]["mean_ms"] > 0
+    assert "skipped" in rows["ivfpq"]
+
+
+def test_benchmark_reports_quantized_memory():
+    vectors, ids = _corpus(1_000)
+    rows = benchmark(vectors, ids, types=("flat",), queries=20, quantizations=QUANTIZATIONS)
+
+    assert [row["quantization"] for row in rows] == list(QUANTIZATIONS)
+    assert rows[2]["bytes"] * 4 == rows[0]["bytes"]
+    assert rows[1]["recall@4"] > 0.9
+
+
+def test_benchmark_mmr_reports_each_pool_size():
+    vectors, _ = _corpus(500)
+    rows = benchmark_mmr(vectors, pool_sizes=(4, 50), queries=10)
+
+    assert [row["pool"] for row in rows] == [4, 50]
+    assert all(row["mean_ms"] > 0 for row in rows)
+    # A pool of k leaves nothing to choose from: MMR returns the plain top k.
+    assert rows[0]["similarity"] == pytest.approx(rows[0]["top_k_similarity"])
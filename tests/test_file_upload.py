@@ -1,6 +1,7 @@
 import os
 import sys
 import tempfile
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 # Add the project root to Python path
@@ -113,3 +114,129 @@ def test_upload_directory_creation():
             assert os.path.isdir(uploads_path), "uploads/ directory should be created by process_uploaded_file"
         finally:
             os.chdir(original_cwd)
+
+
+def test_upload_triggers_live_indexing():
+    """process_uploaded_file hands the copied file to ConnectorManager.index_files."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            with patch("modules.gui_app.Config") as mock_config_cls, \
+                 patch("modules.gui_app.ConnectorManager"), \
+                 patch("modules.gui_app.ttk") as mock_ttk, \
+                 patch("modules.gui_app.tk"), \
+                 patch("modules.gui_app.threading.Thread") as mock_thread, \
+                 patch("shutil.copy2"):
+
+                mock_config_cls.return_value = _mock_gui_config()
+
+                from modules.gui_app import ChatApp
+
+                app = ChatApp(MagicMock())
+                mock_thread.reset_mock()
+                app.process_uploaded_file("/some/path/test.txt")
+
+                mock_thread.assert_called_once()
+                target = mock_thread.call_args.kwargs["target"]
+                args = mock_thread.call_args.kwargs["args"]
+                assert target == app.index_uploaded_file
+                mock_thread.return_value.start.assert_called_once()
+
+                target(*args)
+                app.connector.index_files.assert_called_once()
+                indexed = app.connector.index_files.call_args.args[0]
+                assert [(str(path), uploaded) for path, uploaded in indexed] == [(os.path.join("uploads", "test.txt"), True)]
+        finally:
+            os.chdir(original_cwd)
+
+
+def test_index_uploaded_file_reports_indexing_error():
+    """An indexing failure is shown to the user once Tk runs the scheduled callback."""
+    with patch("modules.gui_app.Config") as mock_config_cls, \
+         patch("modules.gui_app.ConnectorManager"), \
+         patch("modules.gui_app.ttk"), \
+         patch("modules.gui_app.tk"), \
+         patch("modules.gui_app.threading.Thread"):
+
+        mock_config = _mock_gui_config()
+        mock_config.texts["error.file.index"] = "Error indexing the file"
+        mock_config_cls.return_value = mock_config
+
+        from modules.gui_app import ChatApp
+
+        root = MagicMock()
+        app = ChatApp(root)
+        app.display_message = MagicMock()
+        app.connector.index_files.side_effect = RuntimeError("embeddings offline")
+        app.index_uploaded_file(os.path.join("uploads", "notes.txt"))
+
+        callback = root.after.call_args.args[1]
+        callback()
+        app.display_message.assert_called_once_with(
+            "System", "Error indexing the file notes.txt: embeddings offline", is_user=False
+        )
+
+
+def test_index_uploaded_file_reports_skipped_upload():
+    """An upload the ingestion planner skips is reported with the reason instead of as indexed."""
+    from modules.ingestion import IngestionResult
+    from modules.ingestion_planner import SKIP_TYPE, SkippedFile
+
+    with patch("modules.gui_app.Config") as mock_config_cls, \
+         patch("modules.gui_app.ConnectorManager"), \
+         patch("modules.gui_app.ttk"), \
+         patch("modules.gui_app.tk"), \
+         patch("modules.gui_app.threading.Thread"):
+
+        mock_config = _mock_gui_config()
+        mock_config.texts["ui.upload.skipped"] = "Not indexed"
+        mock_config.texts["ui.upload.skipped.type"] = "unsupported file type"
+        mock_config_cls.return_value = mock_config
+
+        from modules.gui_app import ChatApp
+
+        root = MagicMock()
+        app = ChatApp(root)
+        app.display_message = MagicMock()
+        upload = os.path.join("uploads", "stats.json")
+        app.connector.index_files.return_value = IngestionResult(0, 0, skipped=(SkippedFile(upload, SKIP_TYPE, ".json"),))
+        app.index_uploaded_file(upload)
+
+        root.after.call_args.args[1]()
+        app.display_message.assert_called_once_with(
+            "System", "Not indexed: stats.json (unsupported file type: .json)", is_user=False
+        )
+
+
+def test_scope_selector_offers_uploads_and_folders():
+    """The scope selector offers session uploads, the last upload and knowledge subfolders."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, "manuals"))
+        with patch("modules.gui_app.Config") as mock_config_cls, \
+             patch("modules.gui_app.ConnectorManager"), \
+             patch("modules.gui_app.ttk"), \
+             patch("modules.gui_app.tk"):
+
+            mock_config = _mock_gui_config()
+            # Relative to the repo base, not the working directory; DocsManager resolves it.
+            mock_config.LOCAL_KNOWLEDGE_PATH = "knowledge"
+            mock_config_cls.return_value = mock_config
+
+            from modules.gui_app import ChatApp
+            from modules.retrieval import RetrievalScope
+
+            app = ChatApp(MagicMock())
+            app.connector.docs_manager._knowledge_dir.return_value = Path(temp_dir)
+            app.uploaded_files = ["uploads/a.pdf", "uploads/b.txt"]
+            options = app.scope_options()
+
+            assert options["All documents"] is None
+            assert options["Uploaded this session"] == RetrievalScope(sources=("uploads/a.pdf", "uploads/b.txt"))
+            assert options["Last upload: b.txt"] == RetrievalScope(sources=("uploads/b.txt",))
+            assert options["Folder: manuals"] == RetrievalScope(folder=os.path.join(temp_dir, "manuals"))
+
+            app.scope_choice.get.return_value = "Folder: manuals"
+            assert app.selected_scope() == RetrievalScope(folder=os.path.join(temp_dir, "manuals"))
+            app.get_response("what is XR-220", app.selected_scope())
+            app.connector.call.assert_called_with("what is XR-220", scope=options["Folder: manuals"])
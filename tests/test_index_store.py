@@ -0,0 +1,451 @@
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from modules.faiss_index import index_quantization, index_type
+from modules.index_store import IndexStore, chunk_id, file_fingerprint, source_key
+from modules.retrieval import RetrievalScope
+
+_SETTINGS = {
+    "chunker": {"chunk_size": 300, "chunk_overlap": 30},
+    "embeddings": {"provider": "gemini", "model": "emb-model"},
+}
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+class _CountingEmbeddings(Embeddings):
+    """Deterministic fake embeddings that record every embedded document text."""
+
+    def __init__(self):
+        self.fake = DeterministicFakeEmbedding(size=8)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.fake.embed_query(text)
+
+
+def _index(store, files):
+    changes = store.plan(files)
+    store.remove_sources(changes.deleted)
+    for file in changes.added + changes.modified:
+        with open(file, encoding="utf-8") as fh:
+            store.add_source(file, [Document(page_content=line) for line in fh.read().splitlines()])
+    store.save()
+    return changes
+
+
+def test_file_fingerprint_changes_with_content():
+    """file_fingerprint reflects size changes of the source file."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "a.txt")
+        _write(path, "one")
+        before = file_fingerprint(path)
+        _write(path, "one two")
+        assert file_fingerprint(path) != before
+
+
+def test_index_store_round_trip():
+    """A saved index is loaded back and nothing is re-indexed when files are unchanged."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "a.txt")
+        _write(source, "hello\nworld")
+
+        store = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings())
+        store.open(_SETTINGS)
+        changes = _index(store, [source])
+        assert changes.added == [source]
+
+        embeddings = _CountingEmbeddings()
+        reopened = IndexStore(os.path.join(temp_dir, "store"), embeddings)
+        reopened.open(_SETTINGS)
+        assert reopened.plan([source]).count == 0
+        assert embeddings.embedded == []
+        assert reopened.vector_store.similarity_search("hello", k=1)[0].page_content == "hello"
+
+
+def test_index_store_lexical_index_is_saved_and_rebuilt():
+    """The BM25 index follows adds and removals, is saved, and is rebuilt from the docstore if lost."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        keep = os.path.join(temp_dir, "keep.txt")
+        gone = os.path.join(temp_dir, "gone.txt")
+        _write(keep, "the amulet XR-220")
+        _write(gone, "the sword ZK-9")
+        path = os.path.join(temp_dir, "store")
+        store = IndexStore(path, _CountingEmbeddings())
+        store.open(_SETTINGS)
+        _index(store, [keep, gone])
+        version = store.version
+        store.remove_sources([source_key(gone)])
+        assert store.version > version
+        store.save()
+        assert store.search_lexical("ZK-9") == []
+
+        reopened = IndexStore(path, _CountingEmbeddings())
+        reopened.open(_SETTINGS)
+        assert not reopened.dirty
+        assert [d.page_content for d, _ in reopened.search_lexical("xr-220")] == ["the amulet XR-220"]
+
+        os.remove(os.path.join(path, "lexical.json"))
+        rebuilt = IndexStore(path, _CountingEmbeddings())
+        rebuilt.open(_SETTINGS)
+        assert rebuilt.lexical.ids() == set(rebuilt.chunk_ids())
+        assert rebuilt.dirty
+        assert rebuilt.search_lexical("amulet")[0][0].page_content == "the amulet XR-220"
+
+
+def test_index_store_settings_change_rebuilds():
+    """A different chunker or embeddings model discards the saved index."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "a.txt")
+        _write(source, "hello")
+        store = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings())
+        store.open(_SETTINGS)
+        _index(store, [source])
+
+        other = dict(_SETTINGS, embeddings={"provider": "gemini", "model": "other-model"})
+        reopened = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings())
+        reopened.open(other)
+        assert reopened.vector_store is None
+        assert reopened.plan([source]).added == [source]
+
+
+def test_index_store_incremental_update():
+    """Only added and modified files are embedded; deleted files lose their vectors."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        keep = os.path.join(temp_dir, "keep.txt")
+        edit = os.path.join(temp_dir, "edit.txt")
+        gone = os.path.join(temp_dir, "gone.txt")
+        _write(keep, "alpha\nbeta")
+        _write(edit, "gamma")
+        _write(gone, "delta")
+
+        path = os.path.join(temp_dir, "store")
+        store = IndexStore(path, _CountingEmbeddings())
+        store.open(_SETTINGS)
+        _index(store, [keep, edit, gone])
+        assert store.vector_store.index.ntotal == 4
+
+        time.sleep(0.01)
+        _write(edit, "gamma\nepsilon")
+        os.remove(gone)
+        added = os.path.join(temp_dir, "added.txt")
+        _write(added, "zeta")
+
+        embeddings = _CountingEmbeddings()
+        store = IndexStore(path, embeddings)
+        store.open(_SETTINGS)
+        changes = _index(store, [keep, edit, added])
+
+        assert changes.added == [added]
+        assert changes.modified == [edit]
+        assert changes.deleted == [source_key(gone)]
+        assert sorted(embeddings.embedded) == ["epsilon", "gamma", "zeta"]
+
+        texts = {doc.page_content for _, doc in store.vector_store.docstore.items()}
+        assert texts == {"alpha", "beta", "gamma", "epsilon", "zeta"}
+        assert store.vector_store.index.ntotal == 5
+        assert store.vector_store.similarity_search("zeta", k=1)[0].page_content == "zeta"
+
+
+def test_index_store_touched_file_is_not_reindexed():
+    """A file whose mtime changed but content did not is not re-embedded."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "a.txt")
+        _write(source, "hello")
+        store = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings())
+        store.open(_SETTINGS)
+        _index(store, [source])
+
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert store.plan([source]).count == 0
+        assert store.dirty
+
+
+def test_index_store_removing_original_invalidates_duplicates():
+    """Sources that dropped chunks as duplicates of a removed source are re-planned as modified."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original = os.path.join(temp_dir, "original.txt")
+        copy = os.path.join(temp_dir, "copy.txt")
+        _write(original, "footer")
+        _write(copy, "footer\nlore")
+
+        store = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings())
+        store.open(_SETTINGS)
+        store.add_source(original, [Document(page_content="footer")])
+        copy_key = store.start_source(copy)
+        store.add_chunks([(copy_key, Document(page_content="lore"))])
+        store.add_duplicate_of(copy_key, source_key(original))
+
+        store.remove_sources([source_key(original)])
+
+        assert store.stale == {copy_key}
+        assert store.plan([copy]).modified == [copy]
+
+
+def _random_chunks(store, file, count, dim=8):
+    """Add ``count`` chunks to ``file`` with random vectors, bypassing the embeddings."""
+    key = store.start_source(file)
+    vectors = np.random.default_rng(len(store.manifest["files"])).normal(size=(count, dim)).astype(np.float32)
+    ids = [chunk_id(key, i, str(i)) for i in range(count)]
+    store._add(ids, [f"{os.path.basename(file)} {i}" for i in range(count)], [{}] * count, vectors)
+    store.manifest["files"][key]["chunks"].extend(ids)
+    return vectors, ids
+
+
+def test_index_store_optimize_switches_backend_and_keeps_results():
+    """optimize() moves a flat store to the configured backend without changing what is found."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "big.txt")
+        _write(source, "big")
+        path = os.path.join(temp_dir, "store")
+        store = IndexStore(path, _CountingEmbeddings(), index_type="ivf", nprobe=64)
+        store.open(_SETTINGS)
+        vectors, ids = _random_chunks(store, source, 1_500)
+        assert index_type(store.vector_store.index) == "flat"
+
+        assert store.optimize() is True
+        assert index_type(store.vector_store.index) == "ivf"
+        assert store.optimize() is False
+        assert store.search(vectors[42], k=1)[0][0].page_content == "big.txt 42"
+
+        store.save()
+        reloaded = IndexStore(path, _CountingEmbeddings(), index_type="ivf")
+        reloaded.open(_SETTINGS)
+        assert index_type(reloaded.vector_store.index) == "ivf"
+
+
+def test_index_store_optimize_applies_quantization():
+    """optimize() quantizes the vectors and re-embeds them when leaving lossy SQ8."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "a.txt")
+        _write(source, "\n".join(f"line {i}" for i in range(50)))
+        embeddings = _CountingEmbeddings()
+        store = IndexStore(os.path.join(temp_dir, "store"), embeddings, quantization="sq8")
+        store.open(_SETTINGS)
+        _index(store, [source])
+
+        assert store.optimize() is True
+        assert index_quantization(store.vector_store.index) == "sq8"
+        assert store.vector_store.similarity_search("line 7", k=1)[0].page_content == "line 7"
+
+        store.quantization = "none"
+        embeddings.embedded.clear()
+        assert store.optimize() is True
+        assert index_quantization(store.vector_store.index) == "none"
+        assert sorted(embeddings.embedded) == sorted(f"line {i}" for i in range(50))
+
+
+def test_index_store_hnsw_tombstones_hide_removed_chunks():
+    """HNSW cannot delete: removed chunks are tombstoned, persisted, and compacted away by optimize()."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        keep = os.path.join(temp_dir, "keep.txt")
+        gone = os.path.join(temp_dir, "gone.txt")
+        _write(keep, "keep")
+        _write(gone, "gone")
+        path = os.path.join(temp_dir, "store")
+        store = IndexStore(path, _CountingEmbeddings(), index_type="hnsw")
+        store.open(_SETTINGS)
+        _random_chunks(store, keep, 20)
+        gone_vectors, _ = _random_chunks(store, gone, 10)
+        assert index_type(store.vector_store.index) == "hnsw"
+
+        store.remove_sources([source_key(gone)])
+        assert len(store.tombstones) == 10
+        assert all(doc.page_content.startswith("keep") for doc, _ in store.search(gone_vectors[0], k=5))
+
+        store.save()
+        reloaded = IndexStore(path, _CountingEmbeddings(), index_type="hnsw")
+        reloaded.open(_SETTINGS)
+        assert len(reloaded.tombstones) == 10
+        assert reloaded.optimize() is True
+        assert reloaded.tombstones == set()
+        assert reloaded.vector_store.index.ntotal == 20
+
+
+def test_index_store_mmap_loads_lazily_and_copies_on_write():
+    """A memory-mapped store serves searches from disk and switches to a private copy on the first change."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = os.path.join(temp_dir, "a.txt")
+        second = os.path.join(temp_dir, "b.txt")
+        _write(first, "hello\nworld")
+        _write(second, "dragons")
+        path = os.path.join(temp_dir, "store")
+        store = IndexStore(path, _CountingEmbeddings())
+        store.open(_SETTINGS)
+        _index(store, [first])
+
+        mapped = IndexStore(path, _CountingEmbeddings(), mmap=True)
+        mapped.open(_SETTINGS)
+        assert mapped._mapped_file is not None
+        assert mapped.vector_store.docstore.lazy
+        assert mapped.vector_store.similarity_search("world", k=1)[0].page_content == "world"
+
+        _index(mapped, [first, second])
+        assert mapped._mapped_file is None
+        assert mapped.vector_store.similarity_search("dragons", k=1)[0].page_content == "dragons"
+
+        reopened = IndexStore(path, _CountingEmbeddings())
+        reopened.open(_SETTINGS)
+        texts = {doc.page_content for _, doc in reopened.vector_store.docstore.items()}
+        assert texts == {"hello", "world", "dragons"}
+
+
+def test_index_store_never_replaces_an_open_docstore():
+    """Each save of a lazily read store writes a new chunk file, as Windows cannot replace open files."""
+    from unittest.mock import patch
+
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if os.path.exists(dst) and str(dst).endswith(".sqlite"):
+            raise PermissionError(f"{dst} is in use")
+        real_replace(src, dst)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = os.path.join(temp_dir, "a.txt")
+        second = os.path.join(temp_dir, "b.txt")
+        _write(first, "hello")
+        _write(second, "dragons")
+        path = os.path.join(temp_dir, "store")
+        store = IndexStore(path, _CountingEmbeddings())
+        store.open(_SETTINGS)
+        _index(store, [first])
+        mapped = IndexStore(path, _CountingEmbeddings(), mmap=True)
+        mapped.open(_SETTINGS)
+        old = mapped.manifest["docstore"]
+
+        with patch("modules.chunk_docstore.os.replace", side_effect=replace):
+            _index(mapped, [first, second])
+
+        assert mapped.manifest["docstore"] != old
+        assert [name for name in os.listdir(path) if name.endswith(".sqlite")] == [mapped.manifest["docstore"]]
+        assert mapped.vector_store.similarity_search("dragons", k=1)[0].page_content == "dragons"
+
+
+def test_index_store_migrates_pickled_docstore():
+    """Stores saved with the pickled docstore still load and are re-saved in the current format."""
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "a.txt")
+        _write(source, "hello\nworld")
+        path = os.path.join(temp_dir, "store")
+        store = IndexStore(path, _CountingEmbeddings())
+        store.open(_SETTINGS)
+        _index(store, [source])
+        vs = store.vector_store
+        FAISS(vs.embeddings, vs.index, InMemoryDocstore(dict(vs.docstore.items())), vs.index_to_docstore_id) \
+            .save_local(path, index_name="index")
+        os.remove(os.path.join(path, store.manifest["docstore"]))
+
+        legacy = IndexStore(path, _CountingEmbeddings())
+        legacy.open(_SETTINGS)
+        assert legacy.dirty
+        assert legacy.vector_store.similarity_search("hello", k=1)[0].page_content == "hello"
+        legacy.save()
+        assert os.path.exists(os.path.join(path, legacy.manifest["docstore"]))
+        assert not os.path.exists(os.path.join(path, "index.pkl"))
+
+
+def test_index_store_manifest_changes_wait_for_scoped_reads():
+    """Sources are registered and removed under ``lock``, so scoped reads never see the manifest change."""
+    import threading
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sources = [os.path.join(temp_dir, f"f{i}.txt") for i in range(20)]
+        for i, source in enumerate(sources):
+            _write(source, f"lore {i}")
+        store = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings())
+        store.open(_SETTINGS)
+        store.add_source(sources[0], [Document(page_content="lore 0")])
+
+        def churn():
+            for source in sources[1:]:
+                store.add_source(source, [Document(page_content=source)])
+                store.remove_sources([source_key(sources[0])])
+
+        with store.lock:
+            writer = threading.Thread(target=churn)
+            writer.start()
+            writer.join(0.2)
+            assert writer.is_alive()
+            assert list(store.manifest["files"]) == [source_key(sources[0])]
+        while writer.is_alive():
+            store.ids_in_scope(RetrievalScope(since=0))
+        writer.join()
+        assert len(store.ids_in_scope(RetrievalScope(since=0))) == len(sources) - 1
+
+
+def test_index_store_scoped_search_only_returns_matching_sources():
+    """ids_in_scope selects sources by path, folder, type and upload time; search stays inside them."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, "manuals"))
+        manual = os.path.join(temp_dir, "manuals", "a.txt")
+        notes = os.path.join(temp_dir, "notes.md")
+        _write(manual, "manual")
+        _write(notes, "notes")
+        store = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings(), index_type="hnsw")
+        store.open(_SETTINGS)
+        manual_vectors, manual_ids = _random_chunks(store, manual, 30)
+        since = time.time()
+        notes_vectors, notes_ids = _random_chunks(store, notes, 30)
+
+        assert sorted(store.ids_in_scope(RetrievalScope(sources=(manual,)))) == sorted(manual_ids)
+        assert sorted(store.ids_in_scope(RetrievalScope(folder=os.path.join(temp_dir, "manuals")))) == sorted(manual_ids)
+        assert sorted(store.ids_in_scope(RetrievalScope(doc_types=("MD",)))) == sorted(notes_ids)
+        assert sorted(store.ids_in_scope(RetrievalScope(since=since))) == sorted(notes_ids)
+        assert store.ids_in_scope(RetrievalScope(sources=(manual,), doc_types=("md",))) == []
+
+        hits = store.search(notes_vectors[3], k=5, ids=manual_ids)
+        assert len(hits) == 5
+        assert all(doc.page_content.startswith("a.txt") for doc, _ in hits)
+        assert store.search(manual_vectors[3], k=1, ids=manual_ids)[0][0].page_content == "a.txt 3"
+
+        store.remove_sources([manual])
+        assert store.search(manual_vectors[3], k=5, ids=manual_ids) == []
+
+
+def test_index_store_scoped_scan_copies_vectors_in_blocks_outside_the_lock():
+    """A scoped scan finds the exact nearest chunks while copying only a block of vectors per lock hold."""
+    from unittest.mock import patch
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "a.txt")
+        _write(source, "a")
+        store = IndexStore(os.path.join(temp_dir, "store"), _CountingEmbeddings())
+        store.open(_SETTINGS)
+        vectors, ids = _random_chunks(store, source, 50)
+        query = vectors[17] + 0.01
+        expected = np.argsort(((vectors - query) ** 2).sum(axis=1))[:4]
+
+        index = store.vector_store.index
+        blocks = []
+
+        def reconstruct_batch(block):
+            blocks.append(len(block))
+            return index.__class__.reconstruct_batch(index, block)
+
+        with patch("modules.index_store._SCAN_BLOCK", 8), patch.object(index, "reconstruct_batch", reconstruct_batch):
+            hits = store.search(query, k=4, ids=ids)
+
+        assert [doc.page_content for doc, _ in hits] == [f"a.txt {i}" for i in expected]
+        assert max(blocks) <= 8
+        assert sum(blocks) == 50
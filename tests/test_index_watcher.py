@@ -0,0 +1,111 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.index_watcher import RESCAN, KnowledgeWatcher, _InotifyBackend, _PollingBackend
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+def test_polling_backend_reports_added_modified_and_deleted_files():
+    """The polling backend diffs (size, mtime) snapshots between scans."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        kept = os.path.join(temp_dir, "kept.txt")
+        gone = os.path.join(temp_dir, "gone.txt")
+        _write(kept, "a")
+        _write(gone, "b")
+        backend = _PollingBackend([temp_dir], interval=0)
+
+        _write(kept, "changed")
+        os.remove(gone)
+        added = os.path.join(temp_dir, "sub", "new.txt")
+        os.makedirs(os.path.dirname(added))
+        _write(added, "c")
+
+        assert backend.poll(0) == {kept, gone, added}
+        assert backend.poll(0) == set()
+
+
+def test_polling_backend_waits_for_interval_between_scans():
+    """Short polls in between scans report nothing and do not walk the tree."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        backend = _PollingBackend([temp_dir], interval=60)
+        _write(os.path.join(temp_dir, "new.txt"), "a")
+        assert backend.poll(0) == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_backend_follows_new_subdirectories():
+    """Files written into a directory created after start-up are still reported."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        backend = _InotifyBackend([temp_dir])
+        try:
+            sub = os.path.join(temp_dir, "sub")
+            os.makedirs(sub)
+            changed = set()
+            deadline = time.monotonic() + 2
+            while sub not in backend._dirs.values() and time.monotonic() < deadline:
+                changed |= backend.poll(0.1)
+            late = os.path.join(sub, "late.txt")
+            _write(late, "x")
+            while late not in changed and time.monotonic() < deadline:
+                changed |= backend.poll(0.1)
+            assert late in changed
+        finally:
+            backend.close()
+
+
+class _ScriptedBackend:
+    """Returns the queued event batches, then nothing."""
+
+    name = "scripted"
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    def poll(self, timeout):
+        time.sleep(0.01)
+        return self.batches.pop(0) if self.batches else set()
+
+    def close(self):
+        pass
+
+
+def _run_watcher(batches, debounce=0.05):
+    calls = []
+    done = threading.Event()
+
+    def on_change(paths):
+        calls.append(paths)
+        done.set()
+
+    watcher = KnowledgeWatcher([], on_change, debounce=debounce)
+    watcher.backend = _ScriptedBackend(batches)
+    watcher._thread = threading.Thread(target=watcher._run, daemon=True)
+    watcher._thread.start()
+    done.wait(2)
+    time.sleep(debounce * 2)
+    watcher.stop()
+    return calls
+
+
+def test_watcher_debounces_bursts_into_one_sync():
+    """A burst of events produces a single callback with every changed path."""
+    calls = _run_watcher([{"a.txt"}, {"b.txt"}, {"a.txt", "c.txt"}])
+    assert calls == [{"a.txt", "b.txt", "c.txt"}]
+
+
+def test_watcher_requests_rescan_after_overflow():
+    """A backend overflow turns the pending batch into a full rescan."""
+    calls = _run_watcher([{"a.txt"}, RESCAN])
+    assert calls == [RESCAN]
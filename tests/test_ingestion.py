@@ -0,0 +1,200 @@
+import os
+import sys
+import tempfile
+import threading
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from modules.index_store import IndexStore, source_key
+from modules.ingestion import IngestionPipeline
+
+_SETTINGS = {"chunker": {"chunk_size": 20, "chunk_overlap": 0}, "embeddings": {"provider": "t", "model": "t"}}
+
+
+class _RecordingEmbeddings(Embeddings):
+    def __init__(self, on_batch=None):
+        self.fake = DeterministicFakeEmbedding(size=8)
+        self.batches = []
+        self.on_batch = on_batch
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        if self.on_batch:
+            self.on_batch()
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.fake.embed_query(text)
+
+
+class _FakeDocsManager:
+    """Yields one multi-page document per file and counts how many were produced."""
+
+    def __init__(self, pages_per_file=5):
+        self.pages_per_file = pages_per_file
+        self.produced = 0
+
+    def iter_docs(self, files):
+        for file, _ in files:
+            self.produced += 1
+            pages = [Document(page_content=f"{os.path.basename(file)} page {i}") for i in range(self.pages_per_file)]
+            yield file, pages
+
+
+def _make_files(temp_dir, count):
+    files = []
+    for i in range(count):
+        path = os.path.join(temp_dir, f"f{i}.txt")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(str(i))
+        files.append((path, False))
+    return files
+
+
+def _store(temp_dir, embeddings):
+    store = IndexStore(os.path.join(temp_dir, "store"), embeddings)
+    store.open(_SETTINGS)
+    return store
+
+
+def test_ingestion_pipeline_indexes_in_bounded_batches():
+    """Every chunk is indexed and no embedding call exceeds batch_size texts."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = _make_files(temp_dir, 7)
+        embeddings = _RecordingEmbeddings()
+        store = _store(temp_dir, embeddings)
+        splitter = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=0)
+
+        result = IngestionPipeline(_FakeDocsManager(), splitter, store, batch_size=4).run(files)
+
+        assert result.files == 7
+        assert result.chunks == 35
+        assert max(embeddings.batches) <= 4
+        assert sum(embeddings.batches) == 35
+        assert store.vector_store.index.ntotal == 35
+        assert len(store.manifest["files"][source_key(files[0][0])]["chunks"]) == 5
+
+
+def test_ingestion_pipeline_applies_backpressure():
+    """The loader cannot run more than a couple of batches ahead of embedding."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = _make_files(temp_dir, 40)
+        docs_manager = _FakeDocsManager(pages_per_file=1)
+        release = threading.Event()
+        ahead = []
+
+        def slow_first_batch():
+            if not release.is_set():
+                # Give the producer time to fill the queue while embedding is stalled.
+                release.wait(0.3)
+                ahead.append(docs_manager.produced)
+                release.set()
+
+        store = _store(temp_dir, _RecordingEmbeddings(on_batch=slow_first_batch))
+        splitter = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=0)
+
+        result = IngestionPipeline(docs_manager, splitter, store, batch_size=2).run(files)
+
+        assert result.chunks == 40
+        # batch in progress + queued batches + the one being put, at 2 files per batch
+        assert ahead[0] <= 2 * 4 + 1
+
+
+def test_ingestion_pipeline_propagates_loader_errors():
+    """A failure in the loading thread is raised in the caller."""
+
+    class _BrokenDocsManager:
+        def iter_docs(self, files):
+            raise RuntimeError("loader exploded")
+            yield  # pragma: no cover
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = _store(temp_dir, _RecordingEmbeddings())
+        pipeline = IngestionPipeline(_BrokenDocsManager(), RecursiveCharacterTextSplitter(), store)
+        try:
+            pipeline.run(_make_files(temp_dir, 1))
+            assert False, "Should have raised RuntimeError"
+        except RuntimeError as exc:
+            assert "loader exploded" in str(exc)
+
+
+class _BoilerplateDocsManager:
+    """Every file has one unique page and the same footer page."""
+
+    def iter_docs(self, files):
+        for file, _ in files:
+            name = os.path.basename(file)
+            yield file, [Document(page_content=f"{name} lore"), Document(page_content="page footer")]
+
+
+def test_ingestion_pipeline_drops_duplicate_chunks_before_embedding():
+    """Duplicate chunks are never embedded; the dropping source records who kept the original."""
+    from modules.chunk_dedup import ChunkDeduplicator
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = _make_files(temp_dir, 3)
+        embeddings = _RecordingEmbeddings()
+        store = _store(temp_dir, embeddings)
+        splitter = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=0)
+
+        pipeline = IngestionPipeline(
+            _BoilerplateDocsManager(), splitter, store, batch_size=2, deduplicator=ChunkDeduplicator(0.9)
+        )
+        result = pipeline.run(files)
+
+        assert result.chunks == 4
+        assert result.duplicates == 2
+        assert sum(embeddings.batches) == 4
+        first = source_key(files[0][0])
+        assert "duplicate_of" not in store.manifest["files"][first]
+        assert store.manifest["files"][source_key(files[2][0])]["duplicate_of"] == [first]
+
+
+def test_ingestion_pipeline_leaves_failed_loads_out_of_the_manifest():
+    """A file whose loader returned no documents is planned again instead of being fingerprinted."""
+
+    class _FailingDocsManager:
+        def iter_docs(self, files):
+            for file, _ in files:
+                yield file, [] if file.endswith("f0.txt") else [Document(page_content="lore")]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = _make_files(temp_dir, 2)
+        store = _store(temp_dir, _RecordingEmbeddings())
+
+        result = IngestionPipeline(_FailingDocsManager(), RecursiveCharacterTextSplitter(), store).run(files)
+
+        assert result.files == 1
+        assert source_key(files[0][0]) not in store.manifest["files"]
+        assert store.plan([file for file, _ in files]).added == [files[0][0]]
+
+
+def test_ingestion_pipeline_invalidates_sources_when_embedding_fails():
+    """Sources whose chunks were only partly embedded are reported as modified by the next plan."""
+    calls = []
+
+    def fail_second_batch():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("embeddings offline")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = _make_files(temp_dir, 3)
+        store = _store(temp_dir, _RecordingEmbeddings(on_batch=fail_second_batch))
+        splitter = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=0)
+        pipeline = IngestionPipeline(_FakeDocsManager(pages_per_file=3), splitter, store, batch_size=4)
+        try:
+            pipeline.run(files)
+            assert False, "Should have raised RuntimeError"
+        except RuntimeError as exc:
+            assert "embeddings offline" in str(exc)
+
+        # 3 chunks per file: the first batch completes f0 and starts f1, the failing one holds f1 and f2.
+        changes = store.plan([file for file, _ in files])
+        assert changes.added == []
+        assert changes.modified == [files[1][0], files[2][0]]
@@ -0,0 +1,150 @@
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.index_store import file_sha256, source_key
+from modules.ingestion_planner import (
+    SKIP_DUPLICATE,
+    SKIP_EMPTY,
+    SKIP_SIZE,
+    SKIP_TYPE,
+    IngestionPlanner,
+    normalize_doc_types,
+)
+
+IGNORED = [".png", ".exe", ".zip"]
+
+
+def _write(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as fh:
+        fh.write(content if isinstance(content, bytes) else content.encode("utf-8"))
+    return path
+
+
+def _reasons(plan):
+    return {os.path.basename(str(skipped.file)): skipped.reason for skipped in plan.skipped}
+
+
+def test_normalize_doc_types():
+    assert normalize_doc_types(["pdf", " .TXT", ""]) == {".pdf", ".txt"}
+    assert normalize_doc_types(None) == set()
+
+
+def test_plan_filters_types_sizes_and_empty_files():
+    """Unsupported, disallowed, empty and oversized files are skipped before loading."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        notes = _write(temp_dir, "notes.txt", "hello")
+        readme = _write(temp_dir, "readme.md", "# hi")
+        image = _write(temp_dir, "map.png", b"\x89PNG")
+        empty = _write(temp_dir, "empty.txt", "")
+        huge = _write(temp_dir, "huge.txt", "x" * 2048)
+        upload = _write(temp_dir, "upload.md", "# uploaded")
+
+        planner = IngestionPlanner(["txt"], IGNORED, max_file_bytes=1024)
+        plan = planner.plan([
+            (notes, False), (readme, False), (image, False), (empty, False), (huge, False), (upload, True),
+        ])
+
+        assert [estimate.file for estimate in plan.files] == [notes, upload]
+        assert _reasons(plan) == {
+            "readme.md": SKIP_TYPE,
+            "map.png": SKIP_TYPE,
+            "empty.txt": SKIP_EMPTY,
+            "huge.txt": SKIP_SIZE,
+        }
+
+
+def test_plan_without_allowlist_skips_only_ignored_types():
+    """Types without a dedicated loader still reach the unstructured fallback; binaries do not."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        notes = _write(temp_dir, "notes.md", "# notes")
+        book = _write(temp_dir, "book.odt", b"PK odt")
+        stats = _write(temp_dir, "stats.json", "{}")
+        binary = _write(temp_dir, "tool.exe", b"MZ")
+
+        plan = IngestionPlanner([], IGNORED).plan([(notes, False), (book, False), (stats, False), (binary, False)])
+
+        assert [estimate.file for estimate in plan.files] == [notes, book, stats]
+        assert _reasons(plan) == {"tool.exe": SKIP_TYPE}
+
+
+def test_plan_skips_duplicate_content_and_only_hashes_size_collisions():
+    """The same file in the knowledge dir and uploads/ is planned once; unique sizes are never hashed."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, "uploads"))
+        original = _write(temp_dir, "rules.txt", "same rules")
+        copy = _write(os.path.join(temp_dir, "uploads"), "rules copy.txt", "same rules")
+        unique = _write(temp_dir, "lore.txt", "a longer piece of lore")
+
+        with patch("modules.ingestion_planner.file_sha256", side_effect=file_sha256) as hashed:
+            plan = IngestionPlanner([], IGNORED).plan([(original, False), (unique, False), (copy, True)])
+
+        assert [estimate.file for estimate in plan.files] == [original, unique]
+        assert _reasons(plan) == {"rules copy.txt": SKIP_DUPLICATE}
+        assert sorted(call.args[0] for call in hashed.call_args_list) == sorted([original, copy])
+
+
+def test_plan_skips_content_already_indexed_under_another_name():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        upload = _write(temp_dir, "upload.txt", "already known")
+        indexed = {
+            source_key(os.path.join(temp_dir, "kb.txt")): {
+                "size": os.path.getsize(upload),
+                "sha256": file_sha256(upload),
+            }
+        }
+
+        plan = IngestionPlanner([], IGNORED).plan([(upload, True)], indexed=indexed)
+
+        assert plan.files == []
+        assert plan.skipped[0].reason == SKIP_DUPLICATE
+        assert plan.skipped[0].detail == "kb.txt"
+
+
+def test_plan_estimates_cost_per_file():
+    """Text files are estimated from their size, PDFs from their page count."""
+    import pymupdf
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        text = _write(temp_dir, "notes.txt", "x" * 2700)
+        pdf_path = os.path.join(temp_dir, "book.pdf")
+        pdf = pymupdf.open()
+        for _ in range(3):
+            pdf.new_page()
+        pdf.save(pdf_path)
+        pdf.close()
+
+        plan = IngestionPlanner([], IGNORED, chunk_size=300, chunk_overlap=30).plan(
+            [(text, False), (pdf_path, False)]
+        )
+        by_name = {os.path.basename(estimate.file): estimate for estimate in plan.files}
+
+        assert by_name["notes.txt"].size == 2700
+        assert by_name["notes.txt"].pages is None
+        assert by_name["notes.txt"].chunks == 10
+        assert by_name["book.pdf"].pages == 3
+        assert by_name["book.pdf"].chunks > by_name["notes.txt"].chunks
+        assert plan.total_pages == 3
+        assert plan.total_bytes == 2700 + os.path.getsize(pdf_path)
+
+
+def test_select_only_stats_files():
+    """The type and size filter neither hashes files nor opens PDFs."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        first = _write(temp_dir, "a.txt", "same")
+        second = _write(temp_dir, "b.txt", "same")
+        pdf = _write(temp_dir, "book.pdf", b"%PDF")
+
+        with patch("modules.ingestion_planner.file_sha256") as hashed, \
+             patch("modules.ingestion_planner._pdf_pages") as pages:
+            candidates, skipped = IngestionPlanner([], IGNORED).select([(first, False), (second, False), (pdf, False)])
+
+        assert candidates == [(first, False, 4), (second, False, 4), (pdf, False, 4)]
+        assert skipped == []
+        hashed.assert_not_called()
+        pages.assert_not_called()
@@ -0,0 +1,54 @@
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.lexical_index import BM25Index, tokenize
+
+
+def test_tokenize_keeps_codes_whole_and_split():
+    """Joined codes are indexed as a whole and as their parts."""
+    assert tokenize("Order XR-220, v2.1 now") == ["order", "xr-220", "xr", "220", "v2.1", "v2", "1", "now"]
+
+
+def test_bm25_ranks_rare_terms_first():
+    """A rare exact term outranks chunks that only share common words."""
+    index = BM25Index()
+    index.add(
+        [1, 2, 3],
+        ["the sword of the king", "the shield of the king", "the XR-220 amulet of the king"],
+    )
+    hits = index.search("king XR-220", k=3)
+    assert hits[0][0] == 3
+    assert {i for i, _ in hits} == {1, 2, 3}
+    assert index.search("dragon") == []
+
+
+def test_bm25_remove_and_replace():
+    """Removed chunks are no longer found; re-adding an id replaces its text."""
+    index = BM25Index()
+    index.add([1, 2], ["gold coins", "silver coins"])
+    index.remove([1])
+    assert [i for i, _ in index.search("gold coins")] == [2]
+    index.add([2], ["bronze"])
+    assert index.search("coins") == []
+    assert len(index) == 1
+
+
+def test_bm25_search_restricted_to_allowed_ids():
+    index = BM25Index()
+    index.add([1, 2, 3], ["gold coins", "gold bars", "silver coins"])
+    assert [i for i, _ in index.search("gold", allowed={2, 3})] == [2]
+    assert index.search("gold", allowed=set()) == []
+
+
+def test_bm25_json_round_trip():
+    """A saved index scores exactly like the original; foreign data is rejected."""
+    index = BM25Index()
+    index.add([10, 20], ["elves speak sindarin", "dwarves speak khuzdul in the halls"])
+    restored = BM25Index.from_json(index.to_json())
+    assert restored.ids() == {10, 20}
+    assert restored.search("speak sindarin") == index.search("speak sindarin")
+    assert BM25Index.from_json('{"version": 0}') is None
+    assert BM25Index.from_json("not json") is None
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.local_router import LocalRouter, load_examples
+from modules.prompts_manager import PromptsManager
+
+_EXAMPLES = PromptsManager.prompt_path("router_examples.txt")
+
+
+def test_load_examples_skips_comments_and_rejects_bad_labels():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "examples.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# comment\nrag\tFind the rules\n\nsimple\tHello\n")
+        assert load_examples(path) == [("rag", "Find the rules"), ("simple", "Hello")]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("maybe\tHello\n")
+        with pytest.raises(ValueError):
+            load_examples(path)
+
+
+def test_router_trained_on_shipped_examples():
+    router = LocalRouter.train(load_examples(_EXAMPLES))
+    assert router.predict("Which chapter of the rulebook explains grappling?")[0] == "rag"
+    assert router.predict("Onde o livro explica as regras de furtividade?")[0] == "rag"
+    assert router.predict("Hello, who are you?")[0] == "simple"
+    assert router.predict("Me conte uma piada")[0] == "simple"
+    label, confidence = router.predict("")
+    assert label in ("rag", "simple") and 0.5 <= confidence <= 1
+
+
+def test_router_model_is_saved_and_retrained_when_examples_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        examples = os.path.join(tmp, "examples.txt")
+        model = os.path.join(tmp, "store", "router.npz")
+        with open(examples, "w", encoding="utf-8") as f:
+            f.write("rag\tFind the rules in the book\nsimple\tHello there\n")
+        trained = LocalRouter.from_examples(examples, model)
+        assert os.path.exists(model)
+
+        loaded = LocalRouter.from_examples(examples, model)
+        assert loaded.predict("find the book") == pytest.approx(trained.predict("find the book"))
+
+        with open(examples, "a", encoding="utf-8") as f:
+            f.write("simple\tFind me a joke\n")
+        assert LocalRouter.load(model, digest="stale") is None
+        retrained = LocalRouter.from_examples(examples, model)
+        assert retrained.predict("Find me a joke")[1] != pytest.approx(trained.predict("Find me a joke")[1])
@@ -164,4 +164,101 @@ def test_prompt_analyzer_agent_heuristic_rules():
     
     for question, expected in test_questions:
         result = agent.decide(question)
-        assert result == expected, f"Failed for: {question}"
\ No newline at end of file
+        assert result == expected, f"Failed for: {question}"
+
+def test_prompt_analyzer_uses_confident_local_router():
+    """A confident router decision skips the LLM; an unsure one is escalated to it."""
+    mock_llm = MagicMock()
+    mock_llm.invoke.return_value = "simple"
+    router = MagicMock()
+    agent = PromptAnalyzerAgent(llm=mock_llm, prompt_template="test template", router=router, router_threshold=0.8)
+
+    router.predict.return_value = ("rag", 0.95)
+    assert agent.decide("What does the rulebook say about stealth?") == RoutingDecision.RAG
+    mock_llm.invoke.assert_not_called()
+
+    router.predict.return_value = ("rag", 0.6)
+    assert agent.decide("Is stealth fun?") == RoutingDecision.SIMPLE
+    mock_llm.invoke.assert_called_once()
+
+    stats = agent.stats()
+    assert stats["routed"] == 2
+    assert stats["escalated"] == 1
+    assert stats["escalation_rate"] == 0.5
+    assert stats["router_mean_us"] > 0
+
+
+def test_prompt_analyzer_caches_llm_decisions_only():
+    """Repeated questions skip the LLM; heuristic fallbacks are retried instead of cached."""
+    from modules.routing_cache import RoutingCache
+
+    mock_llm = MagicMock()
+    mock_llm.invoke.return_value = "rag"
+    cache = RoutingCache()
+    agent = PromptAnalyzerAgent(llm=mock_llm, prompt_template="test template", routing_cache=cache)
+
+    assert agent.decide("What are the stealth rules?") == RoutingDecision.RAG
+    assert agent.decide("what are the stealth rules") == RoutingDecision.RAG
+    assert mock_llm.invoke.call_count == 1
+    assert cache.stats()["hits"] == 1
+
+    mock_llm.invoke.side_effect = Exception("LLM connection error")
+    assert agent.decide("Tell me a joke") == RoutingDecision.SIMPLE
+    assert cache.stats()["entries"] == 1
+
+    other = PromptAnalyzerAgent(llm=mock_llm, prompt_template="other template", routing_cache=cache)
+    other.decide("What are the stealth rules?")
+    assert mock_llm.invoke.call_count == 3
+
+
+def test_prompt_analyzer_reads_message_content_with_stop_sequences():
+    """Chat model replies are judged by their text, with the configured stop sequences sent along."""
+    from langchain_core.messages import AIMessage
+
+    mock_llm = MagicMock()
+    mock_llm.invoke.return_value = AIMessage(content="Simple", response_metadata={"model_name": "rag-tuned"})
+    agent = PromptAnalyzerAgent(llm=mock_llm, prompt_template="{QUESTION}", stop=["\n", "."])
+
+    assert agent.decide("How are you?") == RoutingDecision.SIMPLE
+    mock_llm.invoke.assert_called_once_with("How are you?", stop=["\n", "."])
+
+
+def test_analyzer_benchmark_reports_each_provider():
+    import time
+    from modules.analyzer_benchmark import benchmark
+
+    fast, slow, broken = MagicMock(), MagicMock(), MagicMock()
+    fast.invoke.side_effect = lambda prompt, stop=None: "rag" if "rules" in prompt else "simple"
+    slow.invoke.side_effect = lambda prompt, stop=None: time.sleep(0.01) or "rag"
+    broken.invoke.side_effect = TimeoutError("analyzer timed out")
+    examples = [("rag", "Where are the stealth rules?"), ("simple", "Hello there")]
+
+    rows = {row["analyzer"]: row for row in benchmark({"fast": fast, "slow": slow, "broken": broken}, examples, "{QUESTION}")}
+    assert rows["fast"]["accuracy"] == 1.0
+    assert rows["slow"]["accuracy"] == 0.5
+    assert rows["slow"]["mean_ms"] > rows["fast"]["mean_ms"]
+    assert rows["broken"]["fallback_rate"] == 1.0
+    fast.invoke.assert_any_call("Hello there", stop=["\n", "."])
+
+
+def test_prompt_analyzer_without_llm_routes_by_rules():
+    """With no analyzer LLM, unsure router decisions are settled by the rules right away."""
+    from modules.routing_rules import RoutingRules
+
+    rules = RoutingRules({"regra*": 2}, {"olá": 2})
+    router = MagicMock()
+    router.predict.return_value = ("simple", 0.55)
+    agent = PromptAnalyzerAgent(llm=None, router=router, router_threshold=0.8, rules=rules)
+
+    assert agent.local_decision("Quais são as regras de combate?") == RoutingDecision.RAG
+    assert agent.decide("Olá, tudo bem?") == RoutingDecision.SIMPLE
+    assert agent.stats()["analyzer_calls"] == 0
+
+
+def test_prompt_analyzer_heuristic_uses_word_boundaries():
+    mock_llm = MagicMock()
+    mock_llm.invoke.side_effect = Exception("LLM error")
+    agent = PromptAnalyzerAgent(llm=mock_llm, prompt_template="test template")
+
+    assert agent.decide("How do I edit my profile?") == RoutingDecision.SIMPLE
+    assert agent.decide("Search the documents") == RoutingDecision.RAG
@@ -0,0 +1,168 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from modules.index_store import IndexStore
+from modules.retrieval import KnowledgeRetriever, RetrievalScope, maximal_marginal_relevance, reciprocal_rank_fusion
+
+_SETTINGS = {"chunker": {"chunk_size": 300, "chunk_overlap": 30}, "embeddings": {"provider": "t", "model": "t"}}
+
+
+class _UnitEmbeddings(Embeddings):
+    """Deterministic, L2-normalised fake embeddings so relevance scores land in [0, 1]."""
+
+    def __init__(self):
+        self.fake = DeterministicFakeEmbedding(size=16)
+        self.queries = 0
+
+    def _unit(self, vector):
+        vector = np.asarray(vector)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._unit(v) for v in self.fake.embed_documents(texts)]
+
+    def embed_query(self, text):
+        self.queries += 1
+        return self._unit(self.fake.embed_query(text))
+
+
+class _FixedEmbeddings(Embeddings):
+    """Embeds each known text as a given vector."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[t] for t in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def _indexed_store(temp_dir, texts, embeddings=None):
+    source = os.path.join(temp_dir, "kb.txt")
+    with open(source, "w", encoding="utf-8") as fh:
+        fh.write("\n".join(texts))
+    store = IndexStore(os.path.join(temp_dir, "store"), embeddings or _UnitEmbeddings())
+    store.open(_SETTINGS)
+    store.add_source(source, [Document(page_content=t) for t in texts])
+    return store
+
+
+def test_knowledge_retriever_returns_best_match():
+    """An exact match is returned first with relevance close to 1."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = _indexed_store(temp_dir, ["dragons live in caves", "elves speak sindarin", "gold is heavy"])
+        retriever = KnowledgeRetriever(store, k=2, score_threshold=0.3)
+
+        hits = retriever.search("elves speak sindarin")
+        assert hits[0][0].page_content == "elves speak sindarin"
+        assert hits[0][1] > 0.99
+        assert retriever.invoke("elves speak sindarin")[0].page_content == "elves speak sindarin"
+
+
+def test_knowledge_retriever_applies_threshold():
+    """Documents below score_threshold are dropped."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = _indexed_store(temp_dir, ["dragons live in caves", "elves speak sindarin"])
+        retriever = KnowledgeRetriever(store, k=4, score_threshold=0.99)
+        assert [d.page_content for d in retriever.invoke("dragons live in caves")] == ["dragons live in caves"]
+
+
+def test_knowledge_retriever_empty_store():
+    """With no vector store yet, nothing is returned and no query is embedded."""
+    embeddings = _UnitEmbeddings()
+    store = IndexStore("unused", embeddings)
+    assert KnowledgeRetriever(store).invoke("anything") == []
+    assert embeddings.queries == 0
+
+
+def test_knowledge_retriever_lexical_mode_skips_query_embedding():
+    """Lexical mode answers from the BM25 index without embedding the question."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = _indexed_store(temp_dir, ["dragons live in caves", "part XR-220 is the amulet", "gold is heavy"])
+        retriever = KnowledgeRetriever(store, k=2, mode="lexical")
+
+        queries = store.embeddings.queries
+        assert retriever.invoke("where is XR-220")[0].page_content == "part XR-220 is the amulet"
+        assert store.embeddings.queries == queries
+
+
+def test_knowledge_retriever_hybrid_finds_codes_below_threshold():
+    """Hybrid mode keeps keyword matches whose vector relevance misses the threshold."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = _indexed_store(temp_dir, ["dragons live in caves", "part XR-220 is the amulet", "gold is heavy"])
+        assert KnowledgeRetriever(store, k=2, score_threshold=0.99).invoke("XR-220") == []
+
+        retriever = KnowledgeRetriever(store, k=2, score_threshold=0.99, mode="hybrid")
+        assert [d.page_content for d in retriever.invoke("XR-220")] == ["part XR-220 is the amulet"]
+        # Documents found by both rankings are fused into a single hit.
+        hits = retriever.search("dragons live in caves")
+        assert [d.page_content for d, _ in hits] == ["dragons live in caves"]
+        assert retriever.invoke("XR-220", mode="vector") == []
+
+
+def test_knowledge_retriever_scope_limits_every_mode():
+    """A scope keeps other sources out of the results; an empty scope returns nothing."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = _indexed_store(temp_dir, ["dragons live in caves", "part XR-220 is the amulet"])
+        other = os.path.join(temp_dir, "other.md")
+        with open(other, "w", encoding="utf-8") as fh:
+            fh.write("XR-220 price list")
+        store.add_source(other, [Document(page_content="XR-220 price list")])
+        retriever = KnowledgeRetriever(store, k=4, mode="hybrid")
+
+        scope = RetrievalScope(doc_types=("md",))
+        for mode in ("vector", "hybrid", "lexical"):
+            assert [d.page_content for d in retriever.invoke("XR-220 price list", mode=mode, scope=scope)] == [
+                "XR-220 price list"
+            ]
+        assert retriever.invoke("XR-220", scope=RetrievalScope(doc_types=("pdf",))) == []
+
+
+def test_reciprocal_rank_fusion_prefers_agreement():
+    """A document ranked by both lists beats one ranked first by only one of them."""
+    a, b, c = (Document(id=i, page_content=i) for i in "abc")
+    fused = reciprocal_rank_fusion([[a, b], [c, b]])
+    assert [doc.id for doc, _ in fused] == ["b", "a", "c"]
+
+
+def test_maximal_marginal_relevance_skips_near_duplicates():
+    """The second pick is the relevant vector unlike the first, not its near copy."""
+    query = [1.0, 0.0, 0.0]
+    candidates = [[1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.7, 0.0, 0.7], [0.0, 0.0, 1.0]]
+    assert maximal_marginal_relevance(query, candidates, k=2) == [0, 2]
+    assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+    assert sorted(maximal_marginal_relevance(query, candidates, k=10)) == [0, 1, 2, 3]
+    assert maximal_marginal_relevance(query, [], k=2) == []
+
+
+def test_knowledge_retriever_mmr_mode_diversifies_context():
+    """MMR mode replaces overlapping neighbour chunks with a different relevant one."""
+    vectors = {
+        "dragons live in caves": [1.0, 0.05, 0.0],
+        "dragons live in deep caves": [1.0, 0.06, 0.0],
+        "dragons live in the deep caves": [1.0, 0.07, 0.0],
+        "dragons hoard gold": [0.8, 0.0, 0.6],
+        "elves speak sindarin": [0.0, 1.0, 0.0],
+        "where do dragons live": [1.0, 0.0, 0.0],
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = _indexed_store(temp_dir, list(vectors)[:5], _FixedEmbeddings(vectors))
+        retriever = KnowledgeRetriever(store, k=2, score_threshold=0.3, fetch_k=5)
+
+        assert [d.page_content for d in retriever.invoke("where do dragons live")] == [
+            "dragons live in caves", "dragons live in deep caves"
+        ]
+        assert [d.page_content for d in retriever.invoke("where do dragons live", mode="mmr")] == [
+            "dragons live in caves", "dragons hoard gold"
+        ]
@@ -0,0 +1,58 @@
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.retrieval_cache import RetrievalCache, normalize_question
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_question_ignores_case_and_punctuation():
+    """Trivial rewordings share a key; codes keep their inner punctuation."""
+    assert normalize_question("  What is XR-220?") == normalize_question("what is xr-220")
+    assert normalize_question("What is XR-220?") == "what is xr-220"
+    assert normalize_question("XR 220") != normalize_question("XR-220")
+
+
+def test_retrieval_cache_hits_and_stats():
+    """A repeated question at the same index version and mode is served from the cache."""
+    cache = RetrievalCache()
+    assert cache.get("Who is the king?", 1) is None
+    cache.put("Who is the king?", 1, ["doc"])
+    assert cache.get("who is the KING", 1) == ["doc"]
+    assert cache.get("who is the king", 1, mode="lexical") is None
+    assert cache.get("who is the king", 1, scope=("a.pdf",)) is None
+    assert cache.stats() == {"hits": 1, "misses": 3, "hit_rate": 1 / 4, "entries": 1, "invalidations": 0}
+
+
+def test_retrieval_cache_invalidated_by_index_version():
+    """Any lookup against a newer index version drops every cached entry."""
+    cache = RetrievalCache()
+    cache.put("a", 1, ["old"])
+    cache.put("b", 1, ["old"])
+    assert cache.get("a", 2) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_retrieval_cache_lru_and_ttl():
+    """The least recently used entry is evicted first; expired entries miss."""
+    clock = _Clock()
+    cache = RetrievalCache(max_entries=2, ttl=10, clock=clock)
+    cache.put("a", 1, ["a"])
+    cache.put("b", 1, ["b"])
+    cache.get("a", 1)
+    cache.put("c", 1, ["c"])
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == ["a"]
+
+    clock.now = 11
+    assert cache.get("c", 1) is None
@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.routing_cache import RoutingCache, routing_key
+
+
+def test_routing_key_ignores_rewording_but_not_persona_or_prompt():
+    key = routing_key("Where are the dragon rules?", "Guide", "v1")
+    assert routing_key("  where are the DRAGON rules ", "Guide", "v1") == key
+    assert routing_key("Where are the dragon rules?", "Bard", "v1") != key
+    assert routing_key("Where are the dragon rules?", "Guide", "v2") != key
+
+
+def test_routing_cache_is_bounded_lru():
+    cache = RoutingCache(max_entries=2)
+    cache.put(b"a", "rag")
+    cache.put(b"b", "simple")
+    assert cache.get(b"a") == "rag"
+    cache.put(b"c", "rag")
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == "rag"
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "entries": 2}
+
+
+def test_routing_cache_persists_most_recent_decisions():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store", "routing.sqlite")
+        cache = RoutingCache(max_entries=2, path=path)
+        for key, decision in ((b"a", "rag"), (b"b", "simple"), (b"c", "rag")):
+            cache.put(key, decision)
+        cache.close()
+
+        reloaded = RoutingCache(max_entries=2, path=path)
+        assert reloaded.get(b"a") is None
+        assert reloaded.get(b"b") == "simple"
+        assert reloaded.get(b"c") == "rag"
+        reloaded.close()
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + "/..")
+
+from modules.configs import load_all_texts
+from modules.local_router import load_examples
+from modules.prompts_manager import PromptsManager
+from modules.routing_rules import RoutingRules, parse_terms
+
+
+def test_parse_terms_weights_phrases_and_accents():
+    assert parse_terms("find:2, According  To:3, Página*, ") == {"find": 2.0, "according to": 3.0, "pagina*": 1.0}
+    with pytest.raises(ValueError):
+        parse_terms("find:lots")
+
+
+def test_rules_match_whole_words_prefixes_and_phrases():
+    rules = RoutingRules({"file*": 2, "according to": 3, "página": 1}, {"hello": 2})
+    assert rules.score("How do I set up my profile?") == 0
+    assert rules.score("Which FILES mention goblins?") == 2
+    assert rules.score("According   to the book, and according to you") == 3
+    assert rules.score("Veja a pagina 3") == 1
+    assert rules.score("Hello, open the file") == 0
+    assert rules.decide("Hello, open the file") == "simple"
+    assert rules.decide("x" * 201) == "rag"
+
+
+def test_shipped_rules_route_both_languages():
+    rules = RoutingRules.from_texts(load_all_texts().values())
+    assert rules.decide("What does the rulebook say about grappling?") == "rag"
+    assert rules.decide("Onde o livro explica as regras de furtividade?") == "rag"
+    assert rules.decide("Olá, tudo bem?") == "simple"
+    assert rules.decide("Tell me a joke") == "simple"
+    # Function words alone route nowhere.
+    assert rules.decide("Qual é a capital da França?") == "simple"
+    assert rules.decide("Qual o mais forte entre o ogro e o troll segundo o bestiário?") == "rag"
+    assert rules.decide("Does the +2 plus bonus of a magic sword stack according to the rules?") == "rag"
+
+    examples = load_examples(PromptsManager.prompt_path("router_examples.txt"))
+    correct = sum(rules.decide(question) == label for label, question in examples)
+    assert correct / len(examples) >= 0.9